@@ -0,0 +1,42 @@
+"""Add partial indexes for VM idle sweep and active VM count
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-01-20 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # check_idle_vms: status = running AND auto_shutdown_at <= now
+    op.create_index(
+        'ix_user_vms_idle_shutdown',
+        'user_vms',
+        ['auto_shutdown_at'],
+        postgresql_where=sa.text("status = 'running'"),
+    )
+
+    # _count_active_vms: user_id = ? AND status IN (provisioning, running)
+    op.create_index(
+        'ix_user_vms_user_active',
+        'user_vms',
+        ['user_id'],
+        postgresql_where=sa.text("status IN ('provisioning', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('ix_user_vms_user_active', table_name='user_vms')
+    op.drop_index('ix_user_vms_idle_shutdown', table_name='user_vms')
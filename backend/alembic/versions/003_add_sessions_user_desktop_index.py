@@ -0,0 +1,52 @@
+"""Add unique index for desktop session sync lookups
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-01-22 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # Concurrent first syncs could create duplicate rows before this index
+    # existed. Keep the most recently active one as the sync target and
+    # detach the rest (rows stay, with their messages) so the index builds.
+    op.execute(
+        """
+        UPDATE sessions SET desktop_session_id = NULL
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY user_id, desktop_session_id
+                    ORDER BY last_activity DESC, created_at DESC
+                ) AS row_num
+                FROM sessions
+                WHERE desktop_session_id IS NOT NULL
+            ) ranked
+            WHERE row_num > 1
+        )
+        """
+    )
+
+    # sync_from_desktop: user_id = ? AND desktop_session_id = ?
+    op.create_index(
+        'ix_sessions_user_desktop',
+        'sessions',
+        ['user_id', 'desktop_session_id'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('ix_sessions_user_desktop', table_name='sessions')
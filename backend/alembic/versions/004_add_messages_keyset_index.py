@@ -0,0 +1,31 @@
+"""Add index for keyset pagination of session messages
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-01-22 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    # get_session_messages: session_id = ? AND (timestamp, id) > (?, ?)
+    op.create_index(
+        'ix_messages_session_ts_id',
+        'messages',
+        ['session_id', 'timestamp', 'id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index('ix_messages_session_ts_id', table_name='messages')
@@ -0,0 +1,34 @@
+"""Let the database stamp session timestamps
+
+Uses clock_timestamp() rather than now() so rows written within one
+transaction still get distinct, ordered timestamps.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-01-23 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = ('created_at', 'updated_at', 'last_activity')
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    for column in TIMESTAMP_COLUMNS:
+        op.alter_column('sessions', column, server_default=sa.func.clock_timestamp())
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    for column in TIMESTAMP_COLUMNS:
+        op.alter_column('sessions', column, server_default=None)
@@ -15,10 +15,10 @@ from langchain_core.messages import HumanMessage, AIMessage
 
 from app.db.database import AsyncSession, get_session
 from app.db.models import (
-    User, MessageRole, AgentExecution,
+    MessageRole, AgentExecution,
     AgentExecutionStatus, AgentCheckpoint, AgentType
 )
-from app.core.auth import get_current_active_user
+from app.core.auth import AuthPrincipal, get_current_principal
 from app.services.session_service import SessionService
 from app.core.exceptions import NotFoundError, SessionError
 
@@ -75,7 +75,7 @@ async def invoke_agent(
     session_id: UUID,
     request: InvokeAgentRequest,
     background_tasks: BackgroundTasks,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
@@ -90,13 +90,13 @@ async def invoke_agent(
     service = SessionService(db)
 
     # Verify session exists and user has access
-    session = await service.get_session(session_id, current_user)
+    session = await service.get_session(session_id, principal)
 
     # Add user message to session
     input_content = request.voice_transcript or request.input_text or ""
     await service.add_message(
         session_id=session_id,
-        user=current_user,
+        principal=principal,
         role=MessageRole.USER,
         content=input_content,
         voice_transcript=request.voice_transcript,
@@ -106,7 +106,7 @@ async def invoke_agent(
     thread_id = f"thread_{session_id}_{uuid4().hex[:8]}"
     execution = AgentExecution(
         session_id=session_id,
-        user_id=current_user.id,
+        user_id=principal.id,
         thread_id=thread_id,
         status=AgentExecutionStatus.PENDING,
         task_description=input_content,
@@ -131,7 +131,7 @@ async def invoke_agent(
             final_state = await execute_agent_workflow(
                 messages=messages,
                 session_id=str(session_id),
-                user_id=str(current_user.id),
+                user_id=str(principal.id),
                 config={
                     "configurable": {
                         "thread_id": thread_id,
@@ -160,7 +160,7 @@ async def invoke_agent(
                 final_message = final_state["messages"][-1]
                 await service.add_message(
                     session_id=session_id,
-                    user=current_user,
+                    principal=principal,
                     role=MessageRole.ASSISTANT,
                     content=final_message.content if hasattr(final_message, 'content') else str(final_message),
                     agent="supervisor",
@@ -197,14 +197,14 @@ async def invoke_agent(
 @router.get("/{session_id}/agents", response_model=Dict[str, AgentStatusResponse])
 async def get_agent_statuses(
     session_id: UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
     Get current status of all agents in session.
     """
     service = SessionService(db)
-    session = await service.get_session(session_id, current_user)
+    session = await service.get_session(session_id, principal)
 
     # TODO: Phase 2 - Get actual agent statuses from LangGraph
     # For now, return placeholder statuses
@@ -227,7 +227,7 @@ async def get_agent_statuses(
 async def approve_action(
     session_id: UUID,
     request: ApprovalRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
@@ -237,7 +237,7 @@ async def approve_action(
     like code changes, git pushes, or file deletions.
     """
     service = SessionService(db)
-    session = await service.get_session(session_id, current_user)
+    session = await service.get_session(session_id, principal)
 
     # Find the active execution for this session
     result = await db.execute(
@@ -261,7 +261,7 @@ async def approve_action(
     success = await approval_manager.process_approval_response(
         request_id=execution.thread_id,  # Using thread_id as approval ID
         approved=request.approved,
-        approved_by=str(current_user.id),
+        approved_by=str(principal.id),
         feedback=request.feedback,
     )
 
@@ -271,7 +271,7 @@ async def approve_action(
             AgentExecutionStatus.APPROVED if request.approved
             else AgentExecutionStatus.REJECTED
         )
-        execution.approved_by = str(current_user.id)
+        execution.approved_by = str(principal.id)
         execution.approved_at = datetime.utcnow()
         await db.commit()
 
@@ -283,7 +283,7 @@ async def approve_action(
     # Add approval message to session
     await service.add_message(
         session_id=session_id,
-        user=current_user,
+        principal=principal,
         role=MessageRole.USER,
         content=f"{'Approved' if request.approved else 'Rejected'}: {request.feedback or 'No feedback'}",
         metadata={"type": "approval", "approved": request.approved},
@@ -299,14 +299,14 @@ async def approve_action(
 @router.post("/{session_id}/cancel", status_code=status.HTTP_200_OK)
 async def cancel_task(
     session_id: UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
     Cancel the current agent task.
     """
     service = SessionService(db)
-    session = await service.get_session(session_id, current_user)
+    session = await service.get_session(session_id, principal)
 
     # Find active execution
     result = await db.execute(
@@ -330,7 +330,7 @@ async def cancel_task(
     # Update session status
     await service.update_session(
         session_id=session_id,
-        user=current_user,
+        principal=principal,
         updates={
             "agent_statuses": {
                 agent: "cancelled" for agent in session.agent_statuses
@@ -349,7 +349,7 @@ async def cancel_task(
 @router.get("/{session_id}/executions", response_model=List[Dict[str, Any]])
 async def get_executions(
     session_id: UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
     limit: int = 10,
 ):
@@ -357,7 +357,7 @@ async def get_executions(
     Get agent execution history for a session.
     """
     service = SessionService(db)
-    await service.get_session(session_id, current_user)  # Verify access
+    await service.get_session(session_id, principal)  # Verify access
 
     result = await db.execute(
         select(AgentExecution)
@@ -390,7 +390,7 @@ async def get_executions(
 @router.get("/execution/{execution_id}", response_model=Dict[str, Any])
 async def get_execution_details(
     execution_id: UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
@@ -399,7 +399,7 @@ async def get_execution_details(
     result = await db.execute(
         select(AgentExecution)
         .where(AgentExecution.id == execution_id)
-        .where(AgentExecution.user_id == current_user.id)
+        .where(AgentExecution.user_id == principal.id)
     )
     execution = result.scalar_one_or_none()
 
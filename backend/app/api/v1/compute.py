@@ -14,7 +14,11 @@ from app.db.database import get_session
 from app.db.models import User
 from app.core.auth import get_current_user
 from app.services.compute.vm_manager import VMManager
-from app.services.compute.fly_machines import FlyMachinesError
+from app.services.compute.fly_machines import (
+    FlyMachinesClient,
+    FlyMachinesError,
+    get_fly_client,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +83,7 @@ async def provision_vm(
     request: VMProvisionRequest,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    fly_client: Optional[FlyMachinesClient] = Depends(get_fly_client),
 ):
     """
     Provision a new VM for the current user.
@@ -90,7 +95,7 @@ async def provision_vm(
         Provisioned VM details
     """
     try:
-        vm_manager = VMManager(db)
+        vm_manager = VMManager(db, fly_client)
 
         vm = await vm_manager.provision_vm(
             user_id=current_user.id,
@@ -140,6 +145,7 @@ async def list_user_vms(
     include_terminated: bool = False,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    fly_client: Optional[FlyMachinesClient] = Depends(get_fly_client),
 ):
     """
     List all VMs for the current user.
@@ -151,8 +157,8 @@ async def list_user_vms(
         List of user's VMs
     """
     try:
-        vm_manager = VMManager(db)
-        vms = await vm_manager.get_user_vms(
+        vm_manager = VMManager(db, fly_client)
+        vms = await vm_manager.list_user_vms_lite(
             user_id=current_user.id,
             include_terminated=include_terminated,
         )
@@ -194,6 +200,7 @@ async def get_vm_details(
     vm_id: UUID,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    fly_client: Optional[FlyMachinesClient] = Depends(get_fly_client),
 ):
     """
     Get detailed status of a specific VM.
@@ -205,7 +212,7 @@ async def get_vm_details(
         VM details including live status from Fly.io
     """
     try:
-        vm_manager = VMManager(db)
+        vm_manager = VMManager(db, fly_client)
         vm_status = await vm_manager.get_vm_status(vm_id)
 
         if not vm_status:
@@ -245,6 +252,7 @@ async def terminate_vm(
     force: bool = False,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    fly_client: Optional[FlyMachinesClient] = Depends(get_fly_client),
 ):
     """
     Terminate a VM.
@@ -276,7 +284,7 @@ async def terminate_vm(
                 detail="Access denied",
             )
 
-        vm_manager = VMManager(db)
+        vm_manager = VMManager(db, fly_client)
         success = await vm_manager.terminate_vm(vm_id, force=force)
 
         if not success:
@@ -302,6 +310,7 @@ async def get_vm_ssh_credentials(
     vm_id: UUID,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    fly_client: Optional[FlyMachinesClient] = Depends(get_fly_client),
 ):
     """
     Get SSH connection credentials for a VM.
@@ -332,7 +341,7 @@ async def get_vm_ssh_credentials(
                 detail="Access denied",
             )
 
-        vm_manager = VMManager(db)
+        vm_manager = VMManager(db, fly_client)
         creds = await vm_manager.get_ssh_credentials(vm_id)
 
         if not creds:
@@ -358,6 +367,7 @@ async def update_vm_activity(
     vm_id: UUID,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    fly_client: Optional[FlyMachinesClient] = Depends(get_fly_client),
 ):
     """
     Update VM activity timestamp to extend auto-shutdown.
@@ -388,7 +398,7 @@ async def update_vm_activity(
                 detail="Access denied",
             )
 
-        vm_manager = VMManager(db)
+        vm_manager = VMManager(db, fly_client)
         await vm_manager.update_vm_activity(vm_id)
 
         return {"success": True, "message": "Activity updated"}
@@ -408,6 +418,7 @@ async def get_compute_costs(
     days: int = 30,
     db: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
+    fly_client: Optional[FlyMachinesClient] = Depends(get_fly_client),
 ):
     """
     Get compute costs for the current user.
@@ -419,7 +430,7 @@ async def get_compute_costs(
         Cost summary
     """
     try:
-        vm_manager = VMManager(db)
+        vm_manager = VMManager(db, fly_client)
         costs = await vm_manager.get_user_compute_costs(
             user_id=current_user.id,
             days=days,
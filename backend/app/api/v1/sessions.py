@@ -1,17 +1,18 @@
 """
 Session management endpoints.
 """
-from typing import List, Optional, Annotated
+from typing import Any, List, Optional, Annotated
+import base64
 from uuid import UUID
-from fastapi import APIRouter, Depends, status, Query
-from pydantic import BaseModel, Field, validator, HttpUrl
+from fastapi import APIRouter, Depends, Query, Response, status
+from pydantic import BaseModel, Field, TypeAdapter, validator, HttpUrl
 from datetime import datetime
 
 from app.db.database import AsyncSession, get_session
-from app.db.models import User, SessionStatus, MessageRole
-from app.core.auth import get_current_active_user
-from app.services.session_service import SessionService
-from app.core.exceptions import NotFoundError, SessionError
+from app.db.models import SessionStatus, MessageRole
+from app.core.auth import AuthPrincipal, get_current_principal
+from app.services.session_service import MessageCursor, SessionService
+from app.core.exceptions import NotFoundError, SessionError, ValidationError
 
 router = APIRouter()
 
@@ -98,6 +99,33 @@ class SessionResponse(BaseModel):
         from_attributes = True
 
 
+# Serializes trusted session models straight to JSON bytes
+_session_list_adapter = TypeAdapter(List[SessionResponse])
+
+
+def _trusted_session(source: Any) -> SessionResponse:
+    """
+    Build a SessionResponse from a Session object or row without validation.
+
+    Only for values read back from our own database, whose column types
+    already match the response fields.
+    """
+    return SessionResponse.model_construct(
+        **{name: getattr(source, name) for name in SessionResponse.model_fields}
+    )
+
+
+def _json_response(content: bytes) -> Response:
+    """
+    Wrap pre-serialized JSON.
+
+    Returning a Response skips FastAPI's response_model pass, which would
+    otherwise dump and re-validate every field; response_model then only
+    documents the schema.
+    """
+    return Response(content=content, media_type="application/json")
+
+
 class MessageResponse(BaseModel):
     """Response model for message data."""
 
@@ -117,7 +145,7 @@ class MessageResponse(BaseModel):
 @router.post("/", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_session(
     request: CreateSessionRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
@@ -125,7 +153,7 @@ async def create_session(
     """
     service = SessionService(db)
     session = await service.create_session(
-        user=current_user,
+        principal=principal,
         repo_url=request.repo_url,
         branch_name=request.branch_name,
         project_name=request.project_name,
@@ -136,7 +164,7 @@ async def create_session(
 
 @router.get("/", response_model=List[SessionResponse])
 async def list_sessions(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
     status: Optional[SessionStatus] = Query(None, description="Filter by status"),
     limit: int = Query(20, ge=1, le=100, description="Maximum results"),
@@ -147,46 +175,48 @@ async def list_sessions(
     """
     service = SessionService(db)
     sessions = await service.list_user_sessions(
-        user=current_user,
+        principal=principal,
         status=status,
         limit=limit,
         offset=offset,
     )
-    return [SessionResponse.model_validate(s) for s in sessions]
+    return _json_response(
+        _session_list_adapter.dump_json([_trusted_session(s) for s in sessions])
+    )
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
     Get session details.
     """
     service = SessionService(db)
-    session = await service.get_session(session_id, current_user)
-    return SessionResponse.model_validate(session)
+    session = await service.get_session(session_id, principal)
+    return _json_response(_trusted_session(session).model_dump_json())
 
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
     session_id: UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
     End and delete a session.
     """
     service = SessionService(db)
-    await service.delete_session(session_id, current_user)
+    await service.delete_session(session_id, principal)
     return None
 
 
 @router.post("/{session_id}/sync", response_model=SessionResponse)
 async def sync_session(
     request: SyncSessionRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
@@ -204,29 +234,54 @@ async def sync_session(
     }
 
     session = await service.sync_from_desktop(
-        user=current_user,
+        principal=principal,
         desktop_session_id=request.desktop_session_id,
         context=context,
     )
     return SessionResponse.model_validate(session)
 
 
+def _encode_message_cursor(cursor: MessageCursor) -> str:
+    """Serialize a message cursor into an opaque, URL-safe token."""
+    timestamp, message_id = cursor
+    raw = f"{timestamp.isoformat()}|{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_message_cursor(value: str) -> MessageCursor:
+    """Parse a token produced by _encode_message_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(value.encode()).decode()
+        timestamp, message_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), UUID(message_id)
+    except ValueError:
+        raise ValidationError("Invalid message cursor")
+
+
 @router.get("/{session_id}/messages", response_model=List[MessageResponse])
 async def get_session_messages(
     session_id: UUID,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    response: Response,
+    principal: Annotated[AuthPrincipal, Depends(get_current_principal)],
     db: Annotated[AsyncSession, Depends(get_session)],
     limit: int = Query(50, ge=1, le=200, description="Maximum messages"),
-    offset: int = Query(0, ge=0, description="Skip messages"),
+    after: Optional[str] = Query(
+        None, description="Cursor from a previous page's X-Next-Cursor header"
+    ),
 ):
     """
     Get messages for a session.
+
+    When more messages remain, the X-Next-Cursor response header holds the
+    cursor to pass as `after` for the next page.
     """
     service = SessionService(db)
-    messages = await service.get_session_messages(
+    messages, next_cursor = await service.get_session_messages(
         session_id=session_id,
-        user=current_user,
+        principal=principal,
         limit=limit,
-        offset=offset,
+        after=_decode_message_cursor(after) if after else None,
     )
-    return [MessageResponse.model_validate(m) for m in messages]
\ No newline at end of file
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = _encode_message_cursor(next_cursor)
+    return [MessageResponse.model_validate(m) for m in messages]
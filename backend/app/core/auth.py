@@ -1,7 +1,9 @@
 """
 Authentication dependencies and utilities.
 """
+from dataclasses import dataclass
 from typing import Optional, Annotated
+from uuid import UUID
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -10,6 +12,7 @@ import httpx
 
 from app.db.database import get_session
 from app.db.models import User
+from app.core.cache import TTLCache
 from app.core.security import decode_token
 from app.core.exceptions import AuthenticationError, AuthorizationError
 from app.config import settings
@@ -18,6 +21,96 @@ from app.config import settings
 # Security scheme for JWT bearer tokens
 security = HTTPBearer(auto_error=False)
 
+# How long a user's active/superuser flags are reused before re-reading them,
+# bounding how long a deactivated user or demoted admin keeps access
+PRINCIPAL_CACHE_TTL_SECONDS = 30.0
+
+# user id -> (is_active, is_superuser)
+_principal_cache = TTLCache(maxsize=10_000, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+@dataclass(slots=True, frozen=True)
+class AuthPrincipal:
+    """
+    Identity and privileges of the caller.
+
+    Enough for ownership checks without loading the full User row; endpoints
+    that need the profile should depend on get_current_user instead.
+    """
+
+    id: UUID
+    is_superuser: bool = False
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthPrincipal":
+        """Build a principal from a loaded User."""
+        return cls(id=user.id, is_superuser=user.is_superuser)
+
+
+async def get_current_principal(
+    credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(security)],
+    db: Annotated[AsyncSession, Depends(get_session)],
+) -> AuthPrincipal:
+    """
+    Get the current caller's principal from the JWT token.
+
+    Privileges come from the User row rather than the token claims, so
+    deactivation and superuser changes apply before the token expires. The
+    flags are cached per user for PRINCIPAL_CACHE_TTL_SECONDS.
+
+    Args:
+        credentials: JWT bearer token from Authorization header
+        db: Database session
+
+    Returns:
+        Principal for the token's user
+
+    Raises:
+        AuthenticationError: If token is invalid or user is missing or inactive
+    """
+    if not credentials:
+        raise AuthenticationError("Not authenticated")
+
+    try:
+        token_data = decode_token(credentials.credentials)
+        user_id = UUID(token_data.sub)
+
+    except AuthenticationError:
+        raise
+    except Exception as e:
+        raise AuthenticationError(f"Could not validate credentials: {str(e)}")
+
+    flags = _principal_cache.get(user_id)
+    if flags is None:
+        result = await db.execute(
+            select(User.is_active, User.is_superuser).where(User.id == user_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            raise AuthenticationError("User not found")
+
+        flags = (row.is_active, row.is_superuser)
+        _principal_cache.set(user_id, flags)
+
+    is_active, is_superuser = flags
+    if not is_active:
+        raise AuthenticationError("User account is inactive")
+
+    return AuthPrincipal(id=user_id, is_superuser=is_superuser)
+
+
+def invalidate_principal_cache(user_id: Optional[UUID] = None) -> None:
+    """
+    Drop cached user flags so the next request re-reads them.
+
+    Args:
+        user_id: User to invalidate (all users if omitted)
+    """
+    if user_id is None:
+        _principal_cache.clear()
+    else:
+        _principal_cache.pop(user_id)
+
 
 async def get_current_user(
     credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(security)],
@@ -12,10 +12,13 @@ from sqlalchemy import (
     Text,
     JSON,
     Integer,
+    Index,
     Enum as SQLEnum,
+    func,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.mutable import MutableDict, MutableList
 import uuid
 import enum
 
@@ -127,37 +130,61 @@ class Session(Base):
 
     # Agent state
     langgraph_thread_id = Column(String(255), nullable=True, unique=True)
-    agent_statuses = Column(JSON, nullable=False, default=dict)  # Dict[str, str]
+    # Mutable wrappers mark the row dirty on in-place edits and leave the
+    # column out of the UPDATE when untouched
+    agent_statuses = Column(
+        MutableDict.as_mutable(JSON), nullable=False, default=dict
+    )  # Dict[str, str]
     current_agent = Column(String(100), nullable=True)
 
     # Git tracking
     initial_commit_sha = Column(String(40), nullable=True)
     current_commit_sha = Column(String(40), nullable=True)
-    files_changed = Column(JSON, nullable=False, default=list)  # List[str]
+    files_changed = Column(
+        MutableList.as_mutable(JSON), nullable=False, default=list
+    )  # List[str]
 
     # VM tracking
     vm_machine_id = Column(String(255), nullable=True)  # Fly.io machine ID
     vm_status = Column(String(50), nullable=True)  # running, stopped, terminated
 
-    # Timestamps
+    # Timestamps (set by the database so they agree across app instances;
+    # clock_timestamp, unlike now(), still orders rows within one transaction)
     created_at = Column(
-        DateTime(timezone=True), nullable=False, default=datetime.utcnow
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.clock_timestamp(),
     )
     updated_at = Column(
         DateTime(timezone=True),
         nullable=False,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow,
+        server_default=func.clock_timestamp(),
+        onupdate=func.clock_timestamp(),
     )
     completed_at = Column(DateTime(timezone=True), nullable=True)
     last_activity = Column(
-        DateTime(timezone=True), nullable=False, default=datetime.utcnow
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.clock_timestamp(),
     )
 
     # Relationships
     user = relationship("User", back_populates="sessions")
     messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
 
+    # Fetch DB-generated timestamps with RETURNING instead of expiring them
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Natural key for desktop sync lookups
+        Index(
+            "ix_sessions_user_desktop",
+            user_id,
+            desktop_session_id,
+            unique=True,
+        ),
+    )
+
 
 class Message(Base):
     """Message model for storing conversation history."""
@@ -191,6 +218,11 @@ class Message(Base):
     # Relationships
     session = relationship("Session", back_populates="messages")
 
+    __table_args__ = (
+        # Keyset pagination of a session's messages
+        Index("ix_messages_session_ts_id", session_id, timestamp, id),
+    )
+
 
 class UserAPIKeys(Base):
     """Encrypted API keys for users (BYOK model)."""
@@ -310,6 +342,20 @@ class UserVM(Base):
         "ComputeUsage", back_populates="vm", cascade="all, delete-orphan"
     )
 
+    # Partial indexes for the idle-shutdown sweep and per-user active VM limit
+    __table_args__ = (
+        Index(
+            "ix_user_vms_idle_shutdown",
+            auto_shutdown_at,
+            postgresql_where=(status == VMStatus.RUNNING),
+        ),
+        Index(
+            "ix_user_vms_user_active",
+            user_id,
+            postgresql_where=status.in_([VMStatus.PROVISIONING, VMStatus.RUNNING]),
+        ),
+    )
+
 
 class MCPServerType(str, enum.Enum):
     """MCP server type enumeration."""
@@ -16,6 +16,9 @@ from app.api.v1.router import api_router
 from app.api.websocket import router as websocket_router
 from app.mcp.proxy import get_mcp_proxy
 from app.services.compute.scheduler import start_vm_scheduler, stop_vm_scheduler
+from app.services.compute.fly_machines import close_fly_client
+from app.services.compute.usage_writer import start_usage_writer, stop_usage_writer
+from app.services.compute.vm_manager import cancel_auto_shutdowns, flush_vm_activity
 
 # Configure logging
 logging.basicConfig(
@@ -67,6 +70,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     except Exception as e:
         logger.warning(f"Failed to initialize MCP proxy: {e}")
 
+    # Start write-behind queue for compute usage records
+    await start_usage_writer()
+
     # Start VM scheduler for auto-shutdown
     if settings.FLY_API_TOKEN:
         try:
@@ -89,6 +95,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     except Exception as e:
         logger.warning(f"Error stopping VM scheduler: {e}")
 
+    # Write any debounced VM activity before the pool closes
+    cancel_auto_shutdowns()
+    await flush_vm_activity()
+    await stop_usage_writer()
+
     # Shutdown MCP proxy
     try:
         mcp_proxy = await get_mcp_proxy()
@@ -97,6 +108,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     except Exception as e:
         logger.warning(f"Error shutting down MCP proxy: {e}")
 
+    await close_fly_client()
     await close_db()
     logger.info("Cleanup complete")
 
@@ -68,6 +68,8 @@ class BaseMCPClient(ABC):
         self._connected = False
         self._tools_cache: Optional[List[Dict[str, Any]]] = None
         self._last_cache_update: Optional[datetime] = None
+        # Cached tools keyed by name, for argument validation
+        self._tools_by_name: Dict[str, Dict[str, Any]] = {}
 
     @property
     @abstractmethod
@@ -91,9 +93,18 @@ class BaseMCPClient(ABC):
 
     @abstractmethod
     async def disconnect(self) -> None:
-        """Close connection to the MCP server."""
+        """
+        Mark the client disconnected and drop its tools cache.
+
+        Pooled HTTP connections are kept for the next connect(); use
+        aclose() to release them.
+        """
         pass
 
+    async def aclose(self) -> None:
+        """Disconnect and release the client's HTTP resources."""
+        await self.disconnect()
+
     @abstractmethod
     async def list_tools(self, refresh: bool = False) -> List[Dict[str, Any]]:
         """
@@ -165,8 +176,9 @@ class BaseMCPClient(ABC):
         Raises:
             MCPToolNotFoundError: If tool doesn't exist
         """
-        tools = await self.list_tools()
-        tool = next((t for t in tools if t["name"] == tool_name), None)
+        # Refreshes the cache (and its name index) when stale
+        await self.list_tools()
+        tool = self._tools_by_name.get(tool_name)
 
         if not tool:
             raise MCPToolNotFoundError(f"Tool '{tool_name}' not found on {self.server_type} server")
@@ -191,5 +203,12 @@ class BaseMCPClient(ABC):
     def _update_tools_cache(self, tools: List[Dict[str, Any]]) -> None:
         """Update the internal tools cache."""
         self._tools_cache = tools
+        self._tools_by_name = {tool["name"]: tool for tool in tools}
         self._last_cache_update = datetime.utcnow()
         logger.debug(f"Updated tools cache for {self.server_type} with {len(tools)} tools")
+
+    def _clear_tools_cache(self) -> None:
+        """Drop the internal tools cache."""
+        self._tools_cache = None
+        self._tools_by_name = {}
+        self._last_cache_update = None
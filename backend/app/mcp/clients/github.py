@@ -21,6 +21,128 @@ from app.mcp.base import (
 logger = logging.getLogger(__name__)
 
 
+# Built-in tool definitions, matching github/github-mcp-server
+BUILTIN_TOOLS: List[Dict[str, Any]] = [
+    {
+        "name": "create_repository",
+        "description": "Create a new GitHub repository",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Repository name"},
+                "description": {
+                    "type": "string",
+                    "description": "Repository description",
+                },
+                "private": {
+                    "type": "boolean",
+                    "description": "Whether the repository is private",
+                    "default": False,
+                },
+            },
+            "required": ["name"],
+        },
+    },
+    {
+        "name": "create_issue",
+        "description": "Create a new issue in a repository",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'",
+                },
+                "title": {"type": "string", "description": "Issue title"},
+                "body": {"type": "string", "description": "Issue body"},
+                "labels": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Issue labels",
+                },
+            },
+            "required": ["repo", "title"],
+        },
+    },
+    {
+        "name": "create_pull_request",
+        "description": "Create a new pull request",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'",
+                },
+                "title": {"type": "string", "description": "PR title"},
+                "body": {"type": "string", "description": "PR description"},
+                "head": {"type": "string", "description": "Head branch name"},
+                "base": {
+                    "type": "string",
+                    "description": "Base branch name",
+                    "default": "main",
+                },
+            },
+            "required": ["repo", "title", "head"],
+        },
+    },
+    {
+        "name": "get_file_contents",
+        "description": "Get contents of a file from a repository",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'",
+                },
+                "path": {"type": "string", "description": "File path"},
+                "branch": {
+                    "type": "string",
+                    "description": "Branch name",
+                    "default": "main",
+                },
+            },
+            "required": ["repo", "path"],
+        },
+    },
+    {
+        "name": "search_code",
+        "description": "Search code in repositories",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Search query"},
+                "repo": {
+                    "type": "string",
+                    "description": "Optional repository to limit search",
+                },
+            },
+            "required": ["query"],
+        },
+    },
+    {
+        "name": "list_pull_requests",
+        "description": "List pull requests for a repository",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'",
+                },
+                "state": {
+                    "type": "string",
+                    "enum": ["open", "closed", "all"],
+                    "default": "open",
+                },
+            },
+            "required": ["repo"],
+        },
+    },
+]
+
+
 class GitHubMCPClient(BaseMCPClient):
     """
     Client for GitHub MCP server operations.
@@ -33,6 +155,7 @@ class GitHubMCPClient(BaseMCPClient):
         server_url: Optional[str] = None,
         timeout: int = 30,
         max_retries: int = 3,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
     ):
         """
         Initialize GitHub MCP client.
@@ -41,8 +164,11 @@ class GitHubMCPClient(BaseMCPClient):
             server_url: URL of the GitHub MCP server (if using remote)
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts
+            transport: Optional httpx transport (e.g. httpx.MockTransport
+                in tests); defaults to the network
         """
         super().__init__(server_url=server_url, timeout=timeout, max_retries=max_retries)
+        self._transport = transport
         self._http_client: Optional[httpx.AsyncClient] = None
 
     @property
@@ -65,15 +191,18 @@ class GitHubMCPClient(BaseMCPClient):
             raise MCPAuthenticationError("GitHub token is required")
 
         try:
-            # Initialize HTTP client with auth headers
-            self._http_client = httpx.AsyncClient(
-                timeout=httpx.Timeout(self.timeout),
-                headers={
-                    "Authorization": f"Bearer {auth_token}",
-                    "Accept": "application/json",
-                    "User-Agent": "Paraclete-MCP-Client/1.0",
-                },
-            )
+            # Reuse the pooled HTTP client across reconnects; only the
+            # caller's token changes
+            if self._http_client is None:
+                self._http_client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout),
+                    headers={
+                        "Accept": "application/json",
+                        "User-Agent": "Paraclete-MCP-Client/1.0",
+                    },
+                    transport=self._transport,
+                )
+            self._http_client.headers["Authorization"] = f"Bearer {auth_token}"
 
             # Test connection by listing tools
             if self.server_url:
@@ -99,12 +228,17 @@ class GitHubMCPClient(BaseMCPClient):
             raise MCPConnectionError(f"Unexpected error: {e}")
 
     async def disconnect(self) -> None:
-        """Close connection to GitHub MCP server."""
+        """Disconnect from GitHub MCP server, keeping the HTTP client warm."""
+        self._connected = False
+        self._clear_tools_cache()
+        logger.info("Disconnected from GitHub MCP server")
+
+    async def aclose(self) -> None:
+        """Disconnect and close the HTTP client."""
+        await self.disconnect()
         if self._http_client:
             await self._http_client.aclose()
             self._http_client = None
-        self._connected = False
-        logger.info("Disconnected from GitHub MCP server")
 
     async def list_tools(self, refresh: bool = False) -> List[Dict[str, Any]]:
         """
@@ -194,127 +328,11 @@ class GitHubMCPClient(BaseMCPClient):
         """
         Get built-in GitHub tool definitions.
 
-        These match the tools provided by github/github-mcp-server.
+        These match the tools provided by github/github-mcp-server. The
+        definitions are static, so every client shares one list; callers
+        must not mutate it.
         """
-        return [
-            {
-                "name": "create_repository",
-                "description": "Create a new GitHub repository",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "name": {"type": "string", "description": "Repository name"},
-                        "description": {
-                            "type": "string",
-                            "description": "Repository description",
-                        },
-                        "private": {
-                            "type": "boolean",
-                            "description": "Whether the repository is private",
-                            "default": False,
-                        },
-                    },
-                    "required": ["name"],
-                },
-            },
-            {
-                "name": "create_issue",
-                "description": "Create a new issue in a repository",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "repo": {
-                            "type": "string",
-                            "description": "Repository in format 'owner/repo'",
-                        },
-                        "title": {"type": "string", "description": "Issue title"},
-                        "body": {"type": "string", "description": "Issue body"},
-                        "labels": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "Issue labels",
-                        },
-                    },
-                    "required": ["repo", "title"],
-                },
-            },
-            {
-                "name": "create_pull_request",
-                "description": "Create a new pull request",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "repo": {
-                            "type": "string",
-                            "description": "Repository in format 'owner/repo'",
-                        },
-                        "title": {"type": "string", "description": "PR title"},
-                        "body": {"type": "string", "description": "PR description"},
-                        "head": {"type": "string", "description": "Head branch name"},
-                        "base": {
-                            "type": "string",
-                            "description": "Base branch name",
-                            "default": "main",
-                        },
-                    },
-                    "required": ["repo", "title", "head"],
-                },
-            },
-            {
-                "name": "get_file_contents",
-                "description": "Get contents of a file from a repository",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "repo": {
-                            "type": "string",
-                            "description": "Repository in format 'owner/repo'",
-                        },
-                        "path": {"type": "string", "description": "File path"},
-                        "branch": {
-                            "type": "string",
-                            "description": "Branch name",
-                            "default": "main",
-                        },
-                    },
-                    "required": ["repo", "path"],
-                },
-            },
-            {
-                "name": "search_code",
-                "description": "Search code in repositories",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "Search query"},
-                        "repo": {
-                            "type": "string",
-                            "description": "Optional repository to limit search",
-                        },
-                    },
-                    "required": ["query"],
-                },
-            },
-            {
-                "name": "list_pull_requests",
-                "description": "List pull requests for a repository",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "repo": {
-                            "type": "string",
-                            "description": "Repository in format 'owner/repo'",
-                        },
-                        "state": {
-                            "type": "string",
-                            "enum": ["open", "closed", "all"],
-                            "default": "open",
-                        },
-                    },
-                    "required": ["repo"],
-                },
-            },
-        ]
+        return BUILTIN_TOOLS
 
     async def _execute_builtin_tool(
         self, tool_name: str, arguments: Dict[str, Any]
@@ -68,14 +68,16 @@ class SlackMCPClient(BaseMCPClient):
             raise MCPConnectionError("Slack MCP server URL is required")
 
         try:
-            # Initialize HTTP client
-            self._http_client = httpx.AsyncClient(
-                timeout=httpx.Timeout(self.timeout),
-                headers={
-                    "Authorization": f"Bearer {auth_token}",
-                    "Accept": "application/json",
-                },
-            )
+            # Reuse the pooled HTTP client across reconnects; only the
+            # caller's token changes
+            if self._http_client is None:
+                self._http_client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout),
+                    headers={
+                        "Accept": "application/json",
+                    },
+                )
+            self._http_client.headers["Authorization"] = f"Bearer {auth_token}"
 
             # Test connection
             response = await self._http_client.get(f"{self.server_url}/tools")
@@ -94,12 +96,17 @@ class SlackMCPClient(BaseMCPClient):
             raise MCPConnectionError(f"Connection error: {e}")
 
     async def disconnect(self) -> None:
-        """Close connection to Slack MCP server."""
+        """Disconnect from Slack MCP server, keeping the HTTP client warm."""
+        self._connected = False
+        self._clear_tools_cache()
+        logger.info("Disconnected from Slack MCP server")
+
+    async def aclose(self) -> None:
+        """Disconnect and close the HTTP client."""
+        await self.disconnect()
         if self._http_client:
             await self._http_client.aclose()
             self._http_client = None
-        self._connected = False
-        logger.info("Disconnected from Slack MCP server")
 
     async def list_tools(self, refresh: bool = False) -> List[Dict[str, Any]]:
         """
@@ -5,12 +5,17 @@ Provides a unified interface for all MCP operations with connection pooling,
 authentication passthrough, and error handling.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
+import hashlib
+import random
+import time
 from contextlib import asynccontextmanager
 
+import orjson
+
 from app.mcp.clients import GitHubMCPClient, FigmaMCPClient, SlackMCPClient
 from app.mcp.base import (
     BaseMCPClient,
@@ -18,10 +23,51 @@ from app.mcp.base import (
     MCPToolNotFoundError,
     MCPConnectionError,
 )
+from app.core.cache import TTLCache
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on a single retry backoff sleep
+MAX_RETRY_BACKOFF_SECONDS = 30.0
+
+# Per-server budget for status probes so one slow upstream can't stall the rest
+STATUS_PROBE_TIMEOUT_SECONDS = 2.0
+
+
+# Read-only tools whose results may be reused, as "server_type.tool_name" -> TTL seconds
+CACHEABLE_TOOLS: Dict[str, int] = {
+    "github.get_file_contents": 120,
+    "github.search_code": 60,
+    "github.list_pull_requests": 30,
+}
+
+# Tools with these prefixes mutate upstream state and are never cached
+MUTATING_TOOL_PREFIXES = ("create_", "update_", "delete_", "send_", "post_", "merge_")
+
+
+def _token_fingerprint(auth_token: str) -> str:
+    """Hash an auth token so cache keys never hold the raw credential."""
+    return hashlib.blake2b(auth_token.encode(), digest_size=16).hexdigest()
+
+
+def _tool_cache_ttl(server_type: str, tool_name: str) -> int:
+    """Return the result cache TTL for a tool, or 0 if it must not be cached."""
+    if tool_name.startswith(MUTATING_TOOL_PREFIXES):
+        return 0
+    return CACHEABLE_TOOLS.get(f"{server_type}.{tool_name}", 0)
+
+
+def _tool_call_key(
+    server_type: str, tool_name: str, arguments: Dict[str, Any], auth_token: str
+) -> str:
+    """Build a cache key from the tool identity, canonical arguments and caller token."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{server_type}|{tool_name}|".encode())
+    digest.update(orjson.dumps(arguments, option=orjson.OPT_SORT_KEYS, default=str))
+    digest.update(b"|" + auth_token.encode())
+    return digest.hexdigest()
+
 
 class MCPProxyServer:
     """
@@ -41,6 +87,22 @@ class MCPProxyServer:
         self._client_locks: Dict[str, asyncio.Lock] = {}
         self._initialized = False
 
+        # list_tools results keyed by (server_type, token fingerprint)
+        self._tools_cache = TTLCache(
+            maxsize=1024, ttl=settings.MCP_TOOLS_CACHE_TTL_SECONDS
+        )
+        # Per-key fetch locks expire like the entries so unseen tokens don't pile up
+        self._tools_cache_locks = TTLCache(
+            maxsize=1024, ttl=settings.MCP_TOOLS_CACHE_TTL_SECONDS
+        )
+
+        # Results of read-only tool calls, plus in-flight calls for deduplication
+        self._tool_results = TTLCache(maxsize=10_000, ttl=max(CACHEABLE_TOOLS.values()))
+        self._inflight_tool_calls: Dict[str, asyncio.Task] = {}
+
+        # (monotonic second, formatted timestamp) reused by frequent health probes
+        self._health_timestamp: Tuple[int, str] = (-1, "")
+
     async def initialize(self) -> None:
         """Initialize all MCP clients."""
         if self._initialized:
@@ -73,10 +135,10 @@ class MCPProxyServer:
         logger.info(f"MCP Proxy Server initialized with {len(self._clients)} clients")
 
     async def shutdown(self) -> None:
-        """Shutdown all MCP clients."""
+        """Shutdown all MCP clients and close their HTTP connections."""
+        # Disconnected clients may still hold a pooled HTTP client
         for client in self._clients.values():
-            if client.is_connected:
-                await client.disconnect()
+            await client.aclose()
         logger.info("MCP Proxy Server shutdown complete")
 
     @asynccontextmanager
@@ -119,8 +181,11 @@ class MCPProxyServer:
                 # Try to reconnect on next request
                 try:
                     await client.disconnect()
-                except:
-                    pass
+                except Exception as disconnect_err:
+                    logger.debug(
+                        f"Suppressed error disconnecting {server_type} client: "
+                        f"{disconnect_err}"
+                    )
                 raise
 
     async def list_servers(self) -> List[Dict[str, Any]]:
@@ -141,6 +206,24 @@ class MCPProxyServer:
                 ...
             ]
         """
+        # Fetch tool counts for all connected clients concurrently
+        connected = [
+            server_type
+            for server_type, client in self._clients.items()
+            if client.is_connected
+        ]
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    self._clients[server_type].list_tools(),
+                    timeout=STATUS_PROBE_TIMEOUT_SECONDS,
+                )
+                for server_type in connected
+            ),
+            return_exceptions=True,
+        )
+        tool_results = dict(zip(connected, results))
+
         servers = []
 
         for server_type, client in self._clients.items():
@@ -150,15 +233,18 @@ class MCPProxyServer:
                 "requires_auth": True,
             }
 
-            # If connected, get tool count
-            if client.is_connected:
-                try:
-                    tools = await client.list_tools()
-                    server_info["tools_count"] = len(tools)
-                except Exception as e:
-                    logger.error(f"Error listing tools for {server_type}: {e}")
+            if server_type in tool_results:
+                tools = tool_results[server_type]
+                if isinstance(tools, asyncio.TimeoutError):
+                    logger.error(f"Timed out listing tools for {server_type}")
+                    server_info["status"] = "error"
+                    server_info["error"] = "Timed out listing tools"
+                elif isinstance(tools, Exception):
+                    logger.error(f"Error listing tools for {server_type}: {tools}")
                     server_info["status"] = "error"
-                    server_info["error"] = str(e)
+                    server_info["error"] = str(tools)
+                else:
+                    server_info["tools_count"] = len(tools)
 
             servers.append(server_info)
 
@@ -182,8 +268,57 @@ class MCPProxyServer:
             ValueError: If server_type is invalid
             MCPConnectionError: If connection fails
         """
-        async with self.get_client(server_type, auth_token) as client:
-            return await client.list_tools(refresh=refresh)
+        key = (server_type, _token_fingerprint(auth_token))
+
+        if not refresh:
+            tools = self._tools_cache.get(key)
+            if tools is not None:
+                return tools
+
+        # Serialize misses per key so concurrent callers share one upstream fetch
+        lock = self._tools_cache_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._tools_cache_locks.set(key, lock)
+        async with lock:
+            if not refresh:
+                tools = self._tools_cache.get(key)
+                if tools is not None:
+                    return tools
+
+            async with self.get_client(server_type, auth_token) as client:
+                tools = await client.list_tools(refresh=refresh)
+
+            self._tools_cache.set(key, tools)
+            return tools
+
+    def invalidate_tools_cache(
+        self, server_type: Optional[str] = None, auth_token: Optional[str] = None
+    ) -> None:
+        """
+        Drop cached list_tools results.
+
+        Call this when an upstream server reports its tool list changed.
+
+        Args:
+            server_type: Server to invalidate (all servers if omitted)
+            auth_token: Token to invalidate (all tokens if omitted)
+        """
+        if server_type and auth_token:
+            key = (server_type, _token_fingerprint(auth_token))
+            self._tools_cache.pop(key)
+            self._tools_cache_locks.pop(key)
+            return
+
+        if server_type is None:
+            self._tools_cache.clear()
+            self._tools_cache_locks.clear()
+            return
+
+        for key in self._tools_cache.keys():
+            if key[0] == server_type:
+                self._tools_cache.pop(key)
+                self._tools_cache_locks.pop(key)
 
     async def execute_tool(
         self,
@@ -191,17 +326,18 @@ class MCPProxyServer:
         tool_name: str,
         arguments: Dict[str, Any],
         auth_token: str,
-        retry_count: int = 0,
     ) -> Dict[str, Any]:
         """
         Execute an MCP tool with retry logic.
 
+        Results of read-only tools listed in CACHEABLE_TOOLS are reused for
+        their TTL, and concurrent identical calls share one upstream request.
+
         Args:
             server_type: Type of server ('github', 'figma', 'slack')
             tool_name: Name of the tool to execute
             arguments: Tool arguments
             auth_token: User's authentication token
-            retry_count: Current retry attempt (internal)
 
         Returns:
             Tool execution result
@@ -211,45 +347,99 @@ class MCPProxyServer:
             MCPToolNotFoundError: If tool doesn't exist
             MCPError: If execution fails after all retries
         """
-        try:
-            async with self.get_client(server_type, auth_token) as client:
-                result = await client.call_tool(
-                    tool_name=tool_name,
-                    arguments=arguments,
-                    auth_token=auth_token,
-                )
+        ttl = _tool_cache_ttl(server_type, tool_name)
+        if not ttl:
+            return await self._execute_tool_with_retries(
+                server_type, tool_name, arguments, auth_token
+            )
 
-                logger.info(
-                    f"Successfully executed {server_type}/{tool_name}"
+        key = _tool_call_key(server_type, tool_name, arguments, auth_token)
+        cached = self._tool_results.get(key)
+        if cached is not None:
+            logger.debug(f"Cache hit for {server_type}/{tool_name}")
+            return cached
+
+        task = self._inflight_tool_calls.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._execute_tool_with_retries(
+                    server_type, tool_name, arguments, auth_token
                 )
-                return result
-
-        except MCPToolNotFoundError:
-            # Don't retry if tool doesn't exist
-            raise
-
-        except MCPError as e:
-            # Retry on transient errors
-            max_retries = settings.MCP_MAX_RETRIES
-            if retry_count < max_retries:
-                logger.warning(
-                    f"Retrying {server_type}/{tool_name} "
-                    f"(attempt {retry_count + 1}/{max_retries}): {e}"
-                )
-                await asyncio.sleep(2 ** retry_count)  # Exponential backoff
-                return await self.execute_tool(
-                    server_type=server_type,
-                    tool_name=tool_name,
-                    arguments=arguments,
-                    auth_token=auth_token,
-                    retry_count=retry_count + 1,
-                )
-            else:
+            )
+            self._inflight_tool_calls[key] = task
+            task.add_done_callback(
+                lambda done: self._finish_tool_call(key, ttl, done)
+            )
+
+        # Shield so one cancelled caller doesn't cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finish_tool_call(self, key: str, ttl: int, task: asyncio.Task) -> None:
+        """Clear an in-flight call and cache its result if it succeeded."""
+        self._inflight_tool_calls.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._tool_results.set(key, task.result(), ttl=ttl)
+
+    async def _execute_tool_with_retries(
+        self,
+        server_type: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        auth_token: str,
+    ) -> Dict[str, Any]:
+        """
+        Call a tool upstream, retrying transient failures with backoff.
+
+        Transient tool errors keep the client connected between attempts;
+        connection errors drop it so the next attempt reconnects.
+        """
+        # One initial attempt plus MCP_MAX_RETRIES retries
+        max_attempts = max(settings.MCP_MAX_RETRIES, 0) + 1
+
+        for attempt in range(max_attempts):
+            try:
+                async with self.get_client(server_type, auth_token) as client:
+                    try:
+                        result = await client.call_tool(
+                            tool_name=tool_name,
+                            arguments=arguments,
+                            auth_token=auth_token,
+                        )
+                    except (MCPToolNotFoundError, MCPConnectionError):
+                        # Propagate so get_client drops the connection
+                        raise
+                    except MCPError as e:
+                        # Transient failure: keep the connection for the retry
+                        last_error = e
+                    else:
+                        logger.info(
+                            f"Successfully executed {server_type}/{tool_name}"
+                        )
+                        return result
+
+            except MCPToolNotFoundError:
+                # Don't retry if tool doesn't exist
+                raise
+
+            except MCPError as e:
+                last_error = e
+
+            # Give up before sleeping on the last attempt
+            if attempt + 1 >= max_attempts:
                 logger.error(
                     f"Failed to execute {server_type}/{tool_name} "
-                    f"after {max_retries} retries: {e}"
+                    f"after {max_attempts} attempts: {last_error}"
                 )
-                raise
+                raise last_error
+
+            # Exponential backoff with jitter to avoid synchronized retries
+            backoff = min(2 ** attempt, MAX_RETRY_BACKOFF_SECONDS)
+            delay = backoff * (0.5 + random.random() * 0.5)
+            logger.warning(
+                f"Retrying {server_type}/{tool_name} in {delay:.2f}s "
+                f"(attempt {attempt + 2}/{max_attempts}): {last_error}"
+            )
+            await asyncio.sleep(delay)
 
     async def health_check(self) -> Dict[str, Any]:
         """
@@ -286,9 +476,21 @@ class MCPProxyServer:
         return {
             "status": overall_status,
             "clients": clients_health,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": self._current_timestamp(),
         }
 
+    def _current_timestamp(self) -> str:
+        """Return an ISO-8601 UTC timestamp, formatted at most once per second."""
+        bucket = int(time.monotonic())
+        if self._health_timestamp[0] != bucket:
+            formatted = (
+                datetime.now(timezone.utc)
+                .isoformat(timespec="seconds")
+                .replace("+00:00", "Z")
+            )
+            self._health_timestamp = (bucket, formatted)
+        return self._health_timestamp[1]
+
 
 # Global proxy instance
 _proxy_instance: Optional[MCPProxyServer] = None
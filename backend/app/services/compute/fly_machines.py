@@ -4,11 +4,18 @@ Fly.io Machines API client for VM management.
 Wraps the Fly.io Machines API using httpx for async operations.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+import functools
+import inspect
 import httpx
 import logging
+import orjson
+import time
 from datetime import datetime
 
+from app.config import settings
+from app.core.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +25,79 @@ class FlyMachinesError(Exception):
     pass
 
 
+class FlyMachineNotFoundError(FlyMachinesError):
+    """Raised when the Fly.io API reports a machine does not exist."""
+
+    pass
+
+
+def _encode(payload: Any) -> bytes:
+    """Serialize a request payload to JSON bytes."""
+    return orjson.dumps(payload)
+
+
+def _decode(response: httpx.Response) -> Any:
+    """Parse a JSON response body."""
+    return orjson.loads(response.content)
+
+
+T = TypeVar("T")
+
+
+def _fly_call(
+    action: str,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Wrap a FlyMachinesClient method with uniform error handling.
+
+    HTTP and transport failures are logged and re-raised as FlyMachinesError.
+    Only transport errors and 5xx responses feed the client's circuit breaker,
+    which fails fast while the Fly.io API is down.
+
+    Args:
+        action: Human-readable action name used in log and error messages
+    """
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(self: "FlyMachinesClient", *args: Any, **kwargs: Any) -> T:
+            self._check_circuit()
+            try:
+                result = await fn(self, *args, **kwargs)
+            except FlyMachinesError:
+                raise
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    machine_id = signature.bind(self, *args, **kwargs).arguments.get(
+                        "machine_id"
+                    )
+                    if machine_id:
+                        logger.warning(f"Machine {machine_id} not found during {action}")
+                        raise FlyMachineNotFoundError(f"Machine {machine_id} not found")
+                    logger.warning(f"Failed to {action}: not found")
+                    raise FlyMachinesError(f"Failed to {action}: not found")
+                if e.response.status_code >= 500:
+                    self._record_failure()
+                logger.error(f"Failed to {action}: {e.response.text}")
+                raise FlyMachinesError(f"Failed to {action}: {e.response.text}")
+            except httpx.TransportError as e:
+                self._record_failure()
+                logger.error(f"Failed to {action}: {e}")
+                raise FlyMachinesError(f"Failed to {action}: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error during {action}: {e}", exc_info=True)
+                raise FlyMachinesError(f"Unexpected error: {e}")
+
+            self._record_success()
+            return result
+
+        return wrapper
+
+    return decorator
+
+
 class FlyMachinesClient:
     """
     Client for Fly.io Machines API.
@@ -26,13 +106,25 @@ class FlyMachinesClient:
     Rate limit: 1 request/second per action per machine (from PROJECT_PLAN.md)
     """
 
-    def __init__(self, api_token: str, app_name: str):
+    # Consecutive transport/5xx failures before calls fail fast
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    # Seconds the circuit stays open before calls are attempted again
+    CIRCUIT_RESET_SECONDS = 30.0
+
+    def __init__(
+        self,
+        api_token: str,
+        app_name: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         """
         Initialize Fly.io Machines client.
 
         Args:
             api_token: Fly.io API token
             app_name: Fly.io app name for VMs
+            transport: Optional httpx transport (e.g. httpx.MockTransport
+                in tests); defaults to the network
         """
         self.api_token = api_token
         self.app_name = app_name
@@ -40,21 +132,57 @@ class FlyMachinesClient:
 
         self._http_client = httpx.AsyncClient(
             timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=50),
             headers={
                 "Authorization": f"Bearer {api_token}",
                 "Content-Type": "application/json",
             },
+            transport=transport,
         )
 
+        # Last-seen machine configs, so metadata updates can skip the GET
+        self._config_cache = TTLCache(maxsize=1024, ttl=30)
+
+        # (etag, body) of the last status response per machine, for conditional GETs
+        self._status_cache = TTLCache(maxsize=1024, ttl=3600)
+
+        # SSH connection info, stable until the machine is restarted or destroyed
+        self._ssh_cache = TTLCache(maxsize=4096, ttl=600)
+
+        # Circuit breaker state shared by all API calls
+        self._consecutive_failures = 0
+        self._circuit_open_until = 0.0
+
     async def close(self) -> None:
         """Close the HTTP client."""
         await self._http_client.aclose()
 
+    def _check_circuit(self) -> None:
+        """Fail fast while the circuit breaker is open."""
+        if time.monotonic() < self._circuit_open_until:
+            raise FlyMachinesError("Fly.io API unavailable, retry later")
+
+    def _record_failure(self) -> None:
+        """Count a transport or 5xx failure, opening the circuit at the threshold."""
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= self.CIRCUIT_FAILURE_THRESHOLD:
+            self._circuit_open_until = time.monotonic() + self.CIRCUIT_RESET_SECONDS
+            logger.warning(
+                f"Fly.io circuit opened after {self._consecutive_failures} "
+                f"consecutive failures"
+            )
+
+    def _record_success(self) -> None:
+        """Reset the failure count after a successful call."""
+        self._consecutive_failures = 0
+
+    @_fly_call("create machine")
     async def create_machine(
         self,
         user_id: str,
         config: Optional[Dict[str, Any]] = None,
         region: str = "iad",
+        metadata: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
         """
         Create a new VM for a user.
@@ -63,6 +191,8 @@ class FlyMachinesClient:
             user_id: User identifier for naming/tagging
             config: Machine configuration (CPU, RAM, image, etc.)
             region: Fly.io region (default: iad = US East)
+            metadata: Optional metadata set on the machine at creation,
+                avoiding a follow-up update_machine_metadata call
 
         Returns:
             Machine details including machine_id and connection info
@@ -104,32 +234,32 @@ class FlyMachinesClient:
                 ],
             }
 
+        if metadata:
+            config = {
+                **config,
+                "metadata": {**config.get("metadata", {}), **metadata},
+            }
+
         payload = {
             "name": f"paraclete-vm-{user_id[:8]}",
             "region": region,
             "config": config,
         }
 
-        try:
-            response = await self._http_client.post(
-                f"{self.base_url}/apps/{self.app_name}/machines",
-                json=payload,
-            )
-            response.raise_for_status()
-            machine_data = response.json()
-
-            logger.info(
-                f"Created Fly.io machine {machine_data['id']} for user {user_id}"
-            )
-            return machine_data
+        response = await self._http_client.post(
+            f"{self.base_url}/apps/{self.app_name}/machines",
+            content=_encode(payload),
+        )
+        response.raise_for_status()
+        machine_data = _decode(response)
+        self._config_cache.set(machine_data["id"], machine_data.get("config", config))
 
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Failed to create machine: {e.response.text}")
-            raise FlyMachinesError(f"Failed to create machine: {e.response.text}")
-        except Exception as e:
-            logger.error(f"Unexpected error creating machine: {e}")
-            raise FlyMachinesError(f"Unexpected error: {e}")
+        logger.info(
+            f"Created Fly.io machine {machine_data['id']} for user {user_id}"
+        )
+        return machine_data
 
+    @_fly_call("destroy machine")
     async def destroy_machine(
         self, machine_id: str, force: bool = False
     ) -> Dict[str, Any]:
@@ -148,25 +278,21 @@ class FlyMachinesClient:
                 "ok": true
             }
         """
-        try:
-            params = {"force": "true"} if force else {}
+        params = {"force": "true"} if force else {}
 
-            response = await self._http_client.delete(
-                f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}",
-                params=params,
-            )
-            response.raise_for_status()
-
-            logger.info(f"Destroyed Fly.io machine {machine_id}")
-            return {"ok": True}
+        response = await self._http_client.delete(
+            f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}",
+            params=params,
+        )
+        response.raise_for_status()
+        self._config_cache.pop(machine_id)
+        self._status_cache.pop(machine_id)
+        self._ssh_cache.pop(machine_id)
 
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Failed to destroy machine {machine_id}: {e.response.text}")
-            raise FlyMachinesError(f"Failed to destroy machine: {e.response.text}")
-        except Exception as e:
-            logger.error(f"Unexpected error destroying machine: {e}")
-            raise FlyMachinesError(f"Unexpected error: {e}")
+        logger.info(f"Destroyed Fly.io machine {machine_id}")
+        return {"ok": True}
 
+    @_fly_call("get machine status")
     async def get_machine_status(self, machine_id: str) -> Dict[str, Any]:
         """
         Get current status of a VM.
@@ -189,22 +315,29 @@ class FlyMachinesClient:
                 "updated_at": "2026-01-07T12:05:00Z"
             }
         """
-        try:
-            response = await self._http_client.get(
-                f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}"
-            )
-            response.raise_for_status()
-            return response.json()
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                raise FlyMachinesError(f"Machine {machine_id} not found")
-            logger.error(f"Failed to get machine status: {e.response.text}")
-            raise FlyMachinesError(f"Failed to get status: {e.response.text}")
-        except Exception as e:
-            logger.error(f"Unexpected error getting machine status: {e}")
-            raise FlyMachinesError(f"Unexpected error: {e}")
+        cached = self._status_cache.get(machine_id)
+        headers = {"If-None-Match": cached[0]} if cached else None
 
+        response = await self._http_client.get(
+            f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}",
+            headers=headers,
+        )
+
+        # Unchanged since the last poll: reuse the cached body
+        if cached and response.status_code == 304:
+            return dict(cached[1])
+
+        response.raise_for_status()
+        machine = _decode(response)
+
+        etag = response.headers.get("etag")
+        if etag:
+            self._status_cache.set(machine_id, (etag, machine))
+        if "config" in machine:
+            self._config_cache.set(machine_id, machine["config"])
+        return dict(machine)
+
+    @_fly_call("start machine")
     async def start_machine(self, machine_id: str) -> Dict[str, Any]:
         """
         Start a stopped VM.
@@ -215,22 +348,16 @@ class FlyMachinesClient:
         Returns:
             Machine status after start
         """
-        try:
-            response = await self._http_client.post(
-                f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}/start"
-            )
-            response.raise_for_status()
-
-            logger.info(f"Started Fly.io machine {machine_id}")
-            return response.json()
+        response = await self._http_client.post(
+            f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}/start"
+        )
+        response.raise_for_status()
+        self._ssh_cache.pop(machine_id)
 
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Failed to start machine {machine_id}: {e.response.text}")
-            raise FlyMachinesError(f"Failed to start machine: {e.response.text}")
-        except Exception as e:
-            logger.error(f"Unexpected error starting machine: {e}")
-            raise FlyMachinesError(f"Unexpected error: {e}")
+        logger.info(f"Started Fly.io machine {machine_id}")
+        return _decode(response)
 
+    @_fly_call("stop machine")
     async def stop_machine(self, machine_id: str) -> Dict[str, Any]:
         """
         Stop a running VM.
@@ -241,22 +368,16 @@ class FlyMachinesClient:
         Returns:
             Machine status after stop
         """
-        try:
-            response = await self._http_client.post(
-                f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}/stop"
-            )
-            response.raise_for_status()
-
-            logger.info(f"Stopped Fly.io machine {machine_id}")
-            return response.json()
+        response = await self._http_client.post(
+            f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}/stop"
+        )
+        response.raise_for_status()
+        self._ssh_cache.pop(machine_id)
 
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Failed to stop machine {machine_id}: {e.response.text}")
-            raise FlyMachinesError(f"Failed to stop machine: {e.response.text}")
-        except Exception as e:
-            logger.error(f"Unexpected error stopping machine: {e}")
-            raise FlyMachinesError(f"Unexpected error: {e}")
+        logger.info(f"Stopped Fly.io machine {machine_id}")
+        return _decode(response)
 
+    @_fly_call("get SSH credentials")
     async def get_ssh_credentials(self, machine_id: str) -> Dict[str, str]:
         """
         Get SSH connection information for a VM.
@@ -275,27 +396,29 @@ class FlyMachinesClient:
                 "machine_id": "148e7a5e90528e"
             }
         """
-        try:
-            # Get machine details
-            machine = await self.get_machine_status(machine_id)
-
-            # Construct SSH info from machine details
-            hostname = f"{machine['name']}.internal"  # Internal Fly.io hostname
-            if "private_ip" in machine:
-                hostname = machine["private_ip"]
-
-            return {
-                "hostname": hostname,
-                "port": "22",
-                "username": "root",
-                "machine_id": machine_id,
-                "region": machine.get("region", "unknown"),
-            }
-
-        except Exception as e:
-            logger.error(f"Failed to get SSH credentials: {e}")
-            raise FlyMachinesError(f"Failed to get SSH credentials: {e}")
+        cached = self._ssh_cache.get(machine_id)
+        if cached is not None:
+            return dict(cached)
+
+        # Get machine details
+        machine = await self.get_machine_status(machine_id)
+
+        # Construct SSH info from machine details
+        hostname = f"{machine['name']}.internal"  # Internal Fly.io hostname
+        if "private_ip" in machine:
+            hostname = machine["private_ip"]
+
+        creds = {
+            "hostname": hostname,
+            "port": "22",
+            "username": "root",
+            "machine_id": machine_id,
+            "region": machine.get("region", "unknown"),
+        }
+        self._ssh_cache.set(machine_id, creds)
+        return dict(creds)
 
+    @_fly_call("list machines")
     async def list_machines(
         self, include_deleted: bool = False
     ) -> List[Dict[str, Any]]:
@@ -308,23 +431,16 @@ class FlyMachinesClient:
         Returns:
             List of machines
         """
-        try:
-            params = {"include_deleted": "true"} if include_deleted else {}
-
-            response = await self._http_client.get(
-                f"{self.base_url}/apps/{self.app_name}/machines",
-                params=params,
-            )
-            response.raise_for_status()
-            return response.json()
+        params = {"include_deleted": "true"} if include_deleted else {}
 
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Failed to list machines: {e.response.text}")
-            raise FlyMachinesError(f"Failed to list machines: {e.response.text}")
-        except Exception as e:
-            logger.error(f"Unexpected error listing machines: {e}")
-            raise FlyMachinesError(f"Unexpected error: {e}")
+        response = await self._http_client.get(
+            f"{self.base_url}/apps/{self.app_name}/machines",
+            params=params,
+        )
+        response.raise_for_status()
+        return _decode(response)
 
+    @_fly_call("update machine metadata")
     async def update_machine_metadata(
         self, machine_id: str, metadata: Dict[str, str]
     ) -> Dict[str, Any]:
@@ -338,26 +454,58 @@ class FlyMachinesClient:
         Returns:
             Updated machine details
         """
-        try:
-            # Get current machine config
+        # Fly.io replaces the whole config on update, so start from the
+        # last-seen config and only fetch it when we don't have one
+        config = self._config_cache.get(machine_id)
+        if config is None:
             machine = await self.get_machine_status(machine_id)
-
-            # Update config with new metadata
             config = machine.get("config", {})
-            if "metadata" not in config:
-                config["metadata"] = {}
-            config["metadata"].update(metadata)
-
-            # Update machine
-            response = await self._http_client.post(
-                f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}",
-                json={"config": config},
-            )
-            response.raise_for_status()
 
-            logger.info(f"Updated metadata for machine {machine_id}")
-            return response.json()
+        # Merge into copies so the cached config is never mutated
+        config = {
+            **config,
+            "metadata": {**config.get("metadata", {}), **metadata},
+        }
+
+        # Update machine
+        response = await self._http_client.post(
+            f"{self.base_url}/apps/{self.app_name}/machines/{machine_id}",
+            content=_encode({"config": config}),
+        )
+        response.raise_for_status()
+        machine_data = _decode(response)
+        self._config_cache.set(machine_id, machine_data.get("config", config))
+
+        logger.info(f"Updated metadata for machine {machine_id}")
+        return machine_data
+
+
+# Shared client so connections to the Machines API are reused across requests
+_client_instance: Optional[FlyMachinesClient] = None
+
+
+def get_fly_client() -> Optional[FlyMachinesClient]:
+    """
+    Get the global Fly.io Machines client.
+
+    Returns:
+        Shared client, or None if FLY_API_TOKEN is not configured
+    """
+    global _client_instance
+
+    if _client_instance is None and settings.FLY_API_TOKEN:
+        _client_instance = FlyMachinesClient(
+            api_token=settings.FLY_API_TOKEN,
+            app_name=settings.FLY_APP_NAME,
+        )
+
+    return _client_instance
+
+
+async def close_fly_client() -> None:
+    """Close the global Fly.io Machines client, if one was created."""
+    global _client_instance
 
-        except Exception as e:
-            logger.error(f"Failed to update machine metadata: {e}")
-            raise FlyMachinesError(f"Failed to update metadata: {e}")
+    if _client_instance is not None:
+        await _client_instance.close()
+        _client_instance = None
@@ -7,7 +7,7 @@ import logging
 from datetime import datetime
 
 from app.db.database import AsyncSessionLocal
-from app.services.compute.vm_manager import VMManager
+from app.services.compute.vm_manager import VMManager, has_idle_vms
 
 logger = logging.getLogger(__name__)
 
@@ -17,21 +17,25 @@ class VMScheduler:
     Background scheduler for VM maintenance tasks.
 
     Runs periodic checks for:
-    - Idle VM auto-shutdown
+    - Idle VM auto-shutdown (backstop for per-VM shutdown timers)
     - Cost calculation updates
     - Health monitoring
     """
 
-    def __init__(self, check_interval: int = 60):
+    def __init__(self, check_interval: int = 300, shutdown_timeout: float = 30.0):
         """
         Initialize VM scheduler.
 
         Args:
-            check_interval: Interval between checks in seconds (default: 60s)
+            check_interval: Interval between checks in seconds (default: 300s)
+            shutdown_timeout: Seconds to let an in-flight check finish on stop
         """
         self.check_interval = check_interval
+        self.shutdown_timeout = shutdown_timeout
         self._running = False
         self._task: asyncio.Task = None
+        self._check_task: asyncio.Task = None
+        self._stop_event: asyncio.Event = None
 
     async def start(self) -> None:
         """Start the scheduler background task."""
@@ -40,7 +44,8 @@ class VMScheduler:
             return
 
         self._running = True
-        self._task = asyncio.create_task(self._run())
+        self._stop_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="vm-scheduler")
         logger.info(f"VM scheduler started (check interval: {self.check_interval}s)")
 
     async def stop(self) -> None:
@@ -49,12 +54,28 @@ class VMScheduler:
             return
 
         self._running = False
+        self._stop_event.set()
+
         if self._task:
-            self._task.cancel()
+            # Wake the loop and let any in-flight check commit; cancel if it hangs
+            try:
+                await asyncio.wait_for(self._task, timeout=self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"VM scheduler did not stop within {self.shutdown_timeout}s, cancelled"
+                )
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._check_task and not self._check_task.done():
+            # The shield kept the check alive past the loop's cancellation
+            self._check_task.cancel()
             try:
-                await self._task
+                await self._check_task
             except asyncio.CancelledError:
                 pass
+        self._check_task = None
 
         logger.info("VM scheduler stopped")
 
@@ -62,19 +83,32 @@ class VMScheduler:
         """Main scheduler loop."""
         while self._running:
             try:
-                await self._check_idle_vms()
-                await asyncio.sleep(self.check_interval)
-
+                # Shield so a cancelled loop doesn't abandon a half-finished DB session
+                self._check_task = asyncio.create_task(self._check_idle_vms())
+                await asyncio.shield(self._check_task)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in VM scheduler: {e}", exc_info=True)
-                await asyncio.sleep(self.check_interval)
+
+            # Sleep until the next tick, waking immediately on stop
+            try:
+                await asyncio.wait_for(
+                    self._stop_event.wait(), timeout=self.check_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                break
 
     async def _check_idle_vms(self) -> None:
         """Check for idle VMs and shut them down."""
         try:
             async with AsyncSessionLocal() as db:
+                # Steady state is usually zero idle VMs; skip the full sweep
+                if not await has_idle_vms(db):
+                    return
+
                 vm_manager = VMManager(db)
                 shutdown_vms = await vm_manager.check_idle_vms()
 
@@ -96,7 +130,8 @@ def get_vm_scheduler() -> VMScheduler:
     global _scheduler_instance
 
     if _scheduler_instance is None:
-        _scheduler_instance = VMScheduler(check_interval=60)  # Check every minute
+        # Per-VM timers handle deadlines; the sweep only catches lost timers
+        _scheduler_instance = VMScheduler(check_interval=300)
 
     return _scheduler_instance
 
@@ -0,0 +1,268 @@
+"""
+Write-behind queue for compute usage records.
+
+Usage start/end events are queued in-process and written in batches by a
+background task, keeping usage writes off the provision/terminate path.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime, Integer, Update, and_, cast, func, insert, literal, update
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import ComputeUsage
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many events are queued or the window elapses, whichever first
+USAGE_BATCH_SIZE = 200
+USAGE_BATCH_WINDOW_SECONDS = 0.1
+
+# Callers wait for space beyond this many queued events
+USAGE_QUEUE_MAXSIZE = 10_000
+
+# Attempts per batch before falling back to event-by-event writes
+USAGE_WRITE_ATTEMPTS = 3
+USAGE_RETRY_BACKOFF_SECONDS = 0.5
+
+_START = "start"
+_END = "end"
+
+
+def close_usage_records_stmt(vm_ids: List[UUID], now: datetime) -> Update:
+    """
+    Build an UPDATE closing all open usage records for the given VMs.
+
+    Duration and cost are computed in SQL from each row's start_time,
+    truncated to whole seconds and cents.
+
+    Args:
+        vm_ids: VM database IDs
+        now: End time to record
+
+    Returns:
+        UPDATE statement
+    """
+    elapsed = func.floor(
+        func.extract(
+            "epoch",
+            literal(now, DateTime(timezone=True)) - ComputeUsage.start_time,
+        )
+    )
+
+    return (
+        update(ComputeUsage)
+        .where(
+            and_(
+                ComputeUsage.vm_id.in_(vm_ids),
+                ComputeUsage.end_time.is_(None),
+            )
+        )
+        .values(
+            end_time=now,
+            duration_seconds=cast(elapsed, Integer),
+            total_cost_cents=cast(
+                func.floor(elapsed / 3600.0 * ComputeUsage.cost_per_hour),
+                Integer,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+class UsageWriter:
+    """
+    Batches compute usage inserts and closes into few transactions.
+
+    When the writer is not running (scripts, tests), events are written
+    immediately instead of being queued. Failed batches are retried, then
+    written one event at a time so a single bad event can't drop the rest.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = USAGE_BATCH_SIZE,
+        batch_window: float = USAGE_BATCH_WINDOW_SECONDS,
+    ):
+        """
+        Initialize usage writer.
+
+        Args:
+            batch_size: Maximum events written per transaction
+            batch_window: Seconds to wait for more events before writing
+        """
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether events are being queued for the background task."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background writer task."""
+        if self.running:
+            return
+
+        self._queue = asyncio.Queue(maxsize=USAGE_QUEUE_MAXSIZE)
+        self._task = asyncio.create_task(self._run(), name="usage-writer")
+        logger.info("Usage writer started")
+
+    async def stop(self) -> None:
+        """Write any queued events and stop the background task."""
+        if not self.running:
+            return
+
+        # Sentinel: the task writes everything queued before it, then exits
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        logger.info("Usage writer stopped")
+
+    async def record_start(self, values: Dict[str, Any]) -> None:
+        """
+        Record the start of a usage period.
+
+        Args:
+            values: ComputeUsage column values
+        """
+        await self._submit((_START, values))
+
+    async def record_end(self, vm_id: UUID, end_time: datetime) -> None:
+        """
+        Record the end of a VM's open usage period.
+
+        Args:
+            vm_id: VM database ID
+            end_time: When usage ended
+        """
+        await self._submit((_END, vm_id, end_time))
+
+    async def record_ends(self, vm_ids: List[UUID], end_time: datetime) -> None:
+        """
+        Record the end of several VMs' open usage periods.
+
+        Args:
+            vm_ids: VM database IDs
+            end_time: When usage ended
+        """
+        events = [(_END, vm_id, end_time) for vm_id in vm_ids]
+        if not self.running:
+            await self._write(events)
+            return
+
+        for event in events:
+            await self._submit(event)
+
+    async def _submit(self, event: tuple) -> None:
+        if self.running:
+            # Wait for space rather than writing around the queue, which
+            # could close a usage row before its queued start is inserted
+            await self._queue.put(event)
+        else:
+            await self._write([event])
+
+    async def _run(self) -> None:
+        """Collect events into batches and write them until stopped."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            event = await self._queue.get()
+            if event is None:
+                break
+
+            batch = [event]
+            deadline = loop.time() + self.batch_window
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            await self._write(batch)
+
+    async def _write(self, batch: List[tuple]) -> None:
+        """
+        Write a batch of events, retrying with backoff on failure.
+
+        If every attempt fails, events are written one at a time; any that
+        still fail are logged with their values for reconciliation.
+        """
+        for attempt in range(USAGE_WRITE_ATTEMPTS):
+            try:
+                await self._write_batch(batch)
+                return
+            except Exception as e:
+                logger.warning(
+                    f"Failed to write usage batch of {len(batch)} "
+                    f"(attempt {attempt + 1}/{USAGE_WRITE_ATTEMPTS}): {e}"
+                )
+            if attempt + 1 < USAGE_WRITE_ATTEMPTS:
+                await asyncio.sleep(USAGE_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+        for event in batch:
+            try:
+                await self._write_batch([event])
+            except Exception as e:
+                logger.error(f"Lost usage event {event}: {e}", exc_info=True)
+
+    async def _write_batch(self, batch: List[tuple]) -> None:
+        """Write a batch of events in one transaction; inserts before closes."""
+        starts = [event[1] for event in batch if event[0] == _START]
+
+        ends: Dict[datetime, List[UUID]] = defaultdict(list)
+        for event in batch:
+            if event[0] == _END:
+                ends[event[2]].append(event[1])
+
+        async with AsyncSessionLocal() as db:
+            if starts:
+                await db.execute(insert(ComputeUsage), starts)
+            for end_time, vm_ids in ends.items():
+                await db.execute(close_usage_records_stmt(vm_ids, end_time))
+            await db.commit()
+
+        logger.debug(
+            f"Wrote usage batch: {len(starts)} started, "
+            f"{sum(len(ids) for ids in ends.values())} ended"
+        )
+
+
+# Global writer instance
+_writer_instance: Optional[UsageWriter] = None
+
+
+def get_usage_writer() -> UsageWriter:
+    """Get the global usage writer instance."""
+    global _writer_instance
+
+    if _writer_instance is None:
+        _writer_instance = UsageWriter()
+
+    return _writer_instance
+
+
+async def start_usage_writer() -> None:
+    """Start the global usage writer."""
+    await get_usage_writer().start()
+
+
+async def stop_usage_writer() -> None:
+    """Flush and stop the global usage writer."""
+    await get_usage_writer().stop()
@@ -4,21 +4,55 @@ VM Manager for high-level VM lifecycle management.
 Handles VM provisioning, tracking, auto-shutdown, and cost calculation.
 """
 
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timedelta
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
 import logging
 import asyncio
 
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import and_, exists, func, select, update
 
+from app.core.cache import TTLCache
+from app.db.database import AsyncSessionLocal
 from app.db.models import UserVM, VMStatus, ComputeUsage, User
-from app.services.compute.fly_machines import FlyMachinesClient, FlyMachinesError
+from app.services.compute.fly_machines import (
+    FlyMachineNotFoundError,
+    FlyMachinesClient,
+    FlyMachinesError,
+    get_fly_client,
+)
+from app.services.compute.usage_writer import get_usage_writer
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Deadlines (seconds) for Fly.io calls so a stalled API can't pin DB connections
+FLY_CREATE_TIMEOUT = 30
+FLY_DESTROY_TIMEOUT = 15
+FLY_STATUS_TIMEOUT = 5
+FLY_SSH_TIMEOUT = 5
+
+# Live machine state is shared across per-request managers so a burst of
+# status polls for the same VM costs a single Fly.io round trip.
+MACHINE_STATUS_CACHE_TTL_SECONDS = 3
+_machine_status_cache = TTLCache(maxsize=4096, ttl=MACHINE_STATUS_CACHE_TTL_SECONDS)
+_machine_status_inflight: Dict[str, asyncio.Task] = {}
+
+# Activity pings are coalesced and written at most once per window per VM
+ACTIVITY_DEBOUNCE_SECONDS = 10
+_pending_activity: Dict[UUID, datetime] = {}
+_activity_flushes: Dict[UUID, asyncio.Task] = {}
+
+# Machine states in a create response that mean the machine is launching
+_LAUNCHED_MACHINE_STATES = frozenset({"created", "starting", "started"})
+
+# Per-VM timers that fire at auto_shutdown_at instead of waiting for a sweep
+_shutdown_timers: Dict[UUID, asyncio.Task] = {}
+
 
 # Fly.io pricing in cents per hour (from PROJECT_PLAN.md)
 FLY_PRICING = {
@@ -31,6 +65,197 @@ FLY_PRICING = {
     },
 }
 
+# (cpu_type, memory_mb) -> hourly rate in the units stored on ComputeUsage
+# (hundredths of a cent, e.g. 27 = $0.0027/hr), built once at import
+_PRICING_CENTS: Dict[Tuple[str, int], int] = {
+    (cpu_type, int(memory_mb)): round(cents * 100)
+    for cpu_type, rates in FLY_PRICING.items()
+    for memory_mb, cents in rates.items()
+}
+
+
+# cpu_type preset -> (Fly cpu_kind, cpus), built once at import
+_CPU_SPEC: Dict[str, Tuple[str, int]] = {
+    **{f"shared-cpu-{n}x": ("shared", n) for n in (1, 2, 4, 8)},
+    **{f"performance-cpu-{n}x": ("performance", n) for n in (1, 2, 4, 8, 16)},
+}
+
+
+def _cpu_spec(cpu_type: str) -> Tuple[str, int]:
+    """
+    Look up the Fly.io guest CPU kind and count for a cpu_type preset.
+
+    Raises:
+        ValueError: If the cpu_type is not a known preset
+    """
+    try:
+        return _CPU_SPEC[cpu_type]
+    except KeyError:
+        raise ValueError(f"Unsupported cpu_type: {cpu_type}")
+
+
+async def has_idle_vms(db: AsyncSession) -> bool:
+    """
+    Cheaply check whether any running VM is past its auto-shutdown time.
+
+    Lets periodic sweeps skip building a VMManager when there is nothing to do.
+
+    Args:
+        db: Database session
+
+    Returns:
+        True if at least one VM is due for shutdown
+    """
+    result = await db.execute(
+        select(
+            exists().where(
+                and_(
+                    UserVM.status == VMStatus.RUNNING,
+                    UserVM.auto_shutdown_at <= datetime.utcnow(),
+                )
+            )
+        )
+    )
+    return bool(result.scalar())
+
+
+async def _with_timeout(call: Awaitable[T], seconds: float, action: str) -> T:
+    """Await a Fly.io call, raising FlyMachinesError if it exceeds its deadline."""
+    try:
+        async with asyncio.timeout(seconds):
+            return await call
+    except TimeoutError:
+        raise FlyMachinesError(f"Timed out after {seconds}s trying to {action}")
+
+
+def _finish_machine_status(machine_id: str, task: asyncio.Task) -> None:
+    """Clear an in-flight status lookup and cache its result if it succeeded."""
+    _machine_status_inflight.pop(machine_id, None)
+    if not task.cancelled() and task.exception() is None:
+        _machine_status_cache.set(machine_id, task.result())
+
+
+async def _write_vm_activity(vm_id: UUID) -> None:
+    """Persist the latest pending activity timestamp for a VM."""
+    last_activity = _pending_activity.pop(vm_id, None)
+    if last_activity is None:
+        return
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(UserVM)
+            .where(and_(UserVM.id == vm_id, UserVM.status == VMStatus.RUNNING))
+            .values(
+                last_activity=last_activity,
+                auto_shutdown_at=last_activity
+                + timedelta(minutes=settings.VM_IDLE_TIMEOUT_MINUTES),
+            )
+        )
+        await db.commit()
+    logger.debug(f"Updated activity for VM {vm_id}")
+
+
+async def _flush_vm_activity_later(vm_id: UUID) -> None:
+    """Wait out the debounce window, then write the VM's activity."""
+    try:
+        await asyncio.sleep(ACTIVITY_DEBOUNCE_SECONDS)
+
+        # Unregister before writing so a ping that lands during the write
+        # schedules its own flush instead of being left unwritten
+        _forget_activity_flush(vm_id)
+        await _write_vm_activity(vm_id)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to update activity for VM {vm_id}: {e}")
+    finally:
+        _forget_activity_flush(vm_id)
+
+
+def _forget_activity_flush(vm_id: UUID) -> None:
+    """Drop the current task's flush registration, leaving any newer one."""
+    if _activity_flushes.get(vm_id) is asyncio.current_task():
+        del _activity_flushes[vm_id]
+
+
+async def flush_vm_activity() -> None:
+    """Write all pending activity updates immediately (e.g. on shutdown)."""
+    for task in list(_activity_flushes.values()):
+        task.cancel()
+    _activity_flushes.clear()
+
+    for vm_id in list(_pending_activity):
+        try:
+            await _write_vm_activity(vm_id)
+        except Exception as e:
+            logger.error(f"Failed to update activity for VM {vm_id}: {e}")
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """Normalize a possibly tz-aware timestamp to naive UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def schedule_auto_shutdown(vm_id: UUID, eta: datetime) -> None:
+    """
+    Arm a timer that shuts a VM down once its idle deadline passes.
+
+    The timer re-reads auto_shutdown_at when it wakes, so activity that
+    extends the deadline simply pushes the shutdown back. The periodic
+    VMScheduler sweep remains as a backstop for timers lost to restarts.
+
+    Args:
+        vm_id: VM database ID
+        eta: Current auto-shutdown time
+    """
+    if vm_id not in _shutdown_timers:
+        _shutdown_timers[vm_id] = asyncio.create_task(_auto_shutdown(vm_id, eta))
+
+
+def cancel_auto_shutdowns() -> None:
+    """Cancel all pending auto-shutdown timers (e.g. on shutdown)."""
+    for task in list(_shutdown_timers.values()):
+        task.cancel()
+    _shutdown_timers.clear()
+
+
+async def _auto_shutdown(vm_id: UUID, eta: datetime) -> None:
+    """Sleep until a VM's deadline, then terminate it if it is still idle."""
+    idle_timeout = timedelta(minutes=settings.VM_IDLE_TIMEOUT_MINUTES)
+    try:
+        while True:
+            delay = (_as_naive_utc(eta) - datetime.utcnow()).total_seconds()
+            await asyncio.sleep(max(delay, 0))
+
+            async with AsyncSessionLocal() as db:
+                vm = await db.get(UserVM, vm_id)
+                if not vm or vm.status != VMStatus.RUNNING or not vm.auto_shutdown_at:
+                    return
+
+                # Debounced activity may not have been written yet
+                deadline = _as_naive_utc(vm.auto_shutdown_at)
+                pending = _pending_activity.get(vm_id)
+                if pending:
+                    deadline = max(deadline, pending + idle_timeout)
+
+                if deadline > datetime.utcnow():
+                    eta = deadline
+                    continue
+
+                if await VMManager(db).terminate_vm(vm_id, force=True):
+                    logger.info(f"Auto-shutdown VM {vm.machine_id} (idle)")
+                return
+
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Auto-shutdown failed for VM {vm_id}: {e}")
+    finally:
+        if _shutdown_timers.get(vm_id) is asyncio.current_task():
+            del _shutdown_timers[vm_id]
+
 
 class VMManager:
     """
@@ -43,23 +268,20 @@ class VMManager:
     - Resource limit enforcement
     """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self, db: AsyncSession, fly_client: Optional[FlyMachinesClient] = None
+    ):
         """
         Initialize VM manager.
 
         Args:
             db: Database session
+            fly_client: Fly.io client (defaults to the shared app client)
         """
         self.db = db
+        self.fly_client = fly_client or get_fly_client()
 
-        # Initialize Fly.io client if token available
-        if settings.FLY_API_TOKEN:
-            self.fly_client = FlyMachinesClient(
-                api_token=settings.FLY_API_TOKEN,
-                app_name=settings.FLY_APP_NAME,
-            )
-        else:
-            self.fly_client = None
+        if not self.fly_client:
             logger.warning("FLY_API_TOKEN not set, VM operations will fail")
 
     async def provision_vm(
@@ -84,89 +306,190 @@ class VMManager:
             UserVM record
 
         Raises:
-            ValueError: If user has too many VMs
+            ValueError: If user has too many VMs or cpu_type is unknown
             FlyMachinesError: If provisioning fails
         """
         if not self.fly_client:
             raise FlyMachinesError("Fly.io client not configured")
 
         # Check user VM limit
-        active_vms_count = await self._count_active_vms(user_id)
+        active_vms_count = await self._count_active_vms(
+            user_id, limit=settings.VM_MAX_PER_USER
+        )
         if active_vms_count >= settings.VM_MAX_PER_USER:
             raise ValueError(
                 f"User has reached maximum VM limit ({settings.VM_MAX_PER_USER})"
             )
 
-        # Use defaults if not specified
-        cpu_type = cpu_type or settings.VM_DEFAULT_CPU_TYPE
-        memory_mb = memory_mb or settings.VM_DEFAULT_MEMORY_MB
-        region = region or settings.VM_DEFAULT_REGION
-
-        # Calculate auto-shutdown time
-        auto_shutdown_at = datetime.utcnow() + timedelta(
-            minutes=settings.VM_IDLE_TIMEOUT_MINUTES
-        )
+        # Reject unknown presets as bad input rather than a provisioning failure
+        _cpu_spec(cpu_type or settings.VM_DEFAULT_CPU_TYPE)
 
         try:
-            # Create VM via Fly.io
-            machine_config = {
-                "guest": {
-                    "cpu_kind": "shared" if "shared" in cpu_type else "performance",
-                    "cpus": int(cpu_type.split("-")[-1].replace("x", "")),
-                    "memory_mb": memory_mb,
-                },
-                "image": "flyio/paraclete-base:latest",
-                "env": {
-                    "USER_ID": str(user_id),
-                    "TAILSCALE_AUTHKEY": settings.TAILSCALE_AUTH_KEY or "",
-                },
-            }
-
-            machine = await self.fly_client.create_machine(
-                user_id=str(user_id),
-                config=machine_config,
-                region=region,
-            )
-
-            # Create database record
-            vm = UserVM(
-                user_id=user_id,
-                session_id=session_id,
-                machine_id=machine["id"],
-                machine_name=machine.get("name"),
-                region=machine.get("region"),
-                machine_config=machine.get("config", {}),
-                status=VMStatus.PROVISIONING,
-                cpu_type=cpu_type,
-                memory_mb=memory_mb,
-                auto_shutdown_at=auto_shutdown_at,
-                ipv4_address=machine.get("private_ip"),
+            vm = await self._create_vm_record(
+                user_id, session_id, cpu_type, memory_mb, region
             )
 
             self.db.add(vm)
             await self.db.commit()
-            await self.db.refresh(vm)
 
-            # Start tracking compute usage
-            await self._start_usage_tracking(vm)
+            # Usage rows are written behind, off the request path
+            await get_usage_writer().record_start(self._usage_values(vm))
+            schedule_auto_shutdown(vm.id, vm.auto_shutdown_at)
 
             logger.info(f"Provisioned VM {vm.machine_id} for user {user_id}")
 
-            # Start machine if it's not already started
-            try:
-                await self.fly_client.start_machine(machine["id"])
-                vm.status = VMStatus.RUNNING
-                vm.started_at = datetime.utcnow()
-                await self.db.commit()
-            except Exception as e:
-                logger.warning(f"Failed to start machine {machine['id']}: {e}")
-
             return vm
 
         except Exception as e:
             logger.error(f"Failed to provision VM for user {user_id}: {e}")
             raise FlyMachinesError(f"Failed to provision VM: {e}")
 
+    async def provision_vms(
+        self,
+        user_id: UUID,
+        count: int,
+        session_id: Optional[UUID] = None,
+        cpu_type: Optional[str] = None,
+        memory_mb: Optional[int] = None,
+        region: Optional[str] = None,
+    ) -> List[UserVM]:
+        """
+        Provision several VMs for a user concurrently.
+
+        Machines are created in parallel and recorded in a single transaction.
+        Machines that fail to create are logged and left out of the result.
+
+        Args:
+            user_id: User ID
+            count: Number of VMs to provision
+            session_id: Optional session to link VMs to
+            cpu_type: CPU type (default from settings)
+            memory_mb: Memory in MB (default from settings)
+            region: Fly.io region (default from settings)
+
+        Returns:
+            UserVM records for the VMs that were created
+
+        Raises:
+            ValueError: If the VMs would exceed the user's limit or cpu_type
+                is unknown
+            FlyMachinesError: If no VM could be provisioned
+        """
+        if not self.fly_client:
+            raise FlyMachinesError("Fly.io client not configured")
+
+        # Check user VM limit
+        active_vms_count = await self._count_active_vms(
+            user_id, limit=settings.VM_MAX_PER_USER
+        )
+        if active_vms_count + count > settings.VM_MAX_PER_USER:
+            raise ValueError(
+                f"User has reached maximum VM limit ({settings.VM_MAX_PER_USER})"
+            )
+
+        _cpu_spec(cpu_type or settings.VM_DEFAULT_CPU_TYPE)
+
+        # The limit check above already caps count at VM_MAX_PER_USER
+        results = await asyncio.gather(
+            *(
+                self._create_vm_record(user_id, session_id, cpu_type, memory_mb, region)
+                for _ in range(count)
+            ),
+            return_exceptions=True,
+        )
+
+        vms = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to provision VM for user {user_id}: {result}")
+            else:
+                vms.append(result)
+
+        if count and not vms:
+            raise FlyMachinesError(f"Failed to provision VMs: {results[0]}")
+
+        self.db.add_all(vms)
+        await self.db.commit()
+
+        usage_writer = get_usage_writer()
+        for vm in vms:
+            await usage_writer.record_start(self._usage_values(vm))
+            schedule_auto_shutdown(vm.id, vm.auto_shutdown_at)
+
+        logger.info(f"Provisioned {len(vms)} VMs for user {user_id}")
+        return vms
+
+    async def _create_vm_record(
+        self,
+        user_id: UUID,
+        session_id: Optional[UUID],
+        cpu_type: Optional[str],
+        memory_mb: Optional[int],
+        region: Optional[str],
+    ) -> UserVM:
+        """Create a Fly.io machine and build its (unsaved) UserVM record."""
+        # Use defaults if not specified
+        cpu_type = cpu_type or settings.VM_DEFAULT_CPU_TYPE
+        memory_mb = memory_mb or settings.VM_DEFAULT_MEMORY_MB
+        region = region or settings.VM_DEFAULT_REGION
+        cpu_kind, cpus = _cpu_spec(cpu_type)
+
+        # Calculate auto-shutdown time
+        auto_shutdown_at = datetime.utcnow() + timedelta(
+            minutes=settings.VM_IDLE_TIMEOUT_MINUTES
+        )
+
+        # Create VM via Fly.io
+        machine_config = {
+            "guest": {
+                "cpu_kind": cpu_kind,
+                "cpus": cpus,
+                "memory_mb": memory_mb,
+            },
+            "image": "flyio/paraclete-base:latest",
+            "env": {
+                "USER_ID": str(user_id),
+                "TAILSCALE_AUTHKEY": settings.TAILSCALE_AUTH_KEY or "",
+            },
+        }
+
+        # Tag the machine at creation time rather than with a follow-up update
+        machine_metadata = {"user_id": str(user_id)}
+        if session_id:
+            machine_metadata["session_id"] = str(session_id)
+
+        machine = await _with_timeout(
+            self.fly_client.create_machine(
+                user_id=str(user_id),
+                config=machine_config,
+                region=region,
+                metadata=machine_metadata,
+            ),
+            FLY_CREATE_TIMEOUT,
+            "create machine",
+        )
+
+        # Fly launches machines as part of create, so there is no separate
+        # start call. The create response normally reports "created" for a
+        # machine that is already booting; any other state waits for
+        # get_vm_status to promote it.
+        started = machine.get("state") in _LAUNCHED_MACHINE_STATES
+
+        return UserVM(
+            user_id=user_id,
+            session_id=session_id,
+            machine_id=machine["id"],
+            machine_name=machine.get("name"),
+            region=machine.get("region"),
+            machine_config=machine.get("config", {}),
+            status=VMStatus.RUNNING if started else VMStatus.PROVISIONING,
+            cpu_type=cpu_type,
+            memory_mb=memory_mb,
+            auto_shutdown_at=auto_shutdown_at,
+            ipv4_address=machine.get("private_ip"),
+            started_at=datetime.utcnow() if started else None,
+        )
+
     async def terminate_vm(self, vm_id: UUID, force: bool = False) -> bool:
         """
         Terminate a VM and clean up resources.
@@ -182,28 +505,25 @@ class VMManager:
             raise FlyMachinesError("Fly.io client not configured")
 
         # Get VM record
-        result = await self.db.execute(select(UserVM).where(UserVM.id == vm_id))
-        vm = result.scalar_one_or_none()
+        vm = await self.db.get(UserVM, vm_id)
 
         if not vm:
             logger.warning(f"VM {vm_id} not found")
             return False
 
-        try:
-            # Destroy Fly.io machine
-            await self.fly_client.destroy_machine(vm.machine_id, force=force)
-
-            # End usage tracking
-            await self._end_usage_tracking(vm)
-
-            # Update VM status
-            vm.status = VMStatus.TERMINATED
-            vm.terminated_at = datetime.utcnow()
-            await self.db.commit()
-
-            logger.info(f"Terminated VM {vm.machine_id}")
+        if vm.status == VMStatus.TERMINATED:
             return True
 
+        try:
+            # Destroy Fly.io machine
+            await _with_timeout(
+                self.fly_client.destroy_machine(vm.machine_id, force=force),
+                FLY_DESTROY_TIMEOUT,
+                "destroy machine",
+            )
+        except FlyMachineNotFoundError:
+            # Already destroyed, e.g. by the idle sweep racing a shutdown timer
+            logger.info(f"Machine {vm.machine_id} already destroyed")
         except Exception as e:
             logger.error(f"Failed to terminate VM {vm.machine_id}: {e}")
             vm.status = VMStatus.ERROR
@@ -211,6 +531,22 @@ class VMManager:
             await self.db.commit()
             return False
 
+        _machine_status_cache.pop(vm.machine_id)
+
+        # Mark terminated only if no concurrent path already did, so usage
+        # is closed and terminated_at stamped exactly once
+        result = await self.db.execute(
+            update(UserVM)
+            .where(and_(UserVM.id == vm_id, UserVM.status != VMStatus.TERMINATED))
+            .values(status=VMStatus.TERMINATED, terminated_at=datetime.utcnow())
+            .returning(UserVM.id)
+        )
+        if result.scalar() is not None:
+            await self._end_usage_tracking(vm)
+            logger.info(f"Terminated VM {vm.machine_id}")
+        await self.db.commit()
+        return True
+
     async def get_vm_status(self, vm_id: UUID) -> Optional[Dict[str, Any]]:
         """
         Get VM status from database and Fly.io.
@@ -222,8 +558,7 @@ class VMManager:
             VM status details
         """
         # Get VM record
-        result = await self.db.execute(select(UserVM).where(UserVM.id == vm_id))
-        vm = result.scalar_one_or_none()
+        vm = await self.db.get(UserVM, vm_id)
 
         if not vm:
             return None
@@ -244,14 +579,56 @@ class VMManager:
         # Get live status from Fly.io if client available
         if self.fly_client and vm.status != VMStatus.TERMINATED:
             try:
-                machine_status = await self.fly_client.get_machine_status(vm.machine_id)
+                machine_status = await self._get_live_machine_status(vm.machine_id)
                 vm_info["machine_state"] = machine_status.get("state")
                 vm_info["instance_id"] = machine_status.get("instance_id")
+
+                # Promote VMs that were still booting when provisioned
+                if (
+                    vm.status == VMStatus.PROVISIONING
+                    and machine_status.get("state") == "started"
+                ):
+                    vm.status = VMStatus.RUNNING
+                    vm.started_at = datetime.utcnow()
+                    await self.db.commit()
+                    vm_info["status"] = vm.status.value
+                    vm_info["started_at"] = vm.started_at.isoformat()
             except Exception as e:
                 logger.warning(f"Failed to get machine status from Fly.io: {e}")
 
         return vm_info
 
+    async def _get_live_machine_status(self, machine_id: str) -> Dict[str, Any]:
+        """
+        Get machine status from Fly.io, sharing recent and in-flight lookups.
+
+        Args:
+            machine_id: Fly.io machine ID
+
+        Returns:
+            Machine status details
+        """
+        cached = _machine_status_cache.get(machine_id)
+        if cached is not None:
+            return cached
+
+        task = _machine_status_inflight.get(machine_id)
+        if task is None:
+            task = asyncio.create_task(
+                _with_timeout(
+                    self.fly_client.get_machine_status(machine_id),
+                    FLY_STATUS_TIMEOUT,
+                    "get machine status",
+                )
+            )
+            _machine_status_inflight[machine_id] = task
+            task.add_done_callback(
+                lambda done: _finish_machine_status(machine_id, done)
+            )
+
+        # Shield so one cancelled poller doesn't cancel the shared lookup
+        return await asyncio.shield(task)
+
     async def get_ssh_credentials(self, vm_id: UUID) -> Optional[Dict[str, str]]:
         """
         Get SSH credentials for connecting to a VM.
@@ -266,14 +643,17 @@ class VMManager:
             raise FlyMachinesError("Fly.io client not configured")
 
         # Get VM record
-        result = await self.db.execute(select(UserVM).where(UserVM.id == vm_id))
-        vm = result.scalar_one_or_none()
+        vm = await self.db.get(UserVM, vm_id)
 
         if not vm or vm.status == VMStatus.TERMINATED:
             return None
 
         try:
-            creds = await self.fly_client.get_ssh_credentials(vm.machine_id)
+            creds = await _with_timeout(
+                self.fly_client.get_ssh_credentials(vm.machine_id),
+                FLY_SSH_TIMEOUT,
+                "get SSH credentials",
+            )
 
             # Add Tailscale IP if available
             if vm.tailscale_ip:
@@ -289,27 +669,33 @@ class VMManager:
         """
         Update last activity timestamp and extend auto-shutdown.
 
+        Pings are debounced: the latest timestamp is written once per
+        ACTIVITY_DEBOUNCE_SECONDS window rather than on every call.
+
         Args:
             vm_id: VM database ID
         """
-        result = await self.db.execute(select(UserVM).where(UserVM.id == vm_id))
-        vm = result.scalar_one_or_none()
+        _pending_activity[vm_id] = datetime.utcnow()
 
-        if vm and vm.status == VMStatus.RUNNING:
-            vm.last_activity = datetime.utcnow()
-            vm.auto_shutdown_at = datetime.utcnow() + timedelta(
-                minutes=settings.VM_IDLE_TIMEOUT_MINUTES
+        if vm_id not in _activity_flushes:
+            _activity_flushes[vm_id] = asyncio.create_task(
+                _flush_vm_activity_later(vm_id)
             )
-            await self.db.commit()
-            logger.debug(f"Updated activity for VM {vm_id}")
 
     async def check_idle_vms(self) -> List[UUID]:
         """
         Check for idle VMs and shut them down.
 
+        Destroys all idle machines concurrently and marks them terminated in
+        a single transaction. Their usage records are closed through the usage
+        writer, behind any start events still queued for them.
+
         Returns:
             List of VM IDs that were shut down
         """
+        if not self.fly_client:
+            raise FlyMachinesError("Fly.io client not configured")
+
         now = datetime.utcnow()
 
         # Find VMs that should be shut down
@@ -323,15 +709,55 @@ class VMManager:
         )
         idle_vms = result.scalars().all()
 
+        if not idle_vms:
+            return []
+
+        results = await asyncio.gather(
+            *(
+                _with_timeout(
+                    self.fly_client.destroy_machine(vm.machine_id, force=True),
+                    FLY_DESTROY_TIMEOUT,
+                    "destroy machine",
+                )
+                for vm in idle_vms
+            ),
+            return_exceptions=True,
+        )
+
         shutdown_vm_ids = []
 
-        for vm in idle_vms:
-            logger.info(f"Auto-shutting down idle VM {vm.machine_id}")
-            try:
-                await self.terminate_vm(vm.id, force=True)
+        for vm, outcome in zip(idle_vms, results):
+            if isinstance(outcome, FlyMachineNotFoundError):
+                # Already destroyed, e.g. by the VM's own shutdown timer
                 shutdown_vm_ids.append(vm.id)
-            except Exception as e:
-                logger.error(f"Failed to auto-shutdown VM {vm.machine_id}: {e}")
+            elif isinstance(outcome, Exception):
+                logger.error(f"Failed to auto-shutdown VM {vm.machine_id}: {outcome}")
+                vm.status = VMStatus.ERROR
+                vm.status_message = str(outcome)
+            else:
+                logger.info(f"Auto-shut down idle VM {vm.machine_id}")
+                shutdown_vm_ids.append(vm.id)
+
+        if shutdown_vm_ids:
+            # Skip rows a concurrent terminate_vm already marked terminated
+            result = await self.db.execute(
+                update(UserVM)
+                .where(
+                    and_(
+                        UserVM.id.in_(shutdown_vm_ids),
+                        UserVM.status == VMStatus.RUNNING,
+                    )
+                )
+                .values(status=VMStatus.TERMINATED, terminated_at=now)
+                .returning(UserVM.id)
+                .execution_options(synchronize_session=False)
+            )
+            shutdown_vm_ids = list(result.scalars().all())
+
+        await self.db.commit()
+
+        if shutdown_vm_ids:
+            await get_usage_writer().record_ends(shutdown_vm_ids, now)
 
         return shutdown_vm_ids
 
@@ -356,66 +782,83 @@ class VMManager:
         result = await self.db.execute(query)
         return result.scalars().all()
 
-    async def _count_active_vms(self, user_id: UUID) -> int:
-        """Count active VMs for a user."""
-        from sqlalchemy import func
+    async def list_user_vms_lite(
+        self, user_id: UUID, include_terminated: bool = False
+    ) -> List[Row]:
+        """
+        Get a user's VMs with only the columns needed for listings.
 
-        result = await self.db.execute(
-            select(func.count(UserVM.id)).where(
-                and_(
-                    UserVM.user_id == user_id,
-                    UserVM.status.in_([VMStatus.PROVISIONING, VMStatus.RUNNING]),
-                )
-            )
-        )
-        return result.scalar() or 0
+        Skips hydrating full UserVM objects (notably the machine_config JSON).
+        Rows support attribute access like the ORM objects.
 
-    async def _start_usage_tracking(self, vm: UserVM) -> None:
-        """Start tracking compute usage for a VM."""
-        # Calculate cost per hour in cents
-        cost_per_hour = FLY_PRICING.get(vm.cpu_type, {}).get(str(vm.memory_mb), 0)
-
-        usage = ComputeUsage(
-            user_id=vm.user_id,
-            vm_id=vm.id,
-            start_time=datetime.utcnow(),
-            cpu_type=vm.cpu_type,
-            memory_mb=vm.memory_mb,
-            region=vm.region,
-            cost_per_hour=int(cost_per_hour * 100),  # Convert to cents
-        )
+        Args:
+            user_id: User ID
+            include_terminated: Include terminated VMs
 
-        self.db.add(usage)
-        await self.db.commit()
-        logger.debug(f"Started usage tracking for VM {vm.id}")
+        Returns:
+            List of rows
+        """
+        query = select(
+            UserVM.id,
+            UserVM.machine_id,
+            UserVM.status,
+            UserVM.cpu_type,
+            UserVM.memory_mb,
+            UserVM.region,
+            UserVM.provisioned_at,
+            UserVM.started_at,
+            UserVM.last_activity,
+            UserVM.auto_shutdown_at,
+            UserVM.ssh_hostname,
+            UserVM.tailscale_ip,
+        ).where(UserVM.user_id == user_id)
 
-    async def _end_usage_tracking(self, vm: UserVM) -> None:
-        """End usage tracking and calculate final cost."""
-        # Find active usage records
-        result = await self.db.execute(
-            select(ComputeUsage).where(
-                and_(
-                    ComputeUsage.vm_id == vm.id,
-                    ComputeUsage.end_time.is_(None),
-                )
-            )
-        )
-        usage_records = result.scalars().all()
+        if not include_terminated:
+            query = query.where(UserVM.status != VMStatus.TERMINATED)
 
-        now = datetime.utcnow()
+        result = await self.db.execute(query)
+        return result.all()
 
-        for usage in usage_records:
-            usage.end_time = now
-            duration_seconds = int((now - usage.start_time).total_seconds())
-            usage.duration_seconds = duration_seconds
+    async def _count_active_vms(
+        self, user_id: UUID, limit: Optional[int] = None
+    ) -> int:
+        """
+        Count active VMs for a user.
 
-            # Calculate cost: (duration_hours * cost_per_hour)
-            duration_hours = duration_seconds / 3600.0
-            usage.total_cost_cents = int(
-                duration_hours * (usage.cost_per_hour / 100.0) * 100
+        Args:
+            user_id: User ID
+            limit: Stop counting after this many rows; enough for a limit check
+                and lets the database stop scanning early
+        """
+        active_ids = select(UserVM.id).where(
+            and_(
+                UserVM.user_id == user_id,
+                UserVM.status.in_([VMStatus.PROVISIONING, VMStatus.RUNNING]),
             )
+        )
+        if limit is not None:
+            active_ids = active_ids.limit(limit)
 
-        await self.db.commit()
+        result = await self.db.execute(
+            select(func.count()).select_from(active_ids.subquery())
+        )
+        return result.scalar() or 0
+
+    def _usage_values(self, vm: UserVM) -> Dict[str, Any]:
+        """Build the open usage record values for a newly provisioned VM."""
+        return {
+            "user_id": vm.user_id,
+            "vm_id": vm.id,
+            "start_time": datetime.utcnow(),
+            "cpu_type": vm.cpu_type,
+            "memory_mb": vm.memory_mb,
+            "region": vm.region,
+            "cost_per_hour": _PRICING_CENTS.get((vm.cpu_type, vm.memory_mb), 0),
+        }
+
+    async def _end_usage_tracking(self, vm: UserVM) -> None:
+        """End usage tracking; duration and cost are calculated on write."""
+        await get_usage_writer().record_end(vm.id, datetime.utcnow())
         logger.debug(f"Ended usage tracking for VM {vm.id}")
 
     async def get_user_compute_costs(
@@ -431,31 +874,21 @@ class VMManager:
         Returns:
             Cost summary
         """
-        from sqlalchemy import func
-
         start_date = datetime.utcnow() - timedelta(days=days)
 
-        # Get total cost
-        result = await self.db.execute(
-            select(func.sum(ComputeUsage.total_cost_cents)).where(
-                and_(
-                    ComputeUsage.user_id == user_id,
-                    ComputeUsage.start_time >= start_date,
-                )
-            )
-        )
-        total_cost_cents = result.scalar() or 0
-
-        # Get usage count
+        # Total cost and usage count in one round trip
         result = await self.db.execute(
-            select(func.count(ComputeUsage.id)).where(
+            select(
+                func.coalesce(func.sum(ComputeUsage.total_cost_cents), 0),
+                func.count(ComputeUsage.id),
+            ).where(
                 and_(
                     ComputeUsage.user_id == user_id,
                     ComputeUsage.start_time >= start_date,
                 )
             )
         )
-        usage_count = result.scalar() or 0
+        total_cost_cents, usage_count = result.one()
 
         return {
             "user_id": str(user_id),
@@ -1,13 +1,23 @@
 """
 Push notification service using Firebase Cloud Messaging.
 """
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
+import asyncio
+import functools
 import logging
 
 from app.core.exceptions import ExternalServiceError
 
 logger = logging.getLogger(__name__)
 
+# FCM accepts at most 500 tokens per multicast request
+FCM_MULTICAST_LIMIT = 500
+FCM_MAX_CONCURRENT_BATCHES = 10
+
+# firebase_admin's send calls do blocking HTTP I/O; run them off the event loop
+_fcm_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fcm")
+
 
 class NotificationService:
     """Service for sending push notifications to mobile clients."""
@@ -15,6 +25,7 @@ class NotificationService:
     def __init__(self):
         """Initialize notification service."""
         self.fcm_initialized = False
+        self._messaging = None
         self._init_firebase()
 
     def _init_firebase(self) -> None:
@@ -23,6 +34,8 @@ class NotificationService:
             import firebase_admin
             from firebase_admin import messaging
 
+            self._messaging = messaging
+
             # Check if already initialized
             try:
                 firebase_admin.get_app()
@@ -65,9 +78,9 @@ class NotificationService:
             logger.warning("FCM not initialized, skipping notification")
             return False
 
-        try:
-            from firebase_admin import messaging
+        messaging = self._messaging
 
+        try:
             # Create message
             message = messaging.Message(
                 notification=messaging.Notification(
@@ -94,7 +107,9 @@ class NotificationService:
             )
 
             # Send message
-            response = messaging.send(message)
+            response = await asyncio.get_running_loop().run_in_executor(
+                _fcm_executor, functools.partial(messaging.send, message)
+            )
             logger.info(f"Successfully sent notification: {response}")
             return True
 
@@ -125,40 +140,49 @@ class NotificationService:
             logger.warning("FCM not initialized, skipping batch notification")
             return {"success_count": 0, "failure_count": len(tokens), "failed_tokens": tokens}
 
-        try:
-            from firebase_admin import messaging
+        messaging = self._messaging
 
-            # Create messages
-            messages = [
-                messaging.Message(
-                    notification=messaging.Notification(
-                        title=title,
-                        body=body,
-                    ),
+        try:
+            chunks = [
+                tokens[i:i + FCM_MULTICAST_LIMIT]
+                for i in range(0, len(tokens), FCM_MULTICAST_LIMIT)
+            ]
+            notification = messaging.Notification(title=title, body=body)
+            loop = asyncio.get_running_loop()
+            semaphore = asyncio.Semaphore(FCM_MAX_CONCURRENT_BATCHES)
+
+            async def send_chunk(chunk: List[str]):
+                message = messaging.MulticastMessage(
+                    tokens=chunk,
+                    notification=notification,
                     data=data or {},
-                    token=token,
                 )
-                for token in tokens
-            ]
+                async with semaphore:
+                    return await loop.run_in_executor(
+                        _fcm_executor,
+                        functools.partial(messaging.send_each_for_multicast, message),
+                    )
 
-            # Send batch
-            response = messaging.send_all(messages)
+            responses = await asyncio.gather(*(send_chunk(c) for c in chunks))
 
             # Process results
+            success_count = 0
             failed_tokens = []
-            for idx, result in enumerate(response.responses):
-                if not result.success:
-                    failed_tokens.append(tokens[idx])
-                    logger.warning(f"Failed to send to token {tokens[idx]}: {result.exception}")
+            for chunk, response in zip(chunks, responses):
+                success_count += response.success_count
+                for token, result in zip(chunk, response.responses):
+                    if not result.success:
+                        failed_tokens.append(token)
+                        logger.warning(f"Failed to send to token {token}: {result.exception}")
 
             logger.info(
-                f"Batch send complete: {response.success_count} success, "
-                f"{response.failure_count} failures"
+                f"Batch send complete: {success_count} success, "
+                f"{len(failed_tokens)} failures"
             )
 
             return {
-                "success_count": response.success_count,
-                "failure_count": response.failure_count,
+                "success_count": success_count,
+                "failure_count": len(failed_tokens),
                 "failed_tokens": failed_tokens,
             }
 
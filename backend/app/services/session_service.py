@@ -1,22 +1,96 @@
 """
 Session management service.
 """
-from typing import List, Optional, Dict, Any
+from typing import List, NoReturn, Optional, Dict, Any, Tuple
 from datetime import datetime
 from uuid import UUID
+import functools
+import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import (
+    ColumnElement,
+    and_,
+    delete,
+    desc,
+    exists,
+    func,
+    insert,
+    lambda_stmt,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import raiseload, selectinload
 import logging
 
-from app.db.models import Session, User, Message, SessionStatus, MessageRole
+from app.db.models import Session, Message, SessionStatus, MessageRole
+from app.core.auth import AuthPrincipal
 from app.core.exceptions import NotFoundError, AuthorizationError, SessionError
 
 logger = logging.getLogger(__name__)
 
+# Keyset pagination position: (timestamp, id) of the last message on a page
+MessageCursor = Tuple[datetime, UUID]
+
+# Session fields callers may change through update_session (intersected with
+# the mapped columns, so a stale name can never reach the UPDATE)
+UPDATABLE_SESSION_FIELDS = frozenset(
+    {
+        "status",
+        "repo_url",
+        "branch_name",
+        "project_name",
+        "description",
+        "current_agent",
+        "agent_statuses",
+        "current_commit_sha",
+        "files_changed",
+        "vm_machine_id",
+        "vm_status",
+    }
+) & frozenset(Session.__mapper__.columns.keys())
+
+# Columns the session list needs; listing skips hydrating full Session objects
+SESSION_LIST_COLUMNS = (
+    Session.id,
+    Session.user_id,
+    Session.status,
+    Session.repo_url,
+    Session.branch_name,
+    Session.project_name,
+    Session.description,
+    Session.desktop_session_id,
+    Session.current_agent,
+    Session.agent_statuses,
+    Session.langgraph_thread_id,
+    Session.vm_machine_id,
+    Session.vm_status,
+    Session.created_at,
+    Session.updated_at,
+    Session.last_activity,
+    Session.completed_at,
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _project_name_from_url(repo_url: str) -> Optional[str]:
+    """Last path segment of a GitHub/GitLab URL, without a trailing .git."""
+    parts = repo_url.rstrip("/").rsplit("/", 1)
+    if len(parts) < 2:
+        return None
+    return parts[-1].removesuffix(".git")
+
 
 class SessionService:
-    """Service for managing user sessions."""
+    """
+    Service for managing user sessions.
+
+    Authorization only needs the caller's id and superuser flag, so methods
+    take an AuthPrincipal; a loaded User satisfies the same interface.
+    """
 
     def __init__(self, db: AsyncSession):
         """
@@ -29,7 +103,7 @@ class SessionService:
 
     async def create_session(
         self,
-        user: User,
+        principal: AuthPrincipal,
         repo_url: Optional[str] = None,
         branch_name: Optional[str] = None,
         project_name: Optional[str] = None,
@@ -40,7 +114,7 @@ class SessionService:
         Create a new coding session.
 
         Args:
-            user: User creating the session
+            principal: Caller creating the session
             repo_url: Optional repository URL
             branch_name: Optional branch name
             project_name: Optional project name
@@ -50,34 +124,43 @@ class SessionService:
         Returns:
             Created session
         """
-        session = Session(
-            user_id=user.id,
-            status=SessionStatus.ACTIVE,
-            repo_url=repo_url,
-            branch_name=branch_name,
-            project_name=project_name or self._extract_project_name(repo_url),
-            description=description,
-            desktop_session_id=desktop_session_id,
-            agent_statuses={},
-            files_changed=[],
+        # RETURNING hands back defaults (id, timestamps) without a refresh
+        session = await self.db.scalar(
+            insert(Session)
+            .values(
+                self._new_session_values(
+                    principal,
+                    repo_url=repo_url,
+                    branch_name=branch_name,
+                    project_name=project_name,
+                    description=description,
+                    desktop_session_id=desktop_session_id,
+                )
+            )
+            .returning(Session)
         )
-
-        self.db.add(session)
         await self.db.commit()
-        await self.db.refresh(session)
 
-        logger.info(f"Created session {session.id} for user {user.id}")
+        logger.info(f"Created session {session.id} for user {principal.id}")
         return session
 
     async def get_session(
-        self, session_id: UUID, user: Optional[User] = None
+        self,
+        session_id: UUID,
+        principal: Optional[AuthPrincipal] = None,
+        *,
+        load_messages: bool = False,
     ) -> Session:
         """
         Get a session by ID.
 
+        Relationships are not loaded unless requested; touching an unloaded
+        one raises instead of silently issuing a lazy query.
+
         Args:
             session_id: Session ID
-            user: Optional user for authorization check
+            principal: Optional caller for authorization check
+            load_messages: Eagerly load the session's messages
 
         Returns:
             Session object
@@ -86,58 +169,86 @@ class SessionService:
             NotFoundError: If session not found
             AuthorizationError: If user doesn't own the session
         """
-        result = await self.db.execute(
-            select(Session)
-            .options(selectinload(Session.messages))
+        query = lambda_stmt(
+            lambda: select(Session)
+            .options(raiseload("*"))
             .where(Session.id == session_id)
         )
-        session = result.scalar_one_or_none()
+        # Authorize in SQL; superusers get no owner predicate at all
+        if principal and not principal.is_superuser:
+            user_id = principal.id
+            query += lambda s: s.where(Session.user_id == user_id)
+        if load_messages:
+            query += lambda s: s.options(selectinload(Session.messages))
 
-        if not session:
-            raise NotFoundError("Session", str(session_id))
+        result = await self.db.execute(query)
+        session = result.scalar_one_or_none()
 
-        if user and session.user_id != user.id and not user.is_superuser:
-            raise AuthorizationError("You don't have access to this session")
+        if session is None:
+            await self._raise_access_error(session_id)
 
         return session
 
+    async def get_session_with_messages(
+        self, session_id: UUID, principal: Optional[AuthPrincipal] = None
+    ) -> Session:
+        """
+        Get a session by ID with its messages loaded.
+
+        Args:
+            session_id: Session ID
+            principal: Optional caller for authorization check
+
+        Returns:
+            Session object with messages
+
+        Raises:
+            NotFoundError: If session not found
+            AuthorizationError: If user doesn't own the session
+        """
+        return await self.get_session(session_id, principal, load_messages=True)
+
     async def list_user_sessions(
         self,
-        user: User,
+        principal: AuthPrincipal,
         status: Optional[SessionStatus] = None,
         limit: int = 20,
         offset: int = 0,
-    ) -> List[Session]:
+    ) -> List[Row]:
         """
         List user's sessions.
 
+        Returns rows of SESSION_LIST_COLUMNS rather than Session objects; rows
+        support attribute access like the ORM objects.
+
         Args:
-            user: User whose sessions to list
+            principal: Caller whose sessions to list
             status: Optional status filter
             limit: Maximum number of sessions to return
             offset: Number of sessions to skip
 
         Returns:
-            List of sessions
+            List of session rows
         """
-        query = select(Session).where(Session.user_id == user.id)
+        user_id = principal.id
+        query = lambda_stmt(
+            lambda: select(*SESSION_LIST_COLUMNS).where(Session.user_id == user_id)
+        )
 
         if status:
-            query = query.where(Session.status == status)
+            query += lambda s: s.where(Session.status == status)
 
-        query = (
-            query.order_by(desc(Session.created_at))
-            .limit(limit)
-            .offset(offset)
+        query += (
+            lambda s: s.order_by(desc(Session.created_at)).limit(limit).offset(offset)
         )
 
         result = await self.db.execute(query)
-        return result.scalars().all()
+        return result.all()
 
     async def update_session(
         self,
         session_id: UUID,
-        user: User,
+        principal: AuthPrincipal,
         updates: Dict[str, Any],
     ) -> Session:
         """
@@ -145,7 +256,7 @@ class SessionService:
 
         Args:
             session_id: Session ID
-            user: User performing the update
+            principal: Caller performing the update
             updates: Dictionary of fields to update
 
         Returns:
@@ -155,60 +266,64 @@ class SessionService:
             NotFoundError: If session not found
             AuthorizationError: If user doesn't own the session
         """
-        session = await self.get_session(session_id, user)
-
-        # Update allowed fields
-        allowed_fields = {
-            "status",
-            "repo_url",
-            "branch_name",
-            "project_name",
-            "description",
-            "current_agent",
-            "agent_statuses",
-            "current_commit_sha",
-            "files_changed",
-            "vm_machine_id",
-            "vm_status",
+        values = {
+            field: value
+            for field, value in updates.items()
+            if field in UPDATABLE_SESSION_FIELDS
         }
+        values["updated_at"] = func.clock_timestamp()
+        if updates.get("status") == SessionStatus.COMPLETED:
+            values["completed_at"] = func.clock_timestamp()
 
-        for field, value in updates.items():
-            if field in allowed_fields and hasattr(session, field):
-                setattr(session, field, value)
+        # Authorize and update in one statement
+        result = await self.db.execute(
+            update(Session)
+            .where(self._authorized(session_id, principal))
+            .values(**values)
+            .returning(Session)
+            .execution_options(populate_existing=True)
+        )
+        session = result.scalar_one_or_none()
 
-        # Update timestamps
-        session.updated_at = datetime.utcnow()
-        if "status" in updates and updates["status"] == SessionStatus.COMPLETED:
-            session.completed_at = datetime.utcnow()
+        if session is None:
+            await self._raise_access_error(session_id)
 
         await self.db.commit()
-        await self.db.refresh(session)
 
         logger.info(f"Updated session {session_id}")
         return session
 
-    async def delete_session(self, session_id: UUID, user: User) -> None:
+    async def delete_session(self, session_id: UUID, principal: AuthPrincipal) -> None:
         """
         Delete a session and all its messages.
 
         Args:
             session_id: Session ID
-            user: User performing the deletion
+            principal: Caller performing the deletion
 
         Raises:
             NotFoundError: If session not found
             AuthorizationError: If user doesn't own the session
         """
-        session = await self.get_session(session_id, user)
+        authorized = self._authorized(session_id, principal)
+
+        await self.db.execute(
+            delete(Message).where(
+                Message.session_id.in_(select(Session.id).where(authorized))
+            )
+        )
+        result = await self.db.execute(delete(Session).where(authorized))
+
+        if result.rowcount == 0:
+            await self._raise_access_error(session_id)
 
-        await self.db.delete(session)
         await self.db.commit()
 
         logger.info(f"Deleted session {session_id}")
 
     async def sync_from_desktop(
         self,
-        user: User,
+        principal: AuthPrincipal,
         desktop_session_id: str,
         context: Dict[str, Any],
     ) -> Session:
@@ -216,43 +331,62 @@ class SessionService:
         Sync session from desktop (Claude Code, Cursor, etc).
 
         Args:
-            user: User syncing the session
+            principal: Caller syncing the session
             desktop_session_id: Desktop session identifier
             context: Session context from desktop
 
         Returns:
             Synced or created session
         """
-        # Check if session already exists
-        result = await self.db.execute(
-            select(Session).where(
+        # Check if session already exists (index lookup on the natural key)
+        user_id = principal.id
+        lookup = lambda_stmt(
+            lambda: select(Session.id).where(
                 and_(
-                    Session.user_id == user.id,
+                    Session.user_id == user_id,
                     Session.desktop_session_id == desktop_session_id,
                 )
             )
         )
-        session = result.scalar_one_or_none()
-
-        if session:
-            # Update existing session
+        session_id = await self.db.scalar(lookup)
+
+        session = None
+        if not session_id:
+            # Create new session; a concurrent first sync may insert the same
+            # natural key after our lookup, in which case update its row
+            session = await self.db.scalar(
+                pg_insert(Session)
+                .values(
+                    self._new_session_values(
+                        principal,
+                        repo_url=context.get("repo_url"),
+                        branch_name=context.get("branch_name"),
+                        project_name=context.get("project_name"),
+                        description=f"Synced from desktop: {desktop_session_id}",
+                        desktop_session_id=desktop_session_id,
+                    )
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[Session.user_id, Session.desktop_session_id]
+                )
+                .returning(Session)
+            )
+            if session is None:
+                session_id = await self.db.scalar(lookup)
+            else:
+                await self.db.commit()
+                logger.info(f"Created session {session.id} for user {user_id}")
+
+        if session is None:
+            # Update existing session; omitted repo fields keep their values
             updates = {
-                "repo_url": context.get("repo_url", session.repo_url),
-                "branch_name": context.get("branch_name", session.branch_name),
                 "current_commit_sha": context.get("commit_sha"),
                 "files_changed": context.get("files_changed", []),
             }
-            session = await self.update_session(session.id, user, updates)
-        else:
-            # Create new session
-            session = await self.create_session(
-                user=user,
-                repo_url=context.get("repo_url"),
-                branch_name=context.get("branch_name"),
-                project_name=context.get("project_name"),
-                description=f"Synced from desktop: {desktop_session_id}",
-                desktop_session_id=desktop_session_id,
-            )
+            for field in ("repo_url", "branch_name"):
+                if field in context:
+                    updates[field] = context[field]
+            session = await self.update_session(session_id, principal, updates)
 
         # Add messages from desktop context if provided
         if "messages" in context:
@@ -264,7 +398,7 @@ class SessionService:
     async def add_message(
         self,
         session_id: UUID,
-        user: User,
+        principal: AuthPrincipal,
         role: MessageRole,
         content: str,
         voice_transcript: Optional[str] = None,
@@ -276,7 +410,7 @@ class SessionService:
 
         Args:
             session_id: Session ID
-            user: User adding the message
+            principal: Caller adding the message
             role: Message role (user, assistant, system)
             content: Message content
             voice_transcript: Optional voice transcript
@@ -290,24 +424,47 @@ class SessionService:
             NotFoundError: If session not found
             AuthorizationError: If user doesn't own the session
         """
-        session = await self.get_session(session_id, user)
-
-        message = Message(
-            session_id=session.id,
-            role=role,
-            content=content,
-            voice_transcript=voice_transcript,
-            agent=agent,
-            metadata=metadata or {},
+        # One round trip: touching last_activity doubles as the authorization
+        # check, and the message is only inserted if that UPDATE matched
+        touched = (
+            update(Session)
+            .where(self._authorized(session_id, principal))
+            .values(last_activity=func.clock_timestamp())
+            .returning(Session.id)
+            .cte("touched")
+        )
+        row = select(
+            literal(uuid.uuid4(), Message.id.type),
+            touched.c.id,
+            literal(role, Message.role.type),
+            literal(content, Message.content.type),
+            literal(voice_transcript, Message.voice_transcript.type),
+            literal(agent, Message.agent.type),
+            literal(metadata or {}, Message.message_metadata.type),
+            func.clock_timestamp(),
+        )
+        message = await self.db.scalar(
+            insert(Message)
+            .from_select(
+                [
+                    "id",
+                    "session_id",
+                    "role",
+                    "content",
+                    "voice_transcript",
+                    "agent",
+                    "message_metadata",
+                    "timestamp",
+                ],
+                row,
+            )
+            .returning(Message)
         )
 
-        self.db.add(message)
-
-        # Update session last activity
-        session.last_activity = datetime.utcnow()
+        if message is None:
+            await self._raise_access_error(session_id)
 
         await self.db.commit()
-        await self.db.refresh(message)
 
         logger.debug(f"Added message to session {session_id}")
         return message
@@ -315,37 +472,118 @@ class SessionService:
     async def get_session_messages(
         self,
         session_id: UUID,
-        user: User,
+        principal: AuthPrincipal,
         limit: int = 50,
-        offset: int = 0,
-    ) -> List[Message]:
+        after: Optional[MessageCursor] = None,
+    ) -> Tuple[List[Message], Optional[MessageCursor]]:
         """
-        Get messages for a session.
+        Get a page of messages for a session, oldest first.
+
+        Pages by keyset on (timestamp, id), so fetching later pages costs the
+        same as the first one regardless of how deep the history is.
 
         Args:
             session_id: Session ID
-            user: User requesting messages
+            principal: Caller requesting messages
             limit: Maximum number of messages
-            offset: Number of messages to skip
+            after: Cursor returned with the previous page
 
         Returns:
-            List of messages
+            Tuple of (messages, cursor for the next page or None if exhausted)
 
         Raises:
             NotFoundError: If session not found
             AuthorizationError: If user doesn't own the session
         """
-        session = await self.get_session(session_id, user)
+        await self.get_session(session_id, principal)
 
-        result = await self.db.execute(
-            select(Message)
-            .where(Message.session_id == session.id)
-            .order_by(Message.timestamp)
-            .limit(limit)
-            .offset(offset)
+        query = lambda_stmt(
+            lambda: select(Message).where(Message.session_id == session_id)
         )
+        if after is not None:
+            after_timestamp, after_id = after
+            query += lambda s: s.where(
+                tuple_(Message.timestamp, Message.id)
+                > tuple_(after_timestamp, after_id)
+            )
+        query += lambda s: s.order_by(Message.timestamp, Message.id).limit(limit)
+
+        result = await self.db.execute(query)
+        messages = result.scalars().all()
+
+        next_cursor = None
+        if len(messages) == limit:
+            next_cursor = (messages[-1].timestamp, messages[-1].id)
+
+        return messages, next_cursor
 
-        return result.scalars().all()
+    def _authorized(
+        self, session_id: UUID, principal: Optional[AuthPrincipal]
+    ) -> ColumnElement[bool]:
+        """
+        Build a WHERE clause matching the session only if the caller may access it.
+
+        Args:
+            session_id: Session ID
+            principal: Optional caller for authorization check
+
+        Returns:
+            SQL condition
+        """
+        condition = Session.id == session_id
+        if principal and not principal.is_superuser:
+            condition = and_(condition, Session.user_id == principal.id)
+        return condition
+
+    async def _raise_access_error(self, session_id: UUID) -> NoReturn:
+        """
+        Raise the right error after an authorized statement matched no rows.
+
+        Raises:
+            NotFoundError: If session not found
+            AuthorizationError: If the session exists but the user can't access it
+        """
+        session_exists = await self.db.scalar(
+            select(exists().where(Session.id == session_id))
+        )
+        if not session_exists:
+            raise NotFoundError("Session", str(session_id))
+        raise AuthorizationError("You don't have access to this session")
+
+    def _new_session_values(
+        self,
+        principal: AuthPrincipal,
+        repo_url: Optional[str],
+        branch_name: Optional[str],
+        project_name: Optional[str],
+        description: Optional[str],
+        desktop_session_id: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Build column values for a new active session.
+
+        Args:
+            principal: Caller creating the session
+            repo_url: Optional repository URL
+            branch_name: Optional branch name
+            project_name: Optional project name (derived from repo_url if omitted)
+            description: Optional session description
+            desktop_session_id: Optional desktop session ID for syncing
+
+        Returns:
+            INSERT values
+        """
+        return {
+            "user_id": principal.id,
+            "status": SessionStatus.ACTIVE,
+            "repo_url": repo_url,
+            "branch_name": branch_name,
+            "project_name": project_name or self._extract_project_name(repo_url),
+            "description": description,
+            "desktop_session_id": desktop_session_id,
+            "agent_statuses": {},
+            "files_changed": [],
+        }
 
     def _extract_project_name(self, repo_url: Optional[str]) -> Optional[str]:
         """
@@ -360,12 +598,7 @@ class SessionService:
         if not repo_url:
             return None
 
-        # Extract from GitHub/GitLab URLs
-        parts = repo_url.rstrip("/").split("/")
-        if len(parts) >= 2:
-            return parts[-1].replace(".git", "")
-
-        return None
+        return _project_name_from_url(repo_url)
 
     async def _add_messages_to_session(
         self, session: Session, messages: List[Dict[str, Any]]
@@ -377,14 +610,20 @@ class SessionService:
             session: Session to add messages to
             messages: List of message dictionaries
         """
-        for msg_data in messages:
-            message = Message(
-                session_id=session.id,
-                role=MessageRole(msg_data.get("role", "user")),
-                content=msg_data.get("content", ""),
-                agent=msg_data.get("agent"),
-                metadata=msg_data.get("metadata", {}),
-            )
-            self.db.add(message)
+        if not messages:
+            return
+
+        # Build (and validate roles for) every row before writing any of them
+        rows = [
+            {
+                "session_id": session.id,
+                "role": MessageRole(msg_data.get("role", "user")),
+                "content": msg_data.get("content", ""),
+                "agent": msg_data.get("agent"),
+                "message_metadata": msg_data.get("metadata") or {},
+            }
+            for msg_data in messages
+        ]
 
+        await self.db.execute(insert(Message), rows)
         await self.db.commit()
\ No newline at end of file
@@ -2,22 +2,78 @@
 Integration tests for LangGraph agent workflows.
 
 Tests full workflow execution, state persistence, and human-in-the-loop approval.
+Tests that only exercise state dicts are marked unit so `pytest -m unit` runs
+them without the integration setup.
 """
 
+import orjson
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
-from datetime import datetime
+from dataclasses import dataclass
+from types import MappingProxyType, SimpleNamespace
+from typing import Any
+from unittest.mock import DEFAULT, patch, AsyncMock
+from datetime import datetime, timedelta
 
 from langchain_core.messages import HumanMessage, AIMessage
 from langgraph.types import Command
 
-from app.agents.state import AgentState
-
-
-@pytest.fixture
+from app.agents.specialists.coder import coder_node
+from app.agents.specialists.researcher import researcher_node
+from app.agents.state import AgentOutput, AgentState, GitChange
+
+# Fixed clock for simulated outputs, so results don't depend on wall time
+FIXED_TS = datetime(2024, 1, 1, 12, 0, 0)
+
+# Sample agent outputs; AgentOutput is a TypedDict, and tests only read them
+CODER_OUTPUT = AgentOutput(
+    agent_name='coder',
+    timestamp=FIXED_TS,
+    result={'summary': 'Generated code'},
+    model_used='gpt-4o',
+    tokens_used=500,
+    error=None,
+)
+REVIEWER_OUTPUT = AgentOutput(
+    agent_name='reviewer',
+    timestamp=FIXED_TS,
+    result={},
+    model_used='claude-sonnet-3.5',
+    tokens_used=300,
+    error=None,
+)
+SUPERVISOR_OUTPUT = AgentOutput(
+    agent_name='supervisor',
+    timestamp=FIXED_TS,
+    result={},
+    model_used='claude-sonnet-4',
+    tokens_used=100,
+    error=None,
+)
+RESEARCHER_OUTPUT = AgentOutput(
+    agent_name='researcher',
+    timestamp=FIXED_TS,
+    result={},
+    model_used='gemini-1.5-pro',
+    tokens_used=2000,
+    error=None,
+)
+SUBTASK_OUTPUTS = tuple(
+    AgentOutput(
+        agent_name='coder',
+        timestamp=FIXED_TS,
+        result={'subtask_id': subtask_id, 'summary': f'Done {subtask_id}'},
+        model_used='gpt-4o',
+        tokens_used=100,
+        error=None,
+    )
+    for subtask_id in ('1', '2')
+)
+
+
+@pytest.fixture(scope="session")
 def base_workflow_state():
-    """Base state for workflow testing."""
-    return {
+    """Read-only base state for workflow testing; tests use workflow_state."""
+    return MappingProxyType({
         'session_id': 'test-session-workflow',
         'messages': [HumanMessage(content='Write a function to sort arrays')],
         'task_description': 'Write a function to sort arrays',
@@ -32,77 +88,135 @@ def base_workflow_state():
         'errors': [],
         'retry_count': 0,
         'max_retries': 3,
-    }
+    })
 
 
-@pytest.mark.integration
-class TestSupervisorToCoderWorkflow:
-    """Test workflow from supervisor to coder agent."""
+@pytest.fixture
+def workflow_state(base_workflow_state):
+    """Mutable copy of the base state, isolated per test."""
+    state = dict(base_workflow_state)
+    state['messages'] = list(base_workflow_state['messages'])
+    state['agent_outputs'] = []
+    state['pending_changes'] = []
+    state['agent_statuses'] = {}
+    state['errors'] = []
+    return state
+
+
+def fake_model(model_name):
+    """Stand-in chat model whose bind_tools returns itself."""
+    model = SimpleNamespace(model_name=model_name)
+    model.bind_tools = lambda *_args, **_kwargs: model
+    return model
 
-    @patch('app.agents.specialists.coder.ChatPromptTemplate')
-    @patch('app.agents.specialists.coder.ModelRouter')
-    @patch('app.agents.specialists.coder.get_file_tools')
-    @patch('app.agents.specialists.coder.get_git_tools')
-    def test_supervisor_routes_code_task_to_coder(
-        self,
-        mock_git_tools,
-        mock_file_tools,
-        mock_model_router,
-        mock_prompt_template,
-        base_workflow_state,
-    ):
-        """Test that supervisor correctly routes code generation to coder."""
-        # Arrange
-        from app.agents.specialists.coder import coder_node
 
-        # Mock tools - return list of mock tool objects
-        file_tool = Mock(name='write_file')
-        file_tool.name = 'write_file'
-        mock_file_tools.return_value = [file_tool]
+@dataclass
+class FakePrompt:
+    """Stand-in prompt template; piping it into a model yields chain."""
 
-        git_tool = Mock(name='commit_changes')
-        git_tool.name = 'commit_changes'
-        mock_git_tools.return_value = [git_tool]
+    chain: Any
 
-        # Mock response with explicit tool_calls as empty list
-        mock_response = Mock()
-        mock_response.content = 'Code generated successfully'
-        mock_response.tool_calls = []
+    def __or__(self, _model):
+        return self.chain
 
-        # Mock the chain (prompt | model) to return our response directly
-        mock_chain = Mock()
-        mock_chain.invoke = Mock(return_value=mock_response)
 
-        mock_model = Mock()
-        mock_model.model_name = 'gpt-4o'
-        mock_model.bind_tools = Mock(return_value=mock_model)
+def respond_with(response):
+    """Chain invoke stand-in that always returns response."""
+    return lambda *_args, **_kwargs: response
 
-        # Mock prompt template so prompt | model returns our chain
-        mock_prompt = Mock()
-        mock_prompt.__or__ = Mock(return_value=mock_chain)
-        mock_prompt_template.from_messages = Mock(return_value=mock_prompt)
 
-        mock_router = Mock()
-        mock_router.get_model = Mock(return_value=mock_model)
-        mock_model_router.return_value = mock_router
+@pytest.fixture(scope="session")
+def prompt_chain_skeleton():
+    """
+    Shared `prompt | model` stand-ins, wired once per session.
+
+    Tests only swap chain.invoke; piping the prompt always yields chain.
+    """
+    chain = SimpleNamespace(invoke=None)
+    return FakePrompt(chain), chain
+
+
+@pytest.fixture
+def coder_mocks(prompt_chain_skeleton):
+    """
+    Patch the coder agent's model router, prompt template and tools.
+
+    By default the model answers 'Code generated' with no tool calls; tests
+    adjust the returned namespace (response, chain, model, router).
+    """
+    with patch.multiple(
+        'app.agents.specialists.coder',
+        ChatPromptTemplate=DEFAULT,
+        ModelRouter=DEFAULT,
+        get_file_tools=DEFAULT,
+        get_git_tools=DEFAULT,
+    ) as patched:
+        # Tools only need a name and an invoke callable
+        file_tool = SimpleNamespace(
+            name='write_file',
+            invoke=lambda _args: {'success': True, 'path': '/test.py'},
+        )
+        patched['get_file_tools'].return_value = [file_tool]
+        patched['get_git_tools'].return_value = [SimpleNamespace(name='commit_changes')]
+
+        # The chain (prompt | model) returns this response directly
+        prompt, chain = prompt_chain_skeleton
+        response = SimpleNamespace(content='Code generated', tool_calls=[])
+        chain.invoke = respond_with(response)
+        model = fake_model('gpt-4o')
+        patched['ChatPromptTemplate'].from_messages = lambda *_args: prompt
+
+        router = SimpleNamespace(get_model=lambda *_args, **_kwargs: model)
+        patched['ModelRouter'].return_value = router
+
+        yield SimpleNamespace(
+            response=response, chain=chain, model=model, router=router
+        )
+
+
+@pytest.mark.integration
+class TestSupervisorToCoderWorkflow:
+    """Test workflow from supervisor to coder agent."""
+
+    @pytest.mark.parametrize(
+        "tool_calls,state_flags,expected_goto",
+        [
+            ([], {}, 'reviewer'),
+            (
+                [{'name': 'write_file', 'args': {'file_path': '/test.py', 'content': 'code'}}],
+                {'requires_approval': True},
+                'approval',
+            ),
+            ([], {'skip_review': True}, 'END'),
+        ],
+        ids=['review', 'approval', 'skip-review'],
+    )
+    def test_coder_routes_completed_task(
+        self, coder_mocks, workflow_state, tool_calls, state_flags, expected_goto
+    ):
+        """Test where the coder sends a completed task next."""
+        # Arrange
+        coder_mocks.response.tool_calls = tool_calls
+        workflow_state.update(state_flags)
 
         # Act
-        result = coder_node(base_workflow_state)
+        result = coder_node(workflow_state)
 
         # Assert
         assert isinstance(result, Command)
+        assert result.goto == expected_goto
         assert result.update['agent_statuses']['coder'] == 'completed'
         assert len(result.update['agent_outputs']) > 0
 
 
-@pytest.mark.integration
+@pytest.mark.unit
 class TestWorkflowStateTransitions:
     """Test state transitions through workflow."""
 
-    def test_workflow_state_accumulates_messages(self, base_workflow_state):
+    def test_workflow_state_accumulates_messages(self, workflow_state):
         """Test that messages accumulate through workflow."""
         # Simulate adding messages
-        state = base_workflow_state.copy()
+        state = workflow_state
 
         state['messages'].append(AIMessage(content='Task classified as code_generation'))
         state['messages'].append(AIMessage(content='Code generated'))
@@ -111,31 +225,18 @@ class TestWorkflowStateTransitions:
         assert isinstance(state['messages'][0], HumanMessage)
         assert isinstance(state['messages'][1], AIMessage)
 
-    def test_workflow_tracks_agent_outputs(self, base_workflow_state):
+    def test_workflow_tracks_agent_outputs(self, workflow_state):
         """Test that agent outputs are tracked."""
         # Simulate agent execution
-        from app.agents.state import AgentOutput
-
-        output = AgentOutput(
-            agent_name='coder',
-            timestamp=datetime.now(),
-            result={'summary': 'Generated code'},
-            model_used='gpt-4o',
-            tokens_used=500,
-            error=None,
-        )
-
-        state = base_workflow_state.copy()
-        state['agent_outputs'].append(output)
+        state = workflow_state
+        state['agent_outputs'].append(CODER_OUTPUT)
 
         assert len(state['agent_outputs']) == 1
         assert state['agent_outputs'][0]['agent_name'] == 'coder'
 
-    def test_workflow_tracks_pending_changes(self, base_workflow_state):
+    def test_workflow_tracks_pending_changes(self, workflow_state):
         """Test that file changes are tracked."""
         # Simulate file changes
-        from app.agents.state import GitChange
-
         change = GitChange(
             file_path='/workspace/sort.py',
             operation='create',
@@ -144,68 +245,52 @@ class TestWorkflowStateTransitions:
             diff=None,
         )
 
-        state = base_workflow_state.copy()
+        state = workflow_state
         state['pending_changes'].append(change)
 
         assert len(state['pending_changes']) == 1
         assert state['pending_changes'][0]['file_path'] == '/workspace/sort.py'
 
 
-@pytest.mark.integration
 class TestWorkflowErrorHandling:
     """Test error handling in workflows."""
 
-    @patch('app.agents.specialists.coder.ModelRouter')
-    @patch('app.agents.specialists.coder.get_file_tools')
-    @patch('app.agents.specialists.coder.get_git_tools')
-    def test_workflow_handles_agent_errors(
-        self,
-        mock_git_tools,
-        mock_file_tools,
-        mock_model_router,
-        base_workflow_state,
-    ):
+    @pytest.mark.integration
+    def test_workflow_handles_agent_errors(self, coder_mocks, workflow_state):
         """Test that workflow handles agent errors gracefully."""
         # Arrange
-        from app.agents.specialists.coder import coder_node
+        def fail(*_args, **_kwargs):
+            raise Exception('Model API error')
 
-        mock_file_tools.return_value = []
-        mock_git_tools.return_value = []
-
-        mock_model = Mock()
-        mock_model.invoke = Mock(side_effect=Exception('Model API error'))
-        mock_router = Mock()
-        mock_router.get_model = Mock(return_value=mock_model)
-        mock_model_router.return_value = mock_router
+        coder_mocks.chain.invoke = fail
 
         # Act
-        result = coder_node(base_workflow_state)
+        result = coder_node(workflow_state)
 
         # Assert
         assert result.goto == 'error_handler'
         assert len(result.update['errors']) > 0
         assert result.update['agent_statuses']['coder'] == 'failed'
 
-    def test_workflow_tracks_retry_count(self, base_workflow_state):
+    @pytest.mark.unit
+    def test_workflow_tracks_retry_count(self, workflow_state):
         """Test that retry count is tracked."""
         # Simulate retry
-        state = base_workflow_state.copy()
+        state = workflow_state
         state['retry_count'] = 1
 
         assert state['retry_count'] == 1
         assert state['retry_count'] < state['max_retries']
 
 
-@pytest.mark.integration
+@pytest.mark.unit
 class TestWorkflowApprovalFlow:
     """Test human-in-the-loop approval workflow."""
 
-    def test_workflow_detects_approval_required(self, base_workflow_state):
+    def test_workflow_detects_approval_required(self, workflow_state):
         """Test detection of approval-required operations."""
         # Simulate pending changes
-        from app.agents.state import GitChange
-
-        state = base_workflow_state.copy()
+        state = workflow_state
         state['pending_changes'] = [
             GitChange(
                 file_path='/workspace/file.py',
@@ -220,72 +305,14 @@ class TestWorkflowApprovalFlow:
         assert state['requires_approval'] is True
         assert len(state['pending_changes']) > 0
 
-    @patch('app.agents.specialists.coder.ChatPromptTemplate')
-    @patch('app.agents.specialists.coder.ModelRouter')
-    @patch('app.agents.specialists.coder.get_file_tools')
-    @patch('app.agents.specialists.coder.get_git_tools')
-    def test_workflow_routes_to_approval(
-        self,
-        mock_git_tools,
-        mock_file_tools,
-        mock_model_router,
-        mock_prompt_template,
-        base_workflow_state,
-    ):
-        """Test that workflow routes to approval when required."""
-        # Arrange
-        from app.agents.specialists.coder import coder_node
-
-        # Mock tools - return list of mock tool objects
-        file_tool = Mock(name='write_file')
-        file_tool.name = 'write_file'
-        file_tool.invoke = Mock(return_value={'success': True, 'path': '/test.py'})
-        mock_file_tools.return_value = [file_tool]
-
-        git_tool = Mock(name='commit_changes')
-        git_tool.name = 'commit_changes'
-        mock_git_tools.return_value = [git_tool]
-
-        # Mock response with tool calls
-        mock_response = Mock()
-        mock_response.content = 'Code with changes'
-        mock_response.tool_calls = [
-            {'name': 'write_file', 'args': {'file_path': '/test.py', 'content': 'code'}}
-        ]
-
-        # Mock the chain
-        mock_chain = Mock()
-        mock_chain.invoke = Mock(return_value=mock_response)
-
-        mock_model = Mock()
-        mock_model.model_name = 'gpt-4o'
-        mock_model.bind_tools = Mock(return_value=mock_model)
-
-        mock_prompt = Mock()
-        mock_prompt.__or__ = Mock(return_value=mock_chain)
-        mock_prompt_template.from_messages = Mock(return_value=mock_prompt)
-
-        mock_router = Mock()
-        mock_router.get_model = Mock(return_value=mock_model)
-        mock_model_router.return_value = mock_router
-
-        base_workflow_state['requires_approval'] = True
-
-        # Act
-        result = coder_node(base_workflow_state)
-
-        # Assert
-        assert result.goto == 'approval'
-
-
-@pytest.mark.integration
+@pytest.mark.unit
 class TestWorkflowParallelExecution:
     """Test parallel task execution."""
 
-    def test_workflow_splits_parallel_subtasks(self, base_workflow_state):
+    def test_workflow_splits_parallel_subtasks(self, workflow_state):
         """Test that workflow can split into parallel subtasks."""
         # Simulate subtask decomposition
-        state = base_workflow_state.copy()
+        state = workflow_state
         state['subtasks'] = [
             {'id': '1', 'description': 'Write function', 'agent': 'coder'},
             {'id': '2', 'description': 'Write tests', 'agent': 'coder'},
@@ -296,50 +323,28 @@ class TestWorkflowParallelExecution:
         assert len(state['subtasks']) == 3
         assert state['parallel_execution'] is True
 
-    def test_workflow_aggregates_results(self, base_workflow_state):
+    def test_workflow_aggregates_results(self, workflow_state):
         """Test result aggregation from parallel execution."""
         # Simulate completed subtasks
-        from app.agents.state import AgentOutput
-
-        state = base_workflow_state.copy()
+        state = workflow_state
         state['subtasks'] = [
             {'id': '1', 'description': 'Task 1'},
             {'id': '2', 'description': 'Task 2'},
         ]
         state['completed_subtasks'] = ['1', '2']
-        state['agent_outputs'] = [
-            AgentOutput(
-                agent_name='coder',
-                timestamp=datetime.now(),
-                result={'subtask_id': '1', 'summary': 'Done 1'},
-                model_used='gpt-4o',
-                tokens_used=100,
-                error=None,
-            ),
-            AgentOutput(
-                agent_name='coder',
-                timestamp=datetime.now(),
-                result={'subtask_id': '2', 'summary': 'Done 2'},
-                model_used='gpt-4o',
-                tokens_used=100,
-                error=None,
-            ),
-        ]
+        state['agent_outputs'] = list(SUBTASK_OUTPUTS)
 
         assert len(state['completed_subtasks']) == len(state['subtasks'])
         assert len(state['agent_outputs']) == 2
 
 
-@pytest.mark.integration
+@pytest.mark.unit
 class TestWorkflowPersistence:
     """Test workflow state persistence (structure tests)."""
 
-    def test_workflow_state_serializable(self, base_workflow_state):
+    def test_workflow_state_serializable(self, workflow_state):
         """Test that workflow state can be serialized."""
-        # Verify all state fields are JSON-serializable types
-        import json
-
-        state = base_workflow_state.copy()
+        state = workflow_state
 
         # Should be able to serialize basic types
         assert isinstance(state['session_id'], str)
@@ -347,13 +352,23 @@ class TestWorkflowPersistence:
         assert isinstance(state['agent_outputs'], list)
         assert isinstance(state['agent_statuses'], dict)
 
+        # Messages aren't JSON-native; dump them via their pydantic model
+        try:
+            orjson.dumps(
+                state,
+                default=lambda obj: obj.model_dump(),
+                option=orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError as e:
+            pytest.fail(f"Workflow state is not serializable: {e}")
+
     def test_workflow_checkpoint_structure(self):
         """Test checkpoint data structure."""
         # Simulate checkpoint
         checkpoint = {
             'session_id': 'test-session',
             'checkpoint_id': 'checkpoint-123',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': FIXED_TS.isoformat(),
             'state': {
                 'messages': [],
                 'agent_outputs': [],
@@ -372,61 +387,6 @@ class TestWorkflowPersistence:
 class TestWorkflowEndToEnd:
     """End-to-end workflow tests (structure)."""
 
-    @patch('app.agents.specialists.coder.ChatPromptTemplate')
-    @patch('app.agents.specialists.coder.ModelRouter')
-    @patch('app.agents.specialists.coder.get_file_tools')
-    @patch('app.agents.specialists.coder.get_git_tools')
-    def test_simple_code_generation_workflow(
-        self,
-        mock_git_tools,
-        mock_file_tools,
-        mock_model_router,
-        mock_prompt_template,
-        base_workflow_state,
-    ):
-        """Test simple code generation workflow."""
-        # Arrange
-        from app.agents.specialists.coder import coder_node
-
-        # Mock tools - return list of mock tool objects
-        file_tool = Mock(name='write_file')
-        file_tool.name = 'write_file'
-        mock_file_tools.return_value = [file_tool]
-
-        git_tool = Mock(name='commit_changes')
-        git_tool.name = 'commit_changes'
-        mock_git_tools.return_value = [git_tool]
-
-        # Mock response
-        mock_response = Mock()
-        mock_response.content = 'Code generated'
-        mock_response.tool_calls = []
-
-        # Mock the chain
-        mock_chain = Mock()
-        mock_chain.invoke = Mock(return_value=mock_response)
-
-        mock_model = Mock()
-        mock_model.model_name = 'gpt-4o'
-        mock_model.bind_tools = Mock(return_value=mock_model)
-
-        mock_prompt = Mock()
-        mock_prompt.__or__ = Mock(return_value=mock_chain)
-        mock_prompt_template.from_messages = Mock(return_value=mock_prompt)
-
-        mock_router = Mock()
-        mock_router.get_model = Mock(return_value=mock_model)
-        mock_model_router.return_value = mock_router
-
-        base_workflow_state['skip_review'] = True
-
-        # Act
-        result = coder_node(base_workflow_state)
-
-        # Assert
-        assert result.goto == 'END'
-        assert result.update['agent_statuses']['coder'] == 'completed'
-
     @patch('app.agents.specialists.researcher.ChatPromptTemplate')
     @patch('app.agents.specialists.researcher.ModelRouter')
     @patch('app.agents.specialists.researcher.get_search_tools')
@@ -435,76 +395,41 @@ class TestWorkflowEndToEnd:
         mock_search_tools,
         mock_model_router,
         mock_prompt_template,
-        base_workflow_state,
+        workflow_state,
+        prompt_chain_skeleton,
     ):
         """Test simple research workflow."""
         # Arrange
-        from app.agents.specialists.researcher import researcher_node
-
-        # Mock tools - return list of mock tool objects
-        search_tool = Mock(name='web_search')
-        search_tool.name = 'web_search'
-        mock_search_tools.return_value = [search_tool]
-
-        # Mock response
-        mock_response = Mock()
-        mock_response.content = 'Research complete'
-        mock_response.tool_calls = []
-
-        # Mock the chain
-        mock_chain = Mock()
-        mock_chain.invoke = Mock(return_value=mock_response)
-
-        mock_model = Mock()
-        mock_model.model_name = 'gemini-1.5-pro'
-        mock_model.bind_tools = Mock(return_value=mock_model)
-
-        mock_prompt = Mock()
-        mock_prompt.__or__ = Mock(return_value=mock_chain)
-        mock_prompt_template.from_messages = Mock(return_value=mock_prompt)
-
-        mock_router = Mock()
-        mock_router.get_model = Mock(return_value=mock_model)
-        mock_model_router.return_value = mock_router
+        mock_search_tools.return_value = [SimpleNamespace(name='web_search')]
+
+        response = SimpleNamespace(content='Research complete', tool_calls=[])
+        model = fake_model('gemini-1.5-pro')
+        prompt, chain = prompt_chain_skeleton
+        chain.invoke = respond_with(response)
+        mock_prompt_template.from_messages = lambda *_args: prompt
+        mock_model_router.return_value = SimpleNamespace(
+            get_model=lambda *_args, **_kwargs: model
+        )
 
-        base_workflow_state['task_type'] = 'research'
+        workflow_state['task_type'] = 'research'
 
         # Act
-        result = researcher_node(base_workflow_state)
+        result = researcher_node(workflow_state)
 
         # Assert
         assert result.goto == 'END'
         assert result.update['agent_statuses']['researcher'] == 'completed'
 
 
-@pytest.mark.integration
+@pytest.mark.unit
 class TestWorkflowMetrics:
     """Test workflow metrics tracking."""
 
-    def test_workflow_tracks_token_usage(self, base_workflow_state):
+    def test_workflow_tracks_token_usage(self, workflow_state):
         """Test that token usage is tracked."""
         # Simulate agent outputs with token counts
-        from app.agents.state import AgentOutput
-
-        state = base_workflow_state.copy()
-        state['agent_outputs'] = [
-            AgentOutput(
-                agent_name='coder',
-                timestamp=datetime.now(),
-                result={},
-                model_used='gpt-4o',
-                tokens_used=500,
-                error=None,
-            ),
-            AgentOutput(
-                agent_name='reviewer',
-                timestamp=datetime.now(),
-                result={},
-                model_used='claude-sonnet-3.5',
-                tokens_used=300,
-                error=None,
-            ),
-        ]
+        state = workflow_state
+        state['agent_outputs'] = [CODER_OUTPUT, REVIEWER_OUTPUT]
 
         total_tokens = sum(o['tokens_used'] or 0 for o in state['agent_outputs'])
         assert total_tokens == 800
@@ -512,48 +437,19 @@ class TestWorkflowMetrics:
     def test_workflow_tracks_agent_execution_times(self):
         """Test that execution times can be tracked."""
         # Simulate timing
-        from app.agents.state import AgentOutput
-
-        start_time = datetime.now()
+        start_time = FIXED_TS
         # ... workflow execution ...
-        end_time = datetime.now()
+        end_time = FIXED_TS + timedelta(seconds=1)
 
         execution_time = (end_time - start_time).total_seconds()
 
-        assert execution_time >= 0
+        assert execution_time == 1.0
 
-    def test_workflow_tracks_model_usage_per_agent(self, base_workflow_state):
+    def test_workflow_tracks_model_usage_per_agent(self, workflow_state):
         """Test tracking which models each agent used."""
         # Simulate agent outputs
-        from app.agents.state import AgentOutput
-
-        state = base_workflow_state.copy()
-        state['agent_outputs'] = [
-            AgentOutput(
-                agent_name='supervisor',
-                timestamp=datetime.now(),
-                result={},
-                model_used='claude-sonnet-4',
-                tokens_used=100,
-                error=None,
-            ),
-            AgentOutput(
-                agent_name='coder',
-                timestamp=datetime.now(),
-                result={},
-                model_used='gpt-4o',
-                tokens_used=500,
-                error=None,
-            ),
-            AgentOutput(
-                agent_name='researcher',
-                timestamp=datetime.now(),
-                result={},
-                model_used='gemini-1.5-pro',
-                tokens_used=2000,
-                error=None,
-            ),
-        ]
+        state = workflow_state
+        state['agent_outputs'] = [SUPERVISOR_OUTPUT, CODER_OUTPUT, RESEARCHER_OUTPUT]
 
         model_usage = {}
         for output in state['agent_outputs']:
@@ -3,19 +3,70 @@ Tests for Fly.io Machines client.
 """
 
 import pytest
-from unittest.mock import AsyncMock, Mock, patch
+from unittest.mock import AsyncMock, patch
 import httpx
+import orjson
 
-from app.services.compute.fly_machines import FlyMachinesClient, FlyMachinesError
+from app.services.compute.fly_machines import (
+    FlyMachineNotFoundError,
+    FlyMachinesClient,
+    FlyMachinesError,
+)
+
+
+class FakeFlyAPI:
+    """
+    Canned Fly.io Machines API served through httpx.MockTransport.
+
+    Responses are registered per (method, path under the app); each request
+    takes the next queued response, and the last one repeats. Exceptions are
+    raised from the transport, like network errors.
+    """
+
+    APP_PATH = "/v1/apps/test-app"
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+
+    def route(self, method, path, *responses):
+        """Queue responses for a request method and path, e.g. "/machines"."""
+        self.routes[(method, self.APP_PATH + path)] = list(responses)
+
+    def handler(self, request):
+        self.requests.append(request)
+        queue = self.routes[(request.method, request.url.path)]
+        result = queue.pop(0) if len(queue) > 1 else queue[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _resp(json_data=None, status_code=200, headers=None):
+    """Build a Fly.io API response with the given JSON body."""
+    return httpx.Response(
+        status_code, content=orjson.dumps(json_data), headers=headers
+    )
 
 
 @pytest.fixture
-def fly_client():
-    """Create Fly.io Machines client instance."""
-    return FlyMachinesClient(api_token="test_token", app_name="test-app")
+def fly_api():
+    """Fake Fly.io API with no routes registered."""
+    return FakeFlyAPI()
+
+
+@pytest.fixture
+async def fly_client(fly_api):
+    """Create Fly.io Machines client instance served by fly_api."""
+    client = FlyMachinesClient(
+        api_token="test_token",
+        app_name="test-app",
+        transport=httpx.MockTransport(fly_api.handler),
+    )
+    yield client
+    await client.close()
 
 
-@pytest.mark.asyncio
 async def test_client_initialization(fly_client):
     """Test client initialization."""
     assert fly_client.api_token == "test_token"
@@ -24,8 +75,7 @@ async def test_client_initialization(fly_client):
     assert fly_client._http_client is not None
 
 
-@pytest.mark.asyncio
-async def test_create_machine_success(fly_client):
+async def test_create_machine_success(fly_client, fly_api):
     """Test successful machine creation."""
     mock_response = {
         "id": "test_machine_id",
@@ -34,129 +84,75 @@ async def test_create_machine_success(fly_client):
         "region": "iad",
         "private_ip": "fdaa:0:1:a7b:1::1",
     }
+    fly_api.route("POST", "/machines", _resp(mock_response))
 
-    with patch.object(
-        fly_client._http_client, "post", new=AsyncMock()
-    ) as mock_post:
-        mock_response_obj = AsyncMock()
-        mock_response_obj.json.return_value = mock_response
-        mock_response_obj.raise_for_status = Mock()
-        mock_post.return_value = mock_response_obj
-
-        result = await fly_client.create_machine(
-            user_id="user123",
-            region="iad",
-        )
+    result = await fly_client.create_machine(
+        user_id="user123",
+        region="iad",
+    )
 
-        assert result["id"] == "test_machine_id"
-        assert result["name"] == "paraclete-vm-user123"
-        mock_post.assert_called_once()
+    assert result["id"] == "test_machine_id"
+    assert result["name"] == "paraclete-vm-user123"
+    assert len(fly_api.requests) == 1
+    assert fly_api.requests[0].headers["Authorization"] == "Bearer test_token"
 
 
-@pytest.mark.asyncio
-async def test_create_machine_failure(fly_client):
+async def test_create_machine_failure(fly_client, fly_api):
     """Test machine creation failure."""
-    with patch.object(
-        fly_client._http_client, "post", new=AsyncMock()
-    ) as mock_post:
-        mock_post.side_effect = httpx.HTTPStatusError(
-            "Error",
-            request=Mock(),
-            response=Mock(status_code=500, text="Server error"),
-        )
+    fly_api.route("POST", "/machines", httpx.Response(500, text="Server error"))
 
-        with pytest.raises(FlyMachinesError):
-            await fly_client.create_machine(user_id="user123")
+    with pytest.raises(FlyMachinesError, match="Server error"):
+        await fly_client.create_machine(user_id="user123")
 
 
-@pytest.mark.asyncio
-async def test_destroy_machine_success(fly_client):
+async def test_destroy_machine_success(fly_client, fly_api):
     """Test successful machine destruction."""
-    with patch.object(
-        fly_client._http_client, "delete", new=AsyncMock()
-    ) as mock_delete:
-        mock_response_obj = AsyncMock()
-        mock_response_obj.raise_for_status = Mock()
-        mock_delete.return_value = mock_response_obj
+    fly_api.route("DELETE", "/machines/test_machine_id", _resp({"ok": True}))
 
-        result = await fly_client.destroy_machine("test_machine_id")
+    result = await fly_client.destroy_machine("test_machine_id", force=True)
 
-        assert result["ok"] is True
-        mock_delete.assert_called_once()
+    assert result["ok"] is True
+    assert len(fly_api.requests) == 1
+    assert fly_api.requests[0].url.params["force"] == "true"
 
 
-@pytest.mark.asyncio
-async def test_get_machine_status_success(fly_client):
+async def test_get_machine_status_success(fly_client, fly_api):
     """Test getting machine status."""
     mock_response = {
         "id": "test_machine_id",
         "state": "started",
         "region": "iad",
     }
+    fly_api.route("GET", "/machines/test_machine_id", _resp(mock_response))
 
-    with patch.object(fly_client._http_client, "get", new=AsyncMock()) as mock_get:
-        mock_response_obj = AsyncMock()
-        mock_response_obj.json.return_value = mock_response
-        mock_response_obj.raise_for_status = Mock()
-        mock_get.return_value = mock_response_obj
-
-        result = await fly_client.get_machine_status("test_machine_id")
+    result = await fly_client.get_machine_status("test_machine_id")
 
-        assert result["id"] == "test_machine_id"
-        assert result["state"] == "started"
+    assert result["id"] == "test_machine_id"
+    assert result["state"] == "started"
 
 
-@pytest.mark.asyncio
-async def test_get_machine_status_not_found(fly_client):
+async def test_get_machine_status_not_found(fly_client, fly_api):
     """Test getting status of non-existent machine."""
-    with patch.object(fly_client._http_client, "get", new=AsyncMock()) as mock_get:
-        mock_get.side_effect = httpx.HTTPStatusError(
-            "Error",
-            request=Mock(),
-            response=Mock(status_code=404, text="Not found"),
-        )
-
-        with pytest.raises(FlyMachinesError, match="not found"):
-            await fly_client.get_machine_status("nonexistent_id")
-
-
-@pytest.mark.asyncio
-async def test_start_machine(fly_client):
-    """Test starting a machine."""
-    mock_response = {"id": "test_machine_id", "state": "started"}
+    fly_api.route("GET", "/machines/nonexistent_id", httpx.Response(404, text="Not found"))
 
-    with patch.object(
-        fly_client._http_client, "post", new=AsyncMock()
-    ) as mock_post:
-        mock_response_obj = AsyncMock()
-        mock_response_obj.json.return_value = mock_response
-        mock_response_obj.raise_for_status = Mock()
-        mock_post.return_value = mock_response_obj
-
-        result = await fly_client.start_machine("test_machine_id")
+    with pytest.raises(FlyMachineNotFoundError, match="Machine nonexistent_id not found"):
+        await fly_client.get_machine_status("nonexistent_id")
 
-        assert result["state"] == "started"
 
+@pytest.mark.parametrize(
+    "method,action,state",
+    [("start_machine", "start", "started"), ("stop_machine", "stop", "stopped")],
+)
+async def test_machine_state_transition(fly_client, fly_api, method, action, state):
+    """Test starting and stopping a machine."""
+    mock_response = {"id": "test_machine_id", "state": state}
+    fly_api.route("POST", f"/machines/test_machine_id/{action}", _resp(mock_response))
 
-@pytest.mark.asyncio
-async def test_stop_machine(fly_client):
-    """Test stopping a machine."""
-    mock_response = {"id": "test_machine_id", "state": "stopped"}
-
-    with patch.object(
-        fly_client._http_client, "post", new=AsyncMock()
-    ) as mock_post:
-        mock_response_obj = AsyncMock()
-        mock_response_obj.json.return_value = mock_response
-        mock_response_obj.raise_for_status = Mock()
-        mock_post.return_value = mock_response_obj
+    result = await getattr(fly_client, method)("test_machine_id")
 
-        result = await fly_client.stop_machine("test_machine_id")
+    assert result["state"] == state
 
-        assert result["state"] == "stopped"
 
-
-@pytest.mark.asyncio
 async def test_get_ssh_credentials(fly_client):
     """Test getting SSH credentials."""
     mock_machine = {
@@ -177,21 +173,121 @@ async def test_get_ssh_credentials(fly_client):
         assert creds["region"] == "iad"
 
 
-@pytest.mark.asyncio
-async def test_list_machines(fly_client):
+async def test_list_machines(fly_client, fly_api):
     """Test listing all machines."""
     mock_response = [
         {"id": "machine1", "name": "vm1"},
         {"id": "machine2", "name": "vm2"},
     ]
+    fly_api.route("GET", "/machines", _resp(mock_response))
+
+    result = await fly_client.list_machines()
+
+    assert len(result) == 2
+    assert result[0]["id"] == "machine1"
+
+
+async def test_update_machine_metadata_uses_cached_config(fly_client, fly_api):
+    """Test metadata update skips the status GET when config is cached."""
+    fly_client._config_cache.set(
+        "test_machine_id", {"image": "test-image", "metadata": {"a": "1"}}
+    )
+    fly_api.route("POST", "/machines/test_machine_id", _resp({"id": "test_machine_id"}))
+
+    await fly_client.update_machine_metadata("test_machine_id", {"b": "2"})
+
+    assert [r.method for r in fly_api.requests] == ["POST"]
+    sent_config = orjson.loads(fly_api.requests[0].content)["config"]
+    assert sent_config["metadata"] == {"a": "1", "b": "2"}
+    assert sent_config["image"] == "test-image"
+
+
+async def test_update_machine_metadata_fetches_on_cache_miss(fly_client, fly_api):
+    """Test metadata update falls back to a status GET on cache miss."""
+    fly_api.route(
+        "GET", "/machines/test_machine_id", _resp({"id": "test_machine_id", "config": {}})
+    )
+    fly_api.route("POST", "/machines/test_machine_id", _resp({"id": "test_machine_id"}))
+
+    await fly_client.update_machine_metadata("test_machine_id", {"b": "2"})
+
+    assert [r.method for r in fly_api.requests] == ["GET", "POST"]
+    sent_config = orjson.loads(fly_api.requests[1].content)["config"]
+    assert sent_config["metadata"] == {"b": "2"}
+
+
+async def test_get_machine_status_conditional_get(fly_client, fly_api):
+    """Test that a 304 response returns the cached status body."""
+    fly_api.route(
+        "GET",
+        "/machines/test_machine_id",
+        _resp({"id": "test_machine_id", "state": "started"}, headers={"etag": '"v1"'}),
+        httpx.Response(304),
+    )
+
+    await fly_client.get_machine_status("test_machine_id")
+    result = await fly_client.get_machine_status("test_machine_id")
+
+    assert result["state"] == "started"
+    assert fly_api.requests[-1].headers["If-None-Match"] == '"v1"'
+
+
+async def test_get_ssh_credentials_cached_until_restart(fly_client, fly_api):
+    """Test SSH credentials are cached and invalidated when the machine restarts."""
+    mock_machine = {"id": "test_machine_id", "name": "test-vm", "region": "iad"}
+    fly_api.route("POST", "/machines/test_machine_id/start", _resp({"ok": True}))
+
+    with patch.object(
+        fly_client, "get_machine_status", new=AsyncMock(return_value=mock_machine)
+    ) as mock_status:
+        await fly_client.get_ssh_credentials("test_machine_id")
+        await fly_client.get_ssh_credentials("test_machine_id")
+        assert mock_status.call_count == 1
+
+        await fly_client.start_machine("test_machine_id")
+        await fly_client.get_ssh_credentials("test_machine_id")
+        assert mock_status.call_count == 2
+
+
+async def test_create_machine_with_metadata(fly_client, fly_api):
+    """Test metadata is folded into the create payload."""
+    fly_api.route("POST", "/machines", _resp({"id": "test_machine_id"}))
+
+    await fly_client.create_machine(
+        user_id="user123", metadata={"session_id": "abc"}
+    )
+
+    assert len(fly_api.requests) == 1
+    payload = orjson.loads(fly_api.requests[0].content)
+    assert payload["config"]["metadata"] == {"session_id": "abc"}
+
+
+async def test_circuit_opens_after_consecutive_failures(fly_client, fly_api):
+    """Test repeated server failures make later calls fail fast."""
+    fly_api.route("GET", "/machines", httpx.ConnectError("connection refused"))
+
+    for _ in range(fly_client.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(FlyMachinesError):
+            await fly_client.list_machines()
+
+    with pytest.raises(FlyMachinesError, match="unavailable"):
+        await fly_client.list_machines()
+
+    assert len(fly_api.requests) == fly_client.CIRCUIT_FAILURE_THRESHOLD
+
 
-    with patch.object(fly_client._http_client, "get", new=AsyncMock()) as mock_get:
-        mock_response_obj = AsyncMock()
-        mock_response_obj.json.return_value = mock_response
-        mock_response_obj.raise_for_status = Mock()
-        mock_get.return_value = mock_response_obj
+async def test_client_errors_do_not_open_circuit(fly_client, fly_api):
+    """Test 4xx responses and malformed bodies don't count toward the breaker."""
+    fly_api.route(
+        "GET",
+        "/machines",
+        httpx.Response(400, text="Bad request"),
+        httpx.Response(200, content=b"not json"),
+    )
 
-        result = await fly_client.list_machines()
+    for _ in range(fly_client.CIRCUIT_FAILURE_THRESHOLD + 1):
+        with pytest.raises(FlyMachinesError) as exc_info:
+            await fly_client.list_machines()
+        assert "unavailable" not in str(exc_info.value)
 
-        assert len(result) == 2
-        assert result[0]["id"] == "machine1"
+    assert fly_client._consecutive_failures == 0
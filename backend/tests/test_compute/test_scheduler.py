@@ -0,0 +1,27 @@
+"""
+Tests for the VM maintenance scheduler.
+"""
+
+import asyncio
+
+from app.services.compute.scheduler import VMScheduler
+
+
+async def test_stop_cancels_hung_check(monkeypatch):
+    """Test stop doesn't leave a shielded, hung idle check running."""
+    scheduler = VMScheduler(shutdown_timeout=0.01)
+    check_started = asyncio.Event()
+
+    async def hung_check():
+        check_started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(scheduler, "_check_idle_vms", hung_check)
+
+    await scheduler.start()
+    await check_started.wait()
+    check_task = scheduler._check_task
+    await scheduler.stop()
+
+    assert check_task.cancelled()
+    assert scheduler._check_task is None
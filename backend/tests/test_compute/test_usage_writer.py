@@ -0,0 +1,67 @@
+"""
+Tests for the compute usage write-behind queue.
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, call
+from uuid import uuid4
+
+from app.services.compute import usage_writer as usage_writer_module
+from app.services.compute.usage_writer import USAGE_WRITE_ATTEMPTS, UsageWriter
+
+END_TIME = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    """Usage writer whose database writes are mocked and backoff skipped."""
+    monkeypatch.setattr(usage_writer_module.asyncio, "sleep", AsyncMock())
+    writer = UsageWriter(batch_window=0.01)
+    writer._write_batch = AsyncMock()
+    return writer
+
+
+async def test_failed_batch_is_retried(writer):
+    """Test a transient failure is retried with the same batch."""
+    writer._write_batch.side_effect = [RuntimeError("db blip"), None]
+    values = {"vm_id": uuid4()}
+
+    await writer.record_start(values)
+
+    assert writer._write_batch.await_args_list == [
+        call([("start", values)]),
+        call([("start", values)]),
+    ]
+
+
+async def test_falls_back_to_single_event_writes(writer):
+    """Test a batch that keeps failing is written event by event."""
+    vm_ids = [uuid4(), uuid4()]
+    writer._write_batch.side_effect = [RuntimeError("db down")] * USAGE_WRITE_ATTEMPTS + [
+        None,
+        RuntimeError("bad event"),
+    ]
+
+    await writer.record_ends(vm_ids, END_TIME)
+
+    single_writes = writer._write_batch.await_args_list[USAGE_WRITE_ATTEMPTS:]
+    assert single_writes == [
+        call([("end", vm_ids[0], END_TIME)]),
+        call([("end", vm_ids[1], END_TIME)]),
+    ]
+
+
+async def test_queued_start_is_written_before_end(writer):
+    """Test a queued start and end for one VM land in order in one batch."""
+    vm_id = uuid4()
+    values = {"vm_id": vm_id}
+
+    await writer.start()
+    await writer.record_start(values)
+    await writer.record_ends([vm_id], END_TIME)
+    await writer.stop()
+
+    writer._write_batch.assert_awaited_once_with(
+        [("start", values), ("end", vm_id, END_TIME)]
+    )
@@ -0,0 +1,90 @@
+"""
+Tests for VM manager lifecycle handling.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+from app.db.models import UserVM, VMStatus
+from app.services.compute import vm_manager as vm_manager_module
+from app.services.compute.fly_machines import FlyMachineNotFoundError
+from app.services.compute.vm_manager import VMManager
+
+
+@pytest.fixture
+def fly_client():
+    """Mock Fly.io client."""
+    return Mock(create_machine=AsyncMock(), destroy_machine=AsyncMock())
+
+
+@pytest.fixture
+def vm_manager(fly_client):
+    """VM manager over a mock database session and Fly.io client."""
+    return VMManager(db=Mock(commit=AsyncMock()), fly_client=fly_client)
+
+
+@pytest.mark.parametrize(
+    "state,expected_status",
+    [
+        ("created", VMStatus.RUNNING),
+        ("started", VMStatus.RUNNING),
+        ("replacing", VMStatus.PROVISIONING),
+    ],
+)
+async def test_create_vm_record_status(vm_manager, fly_client, state, expected_status):
+    """Test a machine reported as created counts as running, so idle shutdown applies."""
+    fly_client.create_machine.return_value = {"id": "machine_1", "state": state}
+
+    vm = await vm_manager._create_vm_record(uuid4(), None, None, None, None)
+
+    assert vm.status == expected_status
+    assert (vm.started_at is not None) == (expected_status == VMStatus.RUNNING)
+
+
+async def test_activity_ping_during_flush_is_written(vm_manager, monkeypatch):
+    """Test a ping that arrives while a flush is writing gets its own flush."""
+    monkeypatch.setattr(vm_manager_module, "ACTIVITY_DEBOUNCE_SECONDS", 0)
+    vm_id = uuid4()
+    written = []
+    first_write_started = asyncio.Event()
+    release_first_write = asyncio.Event()
+
+    async def fake_write(flushed_vm_id):
+        written.append(vm_manager_module._pending_activity.pop(flushed_vm_id))
+        if len(written) == 1:
+            first_write_started.set()
+            await release_first_write.wait()
+
+    monkeypatch.setattr(vm_manager_module, "_write_vm_activity", fake_write)
+
+    await vm_manager.update_vm_activity(vm_id)
+    await first_write_started.wait()
+
+    await vm_manager.update_vm_activity(vm_id)
+    second_ping = vm_manager_module._pending_activity[vm_id]
+    release_first_write.set()
+
+    second_flush = vm_manager_module._activity_flushes[vm_id]
+    await second_flush
+
+    assert written[-1] == second_ping
+    assert len(written) == 2
+    assert vm_id not in vm_manager_module._activity_flushes
+
+
+async def test_terminate_already_destroyed_machine(vm_manager, fly_client, monkeypatch):
+    """Test a machine destroyed by a racing shutdown path isn't marked as errored."""
+    vm = UserVM(id=uuid4(), machine_id="machine_1", status=VMStatus.RUNNING)
+    vm_manager.db.get = AsyncMock(return_value=vm)
+    # The racing path already marked the row terminated
+    vm_manager.db.execute = AsyncMock(return_value=Mock(scalar=Mock(return_value=None)))
+    fly_client.destroy_machine.side_effect = FlyMachineNotFoundError("gone")
+    end_usage = AsyncMock()
+    monkeypatch.setattr(vm_manager, "_end_usage_tracking", end_usage)
+
+    assert await vm_manager.terminate_vm(vm.id, force=True) is True
+
+    assert vm.status == VMStatus.RUNNING
+    end_usage.assert_not_awaited()
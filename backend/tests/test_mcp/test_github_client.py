@@ -3,10 +3,10 @@ Tests for GitHub MCP client.
 """
 
 import pytest
-from unittest.mock import AsyncMock, Mock, patch
+from unittest.mock import AsyncMock, Mock
 import httpx
 
-from app.mcp.clients.github import GitHubMCPClient
+from app.mcp.clients.github import BUILTIN_TOOLS, GitHubMCPClient
 from app.mcp.base import (
     MCPConnectionError,
     MCPAuthenticationError,
@@ -20,7 +20,14 @@ def github_client():
     return GitHubMCPClient(timeout=5, max_retries=2)
 
 
-@pytest.mark.asyncio
+@pytest.fixture
+def connected_github_client(github_client):
+    """GitHub client marked connected, with a mocked HTTP client."""
+    github_client._connected = True
+    github_client._http_client = AsyncMock()
+    return github_client
+
+
 async def test_github_client_initialization(github_client):
     """Test GitHub client initialization."""
     assert github_client.server_type == "github"
@@ -29,48 +36,48 @@ async def test_github_client_initialization(github_client):
     assert not github_client.is_connected
 
 
-@pytest.mark.asyncio
-async def test_github_connect_success(github_client):
+async def test_github_connect_success():
     """Test successful connection to GitHub MCP."""
-    with patch.object(github_client, "_http_client", new=AsyncMock()) as mock_client:
-        mock_response = AsyncMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = []
-        mock_client.get.return_value = mock_response
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[])
 
-        # Set server_url for remote MCP mode
-        github_client.server_url = "http://test-mcp-server"
+    # Remote MCP mode, served by a mock transport
+    github_client = GitHubMCPClient(
+        server_url="http://test-mcp-server",
+        transport=httpx.MockTransport(handler),
+    )
 
-        await github_client.connect(auth_token="test_token")
+    await github_client.connect(auth_token="test_token")
 
-        assert github_client.is_connected
-        assert github_client._tools_cache is not None
+    assert github_client.is_connected
+    assert github_client._tools_cache is not None
+    assert requests[0].url == "http://test-mcp-server/tools"
+    assert requests[0].headers["Authorization"] == "Bearer test_token"
+
+    await github_client.aclose()
 
 
-@pytest.mark.asyncio
 async def test_github_connect_no_token(github_client):
     """Test connection without auth token fails."""
     with pytest.raises(MCPAuthenticationError):
         await github_client.connect(auth_token=None)
 
 
-@pytest.mark.asyncio
-async def test_list_tools(github_client):
+async def test_list_tools(connected_github_client):
     """Test listing GitHub tools."""
-    # Connect first
-    github_client._connected = True
-    github_client._http_client = AsyncMock()
+    tools = await connected_github_client.list_tools()
 
-    tools = await github_client.list_tools()
-
-    # Should return built-in tools
+    # Should return the shared built-in tools
+    assert tools is BUILTIN_TOOLS
     assert len(tools) > 0
     assert any(t["name"] == "create_repository" for t in tools)
     assert any(t["name"] == "create_issue" for t in tools)
     assert any(t["name"] == "create_pull_request" for t in tools)
 
 
-@pytest.mark.asyncio
 async def test_call_tool_not_connected(github_client):
     """Test calling tool when not connected fails."""
     with pytest.raises(MCPConnectionError):
@@ -80,34 +87,55 @@ async def test_call_tool_not_connected(github_client):
         )
 
 
-@pytest.mark.asyncio
-async def test_validate_tool_arguments(github_client):
+async def test_validate_tool_arguments(connected_github_client):
     """Test tool argument validation."""
-    github_client._connected = True
-    github_client._http_client = AsyncMock()
-
     # Valid arguments
-    is_valid = await github_client.validate_tool_arguments(
+    is_valid = await connected_github_client.validate_tool_arguments(
         tool_name="create_repository",
         arguments={"name": "test-repo"},
     )
     assert is_valid
 
     # Missing required argument
-    is_valid = await github_client.validate_tool_arguments(
+    is_valid = await connected_github_client.validate_tool_arguments(
         tool_name="create_repository",
         arguments={},
     )
     assert not is_valid
 
 
-@pytest.mark.asyncio
-async def test_disconnect(github_client):
-    """Test disconnecting from GitHub MCP."""
-    github_client._connected = True
-    github_client._http_client = AsyncMock()
+async def test_validate_unknown_tool(connected_github_client):
+    """Test validating arguments for an unknown tool fails."""
+    with pytest.raises(MCPToolNotFoundError):
+        await connected_github_client.validate_tool_arguments(
+            tool_name="delete_everything",
+            arguments={},
+        )
+
+
+async def test_disconnect(connected_github_client):
+    """Test disconnecting from GitHub MCP keeps the HTTP client."""
+    http_client = connected_github_client._http_client
+
+    await connected_github_client.disconnect()
+
+    assert not connected_github_client.is_connected
+    assert connected_github_client._tools_cache is None
+    assert connected_github_client._http_client is http_client
+
+
+async def test_reconnect_reuses_http_client(github_client):
+    """Test reconnecting reuses the pooled HTTP client with the new token."""
+    await github_client.connect(auth_token="first_token")
+    http_client = github_client._http_client
 
     await github_client.disconnect()
+    await github_client.connect(auth_token="second_token")
+
+    assert github_client._http_client is http_client
+    assert http_client.headers["Authorization"] == "Bearer second_token"
+
+    await github_client.aclose()
 
     assert not github_client.is_connected
     assert github_client._http_client is None
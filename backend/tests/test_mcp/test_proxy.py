@@ -17,7 +17,14 @@ async def proxy_server():
     return proxy
 
 
-@pytest.mark.asyncio
+@pytest.fixture
+def mock_sleep(monkeypatch):
+    """Skip retry backoff delays; returns the mock standing in for asyncio.sleep."""
+    sleep = AsyncMock(return_value=None)
+    monkeypatch.setattr("app.mcp.proxy.asyncio.sleep", sleep)
+    return sleep
+
+
 async def test_proxy_initialization(proxy_server):
     """Test proxy server initialization."""
     assert proxy_server._initialized
@@ -26,7 +33,6 @@ async def test_proxy_initialization(proxy_server):
     assert "slack" in proxy_server._clients
 
 
-@pytest.mark.asyncio
 async def test_list_servers(proxy_server):
     """Test listing available MCP servers."""
     servers = await proxy_server.list_servers()
@@ -38,7 +44,6 @@ async def test_list_servers(proxy_server):
     assert "slack" in server_types
 
 
-@pytest.mark.asyncio
 async def test_health_check(proxy_server):
     """Test health check endpoint."""
     health = await proxy_server.health_check()
@@ -49,19 +54,14 @@ async def test_health_check(proxy_server):
     assert len(health["clients"]) == 3
 
 
-@pytest.mark.asyncio
-async def test_get_client_invalid_server():
+async def test_get_client_invalid_server(proxy_server):
     """Test getting client with invalid server type."""
-    proxy = MCPProxyServer()
-    await proxy.initialize()
-
     with pytest.raises(ValueError):
-        async with proxy.get_client("invalid_server", "test_token"):
+        async with proxy_server.get_client("invalid_server", "test_token"):
             pass
 
 
-@pytest.mark.asyncio
-async def test_execute_tool_retry_logic(proxy_server):
+async def test_execute_tool_retry_logic(proxy_server, mock_sleep):
     """Test that execute_tool retries on failure."""
     with patch.object(
         proxy_server._clients["github"], "call_tool"
@@ -83,10 +83,10 @@ async def test_execute_tool_retry_logic(proxy_server):
 
         assert result == {"result": "success"}
         assert mock_call_tool.call_count == 3
+        assert mock_sleep.await_count == 2
 
 
-@pytest.mark.asyncio
-async def test_execute_tool_no_retry_on_tool_not_found(proxy_server):
+async def test_execute_tool_no_retry_on_tool_not_found(proxy_server, mock_sleep):
     """Test that execute_tool doesn't retry if tool not found."""
     with patch.object(
         proxy_server._clients["github"], "call_tool"
@@ -103,19 +103,144 @@ async def test_execute_tool_no_retry_on_tool_not_found(proxy_server):
 
         # Should only call once (no retries for tool not found)
         assert mock_call_tool.call_count == 1
+        mock_sleep.assert_not_awaited()
 
 
-@pytest.mark.asyncio
 async def test_shutdown(proxy_server):
     """Test proxy server shutdown."""
     # Mock connected clients
     for client in proxy_server._clients.values():
         client._connected = True
-        client.disconnect = AsyncMock()
+        client.aclose = AsyncMock()
 
     await proxy_server.shutdown()
 
-    # Verify all clients were disconnected
+    # Verify all clients were closed
     for client in proxy_server._clients.values():
-        if client.disconnect.called:
-            client.disconnect.assert_called_once()
+        client.aclose.assert_called_once()
+
+
+async def test_list_tools_cached_per_token(proxy_server):
+    """Test that list_tools results are cached and can be invalidated."""
+    client = proxy_server._clients["github"]
+    client._connected = True
+
+    with patch.object(client, "list_tools", new=AsyncMock()) as mock_list_tools:
+        mock_list_tools.return_value = [{"name": "create_issue"}]
+
+        first = await proxy_server.list_tools("github", "test_token")
+        second = await proxy_server.list_tools("github", "test_token")
+
+        assert first == second == [{"name": "create_issue"}]
+        assert mock_list_tools.call_count == 1
+
+        proxy_server.invalidate_tools_cache("github", "test_token")
+        await proxy_server.list_tools("github", "test_token")
+
+        assert mock_list_tools.call_count == 2
+
+
+async def test_invalidate_tools_cache_by_server(proxy_server):
+    """Test that invalidating a server drops its entries and fetch locks only."""
+    for client in proxy_server._clients.values():
+        client._connected = True
+
+    with patch.object(
+        proxy_server._clients["github"], "list_tools", new=AsyncMock(return_value=[])
+    ), patch.object(
+        proxy_server._clients["slack"], "list_tools", new=AsyncMock(return_value=[])
+    ):
+        await proxy_server.list_tools("github", "token_a")
+        await proxy_server.list_tools("github", "token_b")
+        await proxy_server.list_tools("slack", "token_a")
+
+    proxy_server.invalidate_tools_cache("github")
+
+    assert [key[0] for key in proxy_server._tools_cache.keys()] == ["slack"]
+    assert [key[0] for key in proxy_server._tools_cache_locks.keys()] == ["slack"]
+
+
+async def test_execute_tool_no_sleep_after_final_attempt(proxy_server, mock_sleep):
+    """Test that execute_tool raises without backing off after the last attempt."""
+    with patch.object(
+        proxy_server._clients["github"], "call_tool"
+    ) as mock_call_tool:
+        mock_call_tool.side_effect = MCPError("Persistent error")
+
+        with pytest.raises(MCPError):
+            await proxy_server.execute_tool(
+                server_type="github",
+                tool_name="test_tool",
+                arguments={},
+                auth_token="test_token",
+            )
+
+        assert mock_call_tool.call_count == 4
+        assert mock_sleep.await_count == 3
+
+
+async def test_execute_tool_keeps_connection_on_transient_error(proxy_server, mock_sleep):
+    """Test that transient tool errors don't force a reconnect between attempts."""
+    client = proxy_server._clients["github"]
+
+    with patch.object(client, "call_tool") as mock_call_tool, patch.object(
+        client, "connect", wraps=client.connect
+    ) as mock_connect:
+        mock_call_tool.side_effect = [MCPError("Temporary error"), {"result": "ok"}]
+
+        result = await proxy_server.execute_tool(
+            server_type="github",
+            tool_name="test_tool",
+            arguments={},
+            auth_token="test_token",
+        )
+
+        assert result == {"result": "ok"}
+        assert mock_connect.call_count == 1
+
+
+async def test_list_servers_reports_per_client_errors(proxy_server):
+    """Test that one failing client doesn't hide results from the others."""
+    github = proxy_server._clients["github"]
+    figma = proxy_server._clients["figma"]
+    github._connected = True
+    figma._connected = True
+
+    with patch.object(
+        github, "list_tools", new=AsyncMock(return_value=[{"name": "a"}])
+    ), patch.object(
+        figma, "list_tools", new=AsyncMock(side_effect=MCPError("boom"))
+    ):
+        servers = {s["server_type"]: s for s in await proxy_server.list_servers()}
+
+    assert servers["github"]["tools_count"] == 1
+    assert servers["figma"]["status"] == "error"
+    assert servers["slack"]["status"] == "available"
+
+
+async def test_execute_tool_caches_read_only_tools(proxy_server):
+    """Test that read-only tool results are reused and mutating tools are not."""
+    with patch.object(
+        proxy_server._clients["github"], "call_tool"
+    ) as mock_call_tool:
+        mock_call_tool.return_value = {"content": "file"}
+        arguments = {"repo": "owner/repo", "path": "README.md"}
+
+        for _ in range(2):
+            result = await proxy_server.execute_tool(
+                server_type="github",
+                tool_name="get_file_contents",
+                arguments=arguments,
+                auth_token="test_token",
+            )
+        assert result == {"content": "file"}
+        assert mock_call_tool.call_count == 1
+
+        for _ in range(2):
+            await proxy_server.execute_tool(
+                server_type="github",
+                tool_name="create_issue",
+                arguments={"repo": "owner/repo", "title": "Bug"},
+                auth_token="test_token",
+            )
+        assert mock_call_tool.call_count == 3
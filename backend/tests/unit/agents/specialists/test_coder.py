@@ -4,8 +4,10 @@ Test suite for the coder specialist agent.
 Tests code generation, debugging, and refactoring workflows.
 """
 
+from functools import lru_cache
+
 import pytest
-from unittest.mock import Mock, patch, MagicMock, AsyncMock
+from unittest.mock import DEFAULT, Mock, patch, MagicMock, AsyncMock
 from datetime import datetime
 
 from langchain_core.messages import HumanMessage, AIMessage
@@ -22,63 +24,110 @@ from app.agents.specialists.coder import (
 from app.agents.state import AgentState, AgentOutput, GitChange
 
 
+READ_FILE_RESULT = {'success': True, 'content': 'file content'}
+WRITE_FILE_RESULT = {'success': True, 'path': '/test/file.py'}
+CLONE_REPOSITORY_RESULT = {'success': True, 'workspace': '/workspace'}
+COMMIT_CHANGES_RESULT = {'success': True, 'commit_sha': 'abc123'}
+
+_BASE_MESSAGE = HumanMessage(content='Write a function to sort array')
+
+_BASE_STATE_TEMPLATE = {
+    'session_id': 'test-session-123',
+    'task_description': 'Write a function to sort array',
+    'task_type': 'code_generation',
+    'repo_url': 'https://github.com/test/repo',
+    'branch_name': 'main',
+    'vm_workspace_path': '/tmp/workspace',
+    'github_token': 'test-token',
+}
+
+WRITE_FILE_CALL = {'name': 'write_file', 'args': {'file_path': '/test.py', 'content': 'code'}}
+
+
+def _mock_tool(name, result):
+    """Build a mock tool; ``name`` is set after construction since Mock reserves it."""
+    tool = Mock(invoke=Mock(return_value=result))
+    tool.configure_mock(name=name)
+    return tool
+
+
+@lru_cache(maxsize=None)
+def _plain_response(content):
+    return Mock(content=content, tool_calls=[])
+
+
+def _make_response(content, tool_calls=()):
+    """Build a model response; responses without tool calls are shared."""
+    if not tool_calls:
+        return _plain_response(content)
+    return Mock(content=content, tool_calls=list(tool_calls))
+
+
+@pytest.fixture(scope='module', autouse=True)
+def coder_deps():
+    """
+    Patch the coder's model router and tool factories once for the module.
+
+    Yields the patched mocks keyed by attribute name; they are reset between
+    tests by reset_coder_deps.
+    """
+    patcher = patch.multiple(
+        'app.agents.specialists.coder',
+        ModelRouter=DEFAULT,
+        get_file_tools=DEFAULT,
+        get_git_tools=DEFAULT,
+    )
+    mocks = patcher.start()
+
+    mock_model = Mock()
+    mock_model.model_name = 'gpt-4o'
+    mock_model.bind_tools = Mock(return_value=mock_model)
+    mocks['ModelRouter'].return_value.get_model = Mock(return_value=mock_model)
+
+    mocks['get_file_tools'].return_value = [
+        _mock_tool('read_file', READ_FILE_RESULT),
+        _mock_tool('write_file', WRITE_FILE_RESULT),
+    ]
+    mocks['get_git_tools'].return_value = [
+        _mock_tool('clone_repository', CLONE_REPOSITORY_RESULT),
+        _mock_tool('commit_changes', COMMIT_CHANGES_RESULT),
+    ]
+
+    yield mocks
+    patcher.stop()
+
+
+@pytest.fixture(autouse=True)
+def reset_coder_deps(coder_deps):
+    """Clear recorded calls and side effects left by the previous test."""
+    for mock in coder_deps.values():
+        mock.reset_mock(side_effect=True)
+
+
 @pytest.fixture
-def mock_model_router():
+def mock_model_router(coder_deps):
     """Mock ModelRouter for testing."""
-    with patch('app.agents.specialists.coder.ModelRouter') as mock_router:
-        mock_instance = Mock()
-        mock_model = Mock()
-        mock_model.model_name = 'gpt-4o'
-        mock_model.bind_tools = Mock(return_value=mock_model)
-        mock_instance.get_model = Mock(return_value=mock_model)
-        mock_router.return_value = mock_instance
-        yield mock_router
+    return coder_deps['ModelRouter']
 
 
 @pytest.fixture
-def mock_file_tools():
+def mock_file_tools(coder_deps):
     """Mock file operation tools."""
-    with patch('app.agents.specialists.coder.get_file_tools') as mock:
-        tool1 = Mock(name='read_file')
-        tool1.name = 'read_file'
-        tool1.invoke = Mock(return_value={'success': True, 'content': 'file content'})
-
-        tool2 = Mock(name='write_file')
-        tool2.name = 'write_file'
-        tool2.invoke = Mock(return_value={'success': True, 'path': '/test/file.py'})
-
-        mock.return_value = [tool1, tool2]
-        yield mock
+    return coder_deps['get_file_tools']
 
 
 @pytest.fixture
-def mock_git_tools():
+def mock_git_tools(coder_deps):
     """Mock git operation tools."""
-    with patch('app.agents.specialists.coder.get_git_tools') as mock:
-        tool1 = Mock(name='clone_repository')
-        tool1.name = 'clone_repository'
-        tool1.invoke = Mock(return_value={'success': True, 'workspace': '/workspace'})
-
-        tool2 = Mock(name='commit_changes')
-        tool2.name = 'commit_changes'
-        tool2.invoke = Mock(return_value={'success': True, 'commit_sha': 'abc123'})
-
-        mock.return_value = [tool1, tool2]
-        yield mock
+    return coder_deps['get_git_tools']
 
 
 @pytest.fixture
 def base_state():
-    """Base agent state for testing."""
+    """Base agent state for testing, with fresh mutable containers."""
     return {
-        'session_id': 'test-session-123',
-        'messages': [HumanMessage(content='Write a function to sort array')],
-        'task_description': 'Write a function to sort array',
-        'task_type': 'code_generation',
-        'repo_url': 'https://github.com/test/repo',
-        'branch_name': 'main',
-        'vm_workspace_path': '/tmp/workspace',
-        'github_token': 'test-token',
+        **_BASE_STATE_TEMPLATE,
+        'messages': [_BASE_MESSAGE],
         'agent_outputs': [],
         'pending_changes': [],
         'agent_statuses': {},
@@ -92,10 +141,7 @@ class TestCoderNode:
         """Test basic coder agent execution."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Generated code implementation'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response('Generated code implementation'))
 
         # Act
         result = coder_node(base_state)
@@ -112,10 +158,7 @@ class TestCoderNode:
         """Test that coder agent uses GPT-4o model."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Code'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response('Code'))
 
         # Act
         coder_node(base_state)
@@ -131,10 +174,7 @@ class TestCoderNode:
         """Test that coder agent binds both file and git tools."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Code'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response('Code'))
 
         # Act
         coder_node(base_state)
@@ -148,18 +188,18 @@ class TestCoderNode:
         """Test coder agent execution with tool calls."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Writing file...'
-        mock_response.tool_calls = [
-            {
-                'name': 'write_file',
-                'args': {
-                    'file_path': '/workspace/test.py',
-                    'content': 'def sort_array(arr):\n    return sorted(arr)\n'
+        mock_model.invoke = Mock(return_value=_make_response(
+            'Writing file...',
+            [
+                {
+                    'name': 'write_file',
+                    'args': {
+                        'file_path': '/workspace/test.py',
+                        'content': 'def sort_array(arr):\n    return sorted(arr)\n'
+                    }
                 }
-            }
-        ]
-        mock_model.invoke = Mock(return_value=mock_response)
+            ],
+        ))
 
         # Act
         result = coder_node(base_state)
@@ -173,62 +213,32 @@ class TestCoderNode:
         assert change['file_path'] == '/workspace/test.py'
         assert change['operation'] == 'modify'
 
-    def test_coder_node_routes_to_reviewer_after_generation(self, mock_model_router, mock_file_tools, mock_git_tools, base_state):
-        """Test that code generation routes to reviewer."""
-        # Arrange
-        mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Code generated'
-        mock_response.tool_calls = [
-            {'name': 'write_file', 'args': {'file_path': '/test.py', 'content': 'code'}}
-        ]
-        mock_model.invoke = Mock(return_value=mock_response)
-
-        base_state['task_type'] = 'code_generation'
-        base_state['skip_review'] = False
-
-        # Act
-        result = coder_node(base_state)
-
-        # Assert
-        assert result.goto == 'reviewer'
-
-    def test_coder_node_routes_to_approval_when_required(self, mock_model_router, mock_file_tools, mock_git_tools, base_state):
-        """Test routing to approval when changes require approval."""
-        # Arrange
-        mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Code'
-        mock_response.tool_calls = [
-            {'name': 'write_file', 'args': {'file_path': '/test.py', 'content': 'code'}}
-        ]
-        mock_model.invoke = Mock(return_value=mock_response)
-
-        base_state['requires_approval'] = True
-
-        # Act
-        result = coder_node(base_state)
-
-        # Assert
-        assert result.goto == 'approval'
-
-    def test_coder_node_routes_to_end_when_done(self, mock_model_router, mock_file_tools, mock_git_tools, base_state):
-        """Test routing to END when task is complete."""
+    @pytest.mark.parametrize(
+        'state_override,tool_calls,expected_goto',
+        [
+            (
+                {'task_type': 'code_generation', 'skip_review': False},
+                [WRITE_FILE_CALL],
+                'reviewer',
+            ),
+            ({'requires_approval': True}, [WRITE_FILE_CALL], 'approval'),
+            ({'skip_review': True, 'requires_approval': False}, [], 'END'),
+        ],
+        ids=['reviewer', 'approval', 'end'],
+    )
+    def test_coder_node_routing(self, mock_model_router, mock_file_tools, mock_git_tools, base_state, state_override, tool_calls, expected_goto):
+        """Test where the coder hands off after generating code."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Task complete'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response('Code', tool_calls))
 
-        base_state['skip_review'] = True
-        base_state['requires_approval'] = False
+        base_state.update(state_override)
 
         # Act
         result = coder_node(base_state)
 
         # Assert
-        assert result.goto == 'END'
+        assert result.goto == expected_goto
 
     def test_coder_node_handles_errors_gracefully(self, mock_model_router, mock_file_tools, mock_git_tools, base_state):
         """Test error handling in coder agent."""
@@ -245,41 +255,19 @@ class TestCoderNode:
         assert len(result.update['errors']) > 0
         assert result.update['agent_statuses']['coder'] == 'failed'
 
-    def test_coder_node_uses_debugging_prompt_for_debug_tasks(self, mock_model_router, mock_file_tools, mock_git_tools, base_state):
-        """Test that debugging tasks use the debugging prompt."""
-        # Arrange
-        mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Bug fixed'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
-
-        base_state['task_type'] = 'debugging'
-
-        # Act
-        coder_node(base_state)
-
-        # Assert
-        # Verify the prompt used contains debugging instructions
-        call_args = mock_model.invoke.call_args
-        assert call_args is not None
-
-    def test_coder_node_uses_refactoring_prompt_for_refactor_tasks(self, mock_model_router, mock_file_tools, mock_git_tools, base_state):
-        """Test that refactoring tasks use the refactoring prompt."""
+    @pytest.mark.parametrize('task_type', ['debugging', 'refactoring'])
+    def test_coder_node_uses_task_specific_prompt(self, mock_model_router, mock_file_tools, mock_git_tools, base_state, task_type):
+        """Test that debugging and refactoring tasks invoke the model."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Code refactored'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response('Code updated'))
 
-        base_state['task_type'] = 'refactoring'
+        base_state['task_type'] = task_type
 
         # Act
         coder_node(base_state)
 
         # Assert
-        # Verify the prompt used
         call_args = mock_model.invoke.call_args
         assert call_args is not None
 
@@ -287,10 +275,7 @@ class TestCoderNode:
         """Test that workspace path is passed to the model."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Code'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response('Code'))
 
         # Act
         coder_node(base_state)
@@ -304,10 +289,7 @@ class TestCoderNode:
         """Test that agent output is created correctly."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Implementation complete'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response('Implementation complete'))
 
         # Act
         result = coder_node(base_state)
@@ -327,14 +309,14 @@ class TestCoderNode:
         """Test tracking of multiple tool executions."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Multiple operations'
-        mock_response.tool_calls = [
-            {'name': 'write_file', 'args': {'file_path': '/file1.py', 'content': 'code1'}},
-            {'name': 'write_file', 'args': {'file_path': '/file2.py', 'content': 'code2'}},
-            {'name': 'write_file', 'args': {'file_path': '/file3.py', 'content': 'code3'}},
-        ]
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response(
+            'Multiple operations',
+            [
+                {'name': 'write_file', 'args': {'file_path': '/file1.py', 'content': 'code1'}},
+                {'name': 'write_file', 'args': {'file_path': '/file2.py', 'content': 'code2'}},
+                {'name': 'write_file', 'args': {'file_path': '/file3.py', 'content': 'code3'}},
+            ],
+        ))
 
         # Act
         result = coder_node(base_state)
@@ -346,10 +328,7 @@ class TestCoderNode:
         """Test extracting task from messages when task_description is empty."""
         # Arrange
         mock_model = mock_model_router.return_value.get_model.return_value
-        mock_response = Mock()
-        mock_response.content = 'Task complete'
-        mock_response.tool_calls = []
-        mock_model.invoke = Mock(return_value=mock_response)
+        mock_model.invoke = Mock(return_value=_make_response('Task complete'))
 
         base_state['task_description'] = ''
         base_state['messages'] = [HumanMessage(content='Fix the login bug')]
@@ -0,0 +1,71 @@
+"""
+Unit tests for authentication dependencies.
+"""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+from uuid import uuid4
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.auth import get_current_principal, invalidate_principal_cache
+from app.core.exceptions import AuthenticationError
+from app.core.security import create_access_token
+
+
+def _credentials(user_id, **claims):
+    token = create_access_token(str(user_id), additional_data=claims)
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def _db_returning(row):
+    """Mock AsyncSession whose execute() yields row from one_or_none()."""
+    db = Mock()
+    db.execute = AsyncMock(return_value=Mock(one_or_none=Mock(return_value=row)))
+    return db
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Start each test with no cached user flags."""
+    invalidate_principal_cache()
+    yield
+    invalidate_principal_cache()
+
+
+@pytest.mark.unit
+class TestGetCurrentPrincipal:
+    """Test principal resolution and its cached user lookup."""
+
+    async def test_privileges_come_from_user_row(self, mock_settings):
+        """Test the superuser flag is read from the database, not the token."""
+        user_id = uuid4()
+        db = _db_returning(SimpleNamespace(is_active=True, is_superuser=False))
+
+        principal = await get_current_principal(_credentials(user_id, is_superuser=True), db)
+
+        assert principal.id == user_id
+        assert principal.is_superuser is False
+
+    async def test_user_flags_are_cached(self, mock_settings):
+        """Test repeat requests reuse the cached flags until invalidated."""
+        user_id = uuid4()
+        db = _db_returning(SimpleNamespace(is_active=True, is_superuser=True))
+
+        await get_current_principal(_credentials(user_id), db)
+        await get_current_principal(_credentials(user_id), db)
+        assert db.execute.await_count == 1
+
+        invalidate_principal_cache(user_id)
+        await get_current_principal(_credentials(user_id), db)
+        assert db.execute.await_count == 2
+
+    @pytest.mark.parametrize(
+        "row",
+        [None, SimpleNamespace(is_active=False, is_superuser=True)],
+        ids=["missing", "inactive"],
+    )
+    async def test_rejects_missing_or_inactive_user(self, mock_settings, row):
+        """Test tokens for unknown or deactivated users are refused."""
+        with pytest.raises(AuthenticationError):
+            await get_current_principal(_credentials(uuid4()), _db_returning(row))
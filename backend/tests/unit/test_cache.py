@@ -0,0 +1,63 @@
+"""
+Unit tests for in-process caching utilities.
+"""
+import pytest
+from unittest.mock import patch
+
+from app.core.cache import TTLCache
+
+
+@pytest.mark.unit
+class TestTTLCache:
+    """Test TTLCache expiry and eviction."""
+
+    def test_get_returns_stored_value(self):
+        """Test that a stored value is returned before it expires."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert "key" in cache
+
+    def test_get_returns_default_after_expiry(self):
+        """Test that expired entries are treated as missing."""
+        cache = TTLCache(maxsize=10, ttl=5)
+
+        with patch("app.core.cache.time.monotonic", return_value=100.0):
+            cache.set("key", "value")
+
+        with patch("app.core.cache.time.monotonic", return_value=106.0):
+            assert cache.get("key", "default") == "default"
+            assert "key" not in cache
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest entry is evicted once maxsize is exceeded."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_pop_removes_entry(self):
+        """Test that pop removes and returns the entry."""
+        cache = TTLCache()
+        cache.set("key", "value")
+
+        assert cache.pop("key") == "value"
+        assert cache.pop("key") is None
+        assert len(cache) == 0
+
+    def test_keys_returns_snapshot(self):
+        """Test that keys can be iterated while entries are removed."""
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        for key in cache.keys():
+            cache.pop(key)
+
+        assert len(cache) == 0
@@ -0,0 +1,74 @@
+"""
+Unit tests for NotificationService batch sends.
+"""
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from app.services.notification_service import FCM_MULTICAST_LIMIT, NotificationService
+
+
+def _send_each_for_multicast(message):
+    """Fake FCM batch send that fails every token starting with "bad"."""
+    results = [
+        SimpleNamespace(success=True, exception=None)
+        if not token.startswith("bad")
+        else SimpleNamespace(success=False, exception="invalid token")
+        for token in message.tokens
+    ]
+    return SimpleNamespace(
+        success_count=sum(result.success for result in results),
+        responses=results,
+    )
+
+
+@pytest.fixture
+def messaging():
+    """Mock firebase_admin.messaging module."""
+    mock = Mock()
+    mock.MulticastMessage = lambda **kwargs: SimpleNamespace(**kwargs)
+    mock.send_each_for_multicast = Mock(side_effect=_send_each_for_multicast)
+    return mock
+
+
+@pytest.fixture
+def notification_service(messaging):
+    """NotificationService wired to the mocked messaging module."""
+    service = NotificationService()
+    service._messaging = messaging
+    service.fcm_initialized = True
+    return service
+
+
+@pytest.mark.unit
+class TestSendBatchNotifications:
+    """Test multicast chunking and result aggregation."""
+
+    async def test_chunks_tokens_and_totals_results(self, notification_service, messaging):
+        """Test tokens are sent in FCM-sized chunks and totals span all chunks."""
+        tokens = [f"token-{i}" for i in range(FCM_MULTICAST_LIMIT * 2 + 1)]
+        tokens[3] = "bad-first-chunk"
+        tokens[-1] = "bad-last-chunk"
+
+        result = await notification_service.send_batch_notifications(
+            tokens, "Title", "Body"
+        )
+
+        sent = [call.args[0].tokens for call in messaging.send_each_for_multicast.call_args_list]
+        assert [len(chunk) for chunk in sent] == [FCM_MULTICAST_LIMIT, FCM_MULTICAST_LIMIT, 1]
+        assert [token for chunk in sent for token in chunk] == tokens
+
+        assert result["success_count"] == len(tokens) - 2
+        assert result["failure_count"] == 2
+        assert result["failed_tokens"] == ["bad-first-chunk", "bad-last-chunk"]
+
+    async def test_skips_send_when_fcm_not_initialized(self, notification_service, messaging):
+        """Test every token is reported failed when FCM isn't set up."""
+        notification_service.fcm_initialized = False
+
+        result = await notification_service.send_batch_notifications(
+            ["a", "b"], "Title", "Body"
+        )
+
+        messaging.send_each_for_multicast.assert_not_called()
+        assert result == {"success_count": 0, "failure_count": 2, "failed_tokens": ["a", "b"]}
@@ -5,13 +5,16 @@ import pytest
 from datetime import datetime
 from uuid import uuid4
 
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from app.core.security import hash_password
 from app.services.session_service import SessionService
-from app.db.models import SessionStatus, MessageRole
+from app.db.models import Message, MessageRole, SessionStatus, User
 from app.core.exceptions import NotFoundError, AuthorizationError
 
 
 @pytest.mark.unit
-@pytest.mark.asyncio
 class TestSessionServiceCreate:
     """Test session creation."""
 
@@ -19,7 +22,7 @@ class TestSessionServiceCreate:
         """Test creating a session with minimal data."""
         service = SessionService(db_session)
 
-        session = await service.create_session(user=test_user)
+        session = await service.create_session(principal=test_user)
 
         assert session.id is not None
         assert session.user_id == test_user.id
@@ -34,7 +37,7 @@ class TestSessionServiceCreate:
         service = SessionService(db_session)
 
         session = await service.create_session(
-            user=test_user,
+            principal=test_user,
             repo_url="https://github.com/test/repo",
             branch_name="main",
         )
@@ -47,7 +50,7 @@ class TestSessionServiceCreate:
         service = SessionService(db_session)
 
         session = await service.create_session(
-            user=test_user,
+            principal=test_user,
             repo_url="https://github.com/test/repo",
             branch_name="feature/test",
             project_name="Custom Project",
@@ -66,7 +69,7 @@ class TestSessionServiceCreate:
         service = SessionService(db_session)
 
         session = await service.create_session(
-            user=test_user,
+            principal=test_user,
             repo_url="https://github.com/test/my-awesome-repo",
         )
 
@@ -77,7 +80,7 @@ class TestSessionServiceCreate:
         service = SessionService(db_session)
 
         session = await service.create_session(
-            user=test_user,
+            principal=test_user,
             repo_url="https://github.com/test/my-repo.git",
         )
 
@@ -85,7 +88,6 @@ class TestSessionServiceCreate:
 
 
 @pytest.mark.unit
-@pytest.mark.asyncio
 class TestSessionServiceRetrieve:
     """Test session retrieval."""
 
@@ -98,6 +100,28 @@ class TestSessionServiceRetrieve:
         assert session.id == test_session.id
         assert session.user_id == test_user.id
 
+    async def test_get_session_with_messages(self, db_session, test_user, test_session):
+        """Test messages are only loaded when requested."""
+        service = SessionService(db_session)
+        await service.add_message(
+            test_session.id, test_user, MessageRole.USER, "Hello"
+        )
+        db_session.expunge_all()
+
+        session = await service.get_session_with_messages(test_session.id, test_user)
+
+        assert [m.content for m in session.messages] == ["Hello"]
+
+    async def test_get_session_does_not_load_messages(self, db_session, test_user, test_session):
+        """Test the default lookup refuses to lazy-load messages."""
+        service = SessionService(db_session)
+        db_session.expunge_all()
+
+        session = await service.get_session(test_session.id, test_user)
+
+        with pytest.raises(InvalidRequestError):
+            session.messages
+
     async def test_get_session_not_found(self, db_session, test_user):
         """Test retrieving non-existent session raises error."""
         service = SessionService(db_session)
@@ -108,13 +132,13 @@ class TestSessionServiceRetrieve:
 
         assert "Session" in str(exc_info.value)
 
-    async def test_get_session_unauthorized(self, db_session, test_user, test_session, admin_user):
+    async def test_get_session_unauthorized(self, db_session, test_user, test_session, other_user):
         """Test retrieving another user's session raises error."""
         service = SessionService(db_session)
 
-        # test_session belongs to test_user, try to access with admin_user (who is not superuser in this context)
+        # test_session belongs to test_user, try to access with a different non-superuser
         with pytest.raises(AuthorizationError) as exc_info:
-            await service.get_session(test_session.id, admin_user)
+            await service.get_session(test_session.id, other_user)
 
         assert "access" in str(exc_info.value).lower()
 
@@ -132,11 +156,11 @@ class TestSessionServiceRetrieve:
         service = SessionService(db_session)
 
         # Create multiple sessions
-        await service.create_session(user=test_user, description="Session 1")
-        await service.create_session(user=test_user, description="Session 2")
-        await service.create_session(user=test_user, description="Session 3")
+        await service.create_session(principal=test_user, description="Session 1")
+        await service.create_session(principal=test_user, description="Session 2")
+        await service.create_session(principal=test_user, description="Session 3")
 
-        sessions = await service.list_user_sessions(user=test_user)
+        sessions = await service.list_user_sessions(principal=test_user)
 
         assert len(sessions) == 3
         assert all(s.user_id == test_user.id for s in sessions)
@@ -146,8 +170,8 @@ class TestSessionServiceRetrieve:
         service = SessionService(db_session)
 
         # Create sessions with different statuses
-        session1 = await service.create_session(user=test_user)
-        session2 = await service.create_session(user=test_user)
+        session1 = await service.create_session(principal=test_user)
+        session2 = await service.create_session(principal=test_user)
 
         # Update one session to completed
         await service.update_session(
@@ -157,7 +181,7 @@ class TestSessionServiceRetrieve:
         )
 
         active_sessions = await service.list_user_sessions(
-            user=test_user,
+            principal=test_user,
             status=SessionStatus.ACTIVE
         )
 
@@ -170,14 +194,14 @@ class TestSessionServiceRetrieve:
 
         # Create 5 sessions
         for i in range(5):
-            await service.create_session(user=test_user, description=f"Session {i}")
+            await service.create_session(principal=test_user, description=f"Session {i}")
 
         # Get first page
-        page1 = await service.list_user_sessions(user=test_user, limit=2, offset=0)
+        page1 = await service.list_user_sessions(principal=test_user, limit=2, offset=0)
         assert len(page1) == 2
 
         # Get second page
-        page2 = await service.list_user_sessions(user=test_user, limit=2, offset=2)
+        page2 = await service.list_user_sessions(principal=test_user, limit=2, offset=2)
         assert len(page2) == 2
 
         # Ensure different sessions
@@ -187,10 +211,10 @@ class TestSessionServiceRetrieve:
         """Test that sessions are ordered by creation date (newest first)."""
         service = SessionService(db_session)
 
-        session1 = await service.create_session(user=test_user, description="First")
-        session2 = await service.create_session(user=test_user, description="Second")
+        session1 = await service.create_session(principal=test_user, description="First")
+        session2 = await service.create_session(principal=test_user, description="Second")
 
-        sessions = await service.list_user_sessions(user=test_user)
+        sessions = await service.list_user_sessions(principal=test_user)
 
         # Newest first
         assert sessions[0].id == session2.id
@@ -198,7 +222,6 @@ class TestSessionServiceRetrieve:
 
 
 @pytest.mark.unit
-@pytest.mark.asyncio
 class TestSessionServiceUpdate:
     """Test session updates."""
 
@@ -230,6 +253,16 @@ class TestSessionServiceUpdate:
         assert updated.repo_url == "https://github.com/new/repo"
         assert updated.branch_name == "develop"
 
+    async def test_in_place_json_edits_are_persisted(self, db_session, test_session):
+        """Test in-place edits to JSON columns are flushed without reassignment."""
+        test_session.agent_statuses["coder"] = "running"
+        test_session.files_changed.append("app/main.py")
+        await db_session.commit()
+
+        await db_session.refresh(test_session)
+        assert test_session.agent_statuses == {"coder": "running"}
+        assert test_session.files_changed == ["app/main.py"]
+
     async def test_update_session_multiple_fields(self, db_session, test_user, test_session):
         """Test updating multiple fields at once."""
         service = SessionService(db_session)
@@ -284,20 +317,19 @@ class TestSessionServiceUpdate:
         assert updated.user_id == test_user.id
         assert updated.description == "New description"
 
-    async def test_update_session_unauthorized(self, db_session, test_session, admin_user):
+    async def test_update_session_unauthorized(self, db_session, test_session, other_user):
         """Test updating another user's session raises error."""
         service = SessionService(db_session)
 
         with pytest.raises(AuthorizationError):
             await service.update_session(
                 test_session.id,
-                admin_user,
+                other_user,
                 {"description": "Hacked!"}
             )
 
 
 @pytest.mark.unit
-@pytest.mark.asyncio
 class TestSessionServiceDelete:
     """Test session deletion."""
 
@@ -312,16 +344,36 @@ class TestSessionServiceDelete:
         with pytest.raises(NotFoundError):
             await service.get_session(session_id, test_user)
 
-    async def test_delete_session_unauthorized(self, db_session, test_session, admin_user):
+    async def test_delete_session_with_messages(self, db_session, test_user, test_session):
+        """Test deleting a session also removes its messages."""
+        service = SessionService(db_session)
+        await service.add_message(
+            test_session.id, test_user, MessageRole.USER, "Message"
+        )
+
+        await service.delete_session(test_session.id, test_user)
+
+        result = await db_session.execute(
+            select(Message).where(Message.session_id == test_session.id)
+        )
+        assert result.scalars().all() == []
+
+    async def test_delete_session_not_found(self, db_session, test_user):
+        """Test deleting a non-existent session raises error."""
+        service = SessionService(db_session)
+
+        with pytest.raises(NotFoundError):
+            await service.delete_session(uuid4(), test_user)
+
+    async def test_delete_session_unauthorized(self, db_session, test_session, other_user):
         """Test deleting another user's session raises error."""
         service = SessionService(db_session)
 
         with pytest.raises(AuthorizationError):
-            await service.delete_session(test_session.id, admin_user)
+            await service.delete_session(test_session.id, other_user)
 
 
 @pytest.mark.unit
-@pytest.mark.asyncio
 class TestSessionServiceSync:
     """Test desktop session synchronization."""
 
@@ -338,7 +390,7 @@ class TestSessionServiceSync:
         }
 
         session = await service.sync_from_desktop(
-            user=test_user,
+            principal=test_user,
             desktop_session_id="desktop_123",
             context=context,
         )
@@ -359,7 +411,7 @@ class TestSessionServiceSync:
             "branch_name": "main",
         }
         session1 = await service.sync_from_desktop(
-            user=test_user,
+            principal=test_user,
             desktop_session_id="desktop_123",
             context=context1,
         )
@@ -372,7 +424,7 @@ class TestSessionServiceSync:
             "files_changed": ["file3.py"],
         }
         session2 = await service.sync_from_desktop(
-            user=test_user,
+            principal=test_user,
             desktop_session_id="desktop_123",
             context=context2,
         )
@@ -382,9 +434,27 @@ class TestSessionServiceSync:
         assert session2.branch_name == "develop"
         assert session2.current_commit_sha == "def456"
 
+    async def test_sync_adds_messages(self, db_session, test_user):
+        """Test syncing inserts the desktop messages."""
+        service = SessionService(db_session)
+
+        session = await service.sync_from_desktop(
+            principal=test_user,
+            desktop_session_id="desktop_456",
+            context={
+                "messages": [
+                    {"role": "user", "content": "Hi"},
+                    {"role": "assistant", "content": "Hello", "agent": "coder"},
+                ],
+            },
+        )
+
+        messages, _ = await service.get_session_messages(session.id, test_user)
+        assert [m.content for m in messages] == ["Hi", "Hello"]
+        assert messages[1].agent == "coder"
+
 
 @pytest.mark.unit
-@pytest.mark.asyncio
 class TestSessionServiceMessages:
     """Test message management."""
 
@@ -394,7 +464,7 @@ class TestSessionServiceMessages:
 
         message = await service.add_message(
             session_id=test_session.id,
-            user=test_user,
+            principal=test_user,
             role=MessageRole.USER,
             content="Test message",
         )
@@ -410,7 +480,7 @@ class TestSessionServiceMessages:
 
         message = await service.add_message(
             session_id=test_session.id,
-            user=test_user,
+            principal=test_user,
             role=MessageRole.USER,
             content="Test message",
             voice_transcript="Original voice input",
@@ -424,7 +494,7 @@ class TestSessionServiceMessages:
 
         message = await service.add_message(
             session_id=test_session.id,
-            user=test_user,
+            principal=test_user,
             role=MessageRole.ASSISTANT,
             content="Agent response",
             agent="coder",
@@ -440,13 +510,40 @@ class TestSessionServiceMessages:
         metadata = {"key": "value", "count": 42}
         message = await service.add_message(
             session_id=test_session.id,
-            user=test_user,
+            principal=test_user,
             role=MessageRole.SYSTEM,
             content="System message",
             metadata=metadata,
         )
 
-        assert message.metadata == metadata
+        assert message.message_metadata == metadata
+
+    async def test_add_message_session_not_found(self, db_session, test_user):
+        """Test adding a message to a non-existent session raises error."""
+        service = SessionService(db_session)
+
+        with pytest.raises(NotFoundError):
+            await service.add_message(
+                uuid4(), test_user, MessageRole.USER, "Orphan message"
+            )
+
+    async def test_add_message_unauthorized(self, db_session, test_user, test_session):
+        """Test adding a message to another user's session raises error."""
+        service = SessionService(db_session)
+        other_user = User(
+            email="other@example.com",
+            hashed_password=hash_password("otherpassword123"),
+            full_name="Other User",
+            is_active=True,
+            is_superuser=False,
+        )
+        db_session.add(other_user)
+        await db_session.commit()
+
+        with pytest.raises(AuthorizationError):
+            await service.add_message(
+                test_session.id, other_user, MessageRole.USER, "Intruder"
+            )
 
     async def test_get_session_messages(self, db_session, test_user, test_session):
         """Test retrieving messages for a session."""
@@ -463,11 +560,12 @@ class TestSessionServiceMessages:
             test_session.id, test_user, MessageRole.USER, "Message 3"
         )
 
-        messages = await service.get_session_messages(
+        messages, next_cursor = await service.get_session_messages(
             session_id=test_session.id,
-            user=test_user,
+            principal=test_user,
         )
 
+        assert next_cursor is None
         assert len(messages) == 3
         assert messages[0].content == "Message 1"  # Ordered by timestamp
         assert messages[1].content == "Message 2"
@@ -484,26 +582,37 @@ class TestSessionServiceMessages:
             )
 
         # Get first page
-        page1 = await service.get_session_messages(
+        page1, cursor = await service.get_session_messages(
             session_id=test_session.id,
-            user=test_user,
+            principal=test_user,
             limit=2,
-            offset=0,
         )
 
         assert len(page1) == 2
+        assert cursor == (page1[-1].timestamp, page1[-1].id)
 
         # Get second page
-        page2 = await service.get_session_messages(
+        page2, cursor = await service.get_session_messages(
             session_id=test_session.id,
-            user=test_user,
+            principal=test_user,
             limit=2,
-            offset=2,
+            after=cursor,
         )
 
         assert len(page2) == 2
         assert page1[0].id != page2[0].id
 
+        # Last page is short and has no further cursor
+        page3, cursor = await service.get_session_messages(
+            session_id=test_session.id,
+            principal=test_user,
+            limit=2,
+            after=cursor,
+        )
+
+        assert [m.content for m in page3] == ["Message 4"]
+        assert cursor is None
+
 
 @pytest.mark.unit
 class TestSessionServiceHelpers:
@@ -523,6 +632,13 @@ class TestSessionServiceHelpers:
         name = service._extract_project_name("https://github.com/user/my-project.git")
         assert name == "my-project"
 
+    def test_extract_project_name_keeps_embedded_git(self):
+        """Test that only a trailing .git is removed."""
+        service = SessionService(None)
+
+        name = service._extract_project_name("https://github.com/user/user.github.io")
+        assert name == "user.github.io"
+
     def test_extract_project_name_from_gitlab_url(self):
         """Test extracting from GitLab URL."""
         service = SessionService(None)